@@ -1,9 +1,28 @@
 from odoo import models, fields, api
 import base64
+import functools
+
+
+def instrumented(method):
+    """Record the query count and timings of ``method`` in the petty cash metrics
+
+    The metrics go to the ``petty.cash.action.metric`` ring buffer and its
+    Slowest Actions summary, and are only recorded while the petty-cash
+    module is installed and its ``petty_cash.instrumentation`` parameter is set.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if 'petty.cash.action.metric' not in self.env:
+            return method(self, *args, **kwargs)
+        return self.env['petty.cash.action.metric']._call(self, method, *args, **kwargs)
+
+    return wrapper
+
 
 class MrpProduction(models.Model):
     _inherit = 'mrp.production'
     
+    @instrumented
     def action_report_mo_overview_dual_currency(self):
         """Generate comprehensive dual currency HTML report"""
         
@@ -33,6 +52,7 @@ class MrpProduction(models.Model):
                 }
             }
     
+    @instrumented
     def _generate_dual_currency_data(self):
         """Generate comprehensive dual currency data"""
         data = {
@@ -17,11 +17,18 @@
 
         # data
         "data/sequence_data.xml",
+        "data/float_denomination_cron.xml",
+        "data/petty_cash_alert_cron.xml",
+        "data/float_dashboard_cron.xml",
+        "data/petty_cash_accounting_cron.xml",
+        "data/petty_cash_archive_cron.xml",
 
         # wizard
         "wizard/cash_denomination_wizard_view.xml",
         "wizard/cash_denomination_iou_wizard_view.xml",
         "wizard/initial_denomination_wizard_views.xml",
+        "wizard/bulk_approval_wizard_views.xml",
+        "wizard/history_import_wizard_views.xml",
         
         # views
         "views/cash_reimbursement_views.xml",
@@ -30,6 +37,9 @@
         "views/float_customization_views.xml",
         "views/float_request_views.xml",
         "views/float_denomination_views.xml",
+        "views/float_denomination_move_views.xml",
+        "views/float_dashboard_views.xml",
+        "views/float_transfer_views.xml",
         
         "views/iou_request_views.xml",
         "views/iou_request_list_views.xml",
@@ -38,6 +48,9 @@
         # "views/petty_cash_bill_settlement_views.xml",
         "views/petty_cash_category_views.xml",
         "views/petty_cash_request_views.xml",
+        "views/hr_department_views.xml",
+        "views/petty_cash_config_views.xml",
+        "views/petty_cash_metric_views.xml",
         
         
         "views/petty_cash_menu.xml",
@@ -49,6 +62,8 @@
     "assets": {
         "web.assets_backend": [
             "petty-cash/static/src/css/float_kanban.css",
+            "petty-cash/static/src/js/denomination_grid.js",
+            "petty-cash/static/src/xml/denomination_grid.xml",
         ]
     },
     "qweb": [],
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from . import petty_cash_bulk
+from . import petty_cash_workflow
 from . import iou_bill_settlement
 from . import petty_cash_category
 from . import iou_request
@@ -7,6 +9,15 @@ from . import petty_cash_bill_settlement
 from . import float_request
 from . import float_customization
 from . import float_denomination
+from . import float_denomination_move
+from . import float_transfer
 from . import cash_reimbursement
-
-
+from . import petty_cash_permission
+from . import hr_department
+from . import res_users
+from . import petty_cash_config
+from . import petty_cash_due_alert
+from . import float_dashboard
+from . import petty_cash_benchmark
+from . import petty_cash_metric
+from . import petty_cash_accounting
@@ -1,8 +1,8 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, time
 
-
+from .petty_cash_metric import instrumented
 
 import logging
 
@@ -12,7 +12,8 @@ _logger = logging.getLogger(__name__)
 class CashReimbursement(models.Model):
     _name = "cash.reimbursement"
     _description = "Cash Reimbursement"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["petty.cash.bulk.mixin", "petty.cash.workflow.mixin", "mail.thread", "mail.activity.mixin"]
+    _bulk_parent_field = "float_request_id"
     _rec_name = "name"
     _order = "request_date desc, id desc"
 
@@ -148,6 +149,32 @@ class CashReimbursement(models.Model):
         string="Report To Date", help="End date for expense report generation"
     )
 
+    account_move_id = fields.Many2one(
+        "account.move",
+        string="Journal Entry",
+        readonly=True,
+        copy=False,
+        index="btree_not_null",
+        help="Journal entry the reimbursed cash was posted in",
+    )
+
+    posting_error = fields.Char(
+        string="Posting Error",
+        readonly=True,
+        copy=False,
+        help="Why the reimbursement could not be posted to accounting; "
+        "it is left out of the postings until retried",
+    )
+
+    def init(self):
+        # Reimbursements are listed per float and state, latest first
+        tools.create_index(
+            self.env.cr,
+            "cash_reimbursement_float_state_date_idx",
+            self._table,
+            ["float_request_id", "state", "request_date"],
+        )
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -157,6 +184,12 @@ class CashReimbursement(models.Model):
                 vals["name"] = self._generate_sequence_number()
         return super().create(vals_list)
 
+    def write(self, vals):
+        res = super().write(vals)
+        if "state" in vals:
+            self.env["float.dashboard"]._trigger_refresh()
+        return res
+
     def _generate_sequence_number(self):
         """Generate a unique sequence number for the reimbursement request."""
         sequence = self.env["ir.sequence"].next_by_code("cash.reimbursement")
@@ -180,114 +213,94 @@ class CashReimbursement(models.Model):
             if record.received_amount < 0:
                 raise ValidationError(_("Received amount cannot be negative."))
 
+    def _get_workflow_transitions(self):
+        return {
+            "submit": {
+                "from": ("draft",),
+                "to": "pending",
+                "error": _("Only draft requests can be submitted."),
+                "message": _("Reimbursement request submitted for approval."),
+            },
+            "approve": {
+                "from": ("pending",),
+                "to": "approved",
+                "error": _("Only pending requests can be approved."),
+                "values": {
+                    "is_manager_approved": True,
+                    "approved_by": self.env.user.id,
+                    "approval_date": fields.Datetime.now(),
+                },
+                "message": _("Reimbursement request approved by %s.") % self.env.user.name,
+            },
+            "reject": {
+                "from": ("pending",),
+                "to": "rejected",
+                "error": _("Only pending requests can be rejected."),
+                "message": _("Reimbursement request rejected."),
+            },
+            "complete": {
+                "from": ("approved",),
+                "to": "completed",
+                "error": _("Only approved requests can be marked as completed."),
+                "check": "_check_can_complete",
+                "message": _("Reimbursement request completed."),
+            },
+            "reset_to_draft": {
+                "from": ("pending",),
+                "to": "draft",
+                "error": _("Only pending requests can be reset to draft."),
+                "values": {
+                    "is_manager_approved": False,
+                    "approved_by": False,
+                    "cash_received_by_handler": False,
+                    "received_amount": 0.0,
+                    "received_voucher": False,
+                    "received_voucher_filename": False,
+                },
+            },
+        }
+
     def action_submit(self):
         """Submit reimbursement request for approval"""
-        for record in self:
-            if record.state != "draft":
-                raise UserError(_("Only draft requests can be submitted."))
-            record.state = "pending"
-            record.message_post(
-                body=_("Reimbursement request submitted for approval."),
-                message_type="notification",
-            )
+        self._workflow_transition("submit")
 
     def action_approve(self):
         """Approve the reimbursement request"""
-        for record in self:
-            if record.state != "pending":
-                raise UserError(_("Only pending requests can be approved."))
-            record.write(
-                {
-                    "state": "approved",
-                    "is_manager_approved": True,
-                    "approved_by": self.env.user.id,
-                    "approval_date": fields.Datetime.now(),
-                }
-            )
-            record.message_post(
-                body=_("Reimbursement request approved by %s.") % self.env.user.name,
-                message_type="notification",
-            )
+        self._workflow_transition("approve")
 
     def action_reject(self):
         """Reject the reimbursement request"""
-        for record in self:
-            if record.state != "pending":
-                raise UserError(_("Only pending requests can be rejected."))
-            record.state = "rejected"
-            record.message_post(
-                body=_("Reimbursement request rejected."),
-                message_type="notification",
-            )
+        self._workflow_transition("reject")
 
+    @instrumented
     def action_complete_request(self):
         """Mark the reimbursement request as completed"""
-        for record in self:
-            if record.state != "approved":
-                raise UserError(_("Only approved requests can be marked as completed."))
-            if not record.cash_received_by_handler:
-                raise UserError(
-                    _(
-                        "Cash must be received by the handler before completing the request."
-                    )
-                )
-            if not record.received_amount:
-                raise UserError(_("Please enter the Received amount."))
+        self._workflow_transition("complete")
 
-            record.state = "completed"
-            record.message_post(
-                body=_("Reimbursement request completed."),
-                message_type="notification",
+    def _check_can_complete(self):
+        if not all(self.mapped("cash_received_by_handler")):
+            raise UserError(
+                _(
+                    "Cash must be received by the handler before completing the request."
+                )
             )
+        if not all(self.mapped("received_amount")):
+            raise UserError(_("Please enter the Received amount."))
 
     def _update_float_denomination(self):
         """Update the float denomination after reimbursement completion"""
         self.ensure_one()
 
-        current_denom = self.env["float.denomination"].search(
-            [
-                ("float_request_id", "=", self.float_request_id.id),
-            ],
-            order="last_updated desc",
-            limit=1,
-        )
+        current_denom = self.env["float.denomination"]._get_drawer(self.float_request_id)
 
         if current_denom:
-            if self.received_amount >= 1000:
-                current_denom.denom_1000_qty += int(self.received_amount / 1000)
-                remaining = self.received_amount % 1000
-                if remaining >= 100:
-                    current_denom.denom_100_qty += int(remaining / 100)
-                    remaining = remaining % 100
-                if remaining >= 50:
-                    current_denom.denom_50_qty += int(remaining / 50)
-                    remaining = remaining % 50
-                if remaining >= 20:
-                    current_denom.denom_20_qty += int(remaining / 20)
-                    remaining = remaining % 20
-                if remaining >= 10:
-                    current_denom.denom_10_qty += int(remaining / 10)
-                    remaining = remaining % 10
-                if remaining >= 1:
-                    current_denom.denom_1_qty += int(remaining)
-            else:
-                remaining = self.received_amount
-                if remaining >= 100:
-                    current_denom.denom_100_qty += int(remaining / 100)
-                    remaining = remaining % 100
-                if remaining >= 50:
-                    current_denom.denom_50_qty += int(remaining / 50)
-                    remaining = remaining % 50
-                if remaining >= 20:
-                    current_denom.denom_20_qty += int(remaining / 20)
-                    remaining = remaining % 20
-                if remaining >= 10:
-                    current_denom.denom_10_qty += int(remaining / 10)
-                    remaining = remaining % 10
-                if remaining >= 1:
-                    current_denom.denom_1_qty += int(remaining)
-
-            current_denom.last_updated = fields.Datetime.now()
+            delta = {}
+            remaining = int(self.received_amount)
+            for value in (1000, 100, 50, 20, 10, 1):
+                if remaining >= value:
+                    delta[f"denom_{value}_qty"] = remaining // value
+                    remaining %= value
+            current_denom.apply_drawer_delta(delta, reference=self, move_type="refill")
 
     def action_update_denomination(self):
         self.ensure_one()
@@ -307,22 +320,14 @@ class CashReimbursement(models.Model):
             },
         }
 
+    def action_retry_posting(self):
+        """Queue the reimbursements for the next accounting posting again"""
+        self.write({"posting_error": False})
+        return True
+
     def action_reset_to_draft(self):
         """Reset the reimbursement request to draft state"""
-        for record in self:
-            if record.state not in ["pending"]:
-                raise UserError(_("Only pending requests can be reset to draft."))
-            record.state = "draft"
-            record.write(
-                {
-                    "is_manager_approved": False,
-                    "approved_by": False,
-                    "cash_received_by_handler": False,
-                    "received_amount": 0.0,
-                    "received_voucher": False,
-                    "received_voucher_filename": False,
-                }
-            )
+        self._workflow_transition("reset_to_draft")
 
     def name_get(self):
         """Custom name display"""
@@ -346,7 +351,7 @@ class CashReimbursement(models.Model):
 
             valid_states = ['completed', 'cash_issued']
 
-            expenses = self.env['petty.cash.request'].search([
+            expenses = self.env['petty.cash.request'].with_context(active_test=False).search([
                 ('float_request_id', '=', self.float_request_id.id),
                 ('request_date', '>=', from_datetime),
                 ('request_date', '<=', to_datetime),
@@ -361,6 +366,7 @@ class CashReimbursement(models.Model):
             _logger.error("Error fetching petty cash expenses: %s", e)
             return self.env['petty.cash.request']
 
+    @instrumented
     def action_view_reimbursement_report(self):
         """Action to view reimbursement report"""
         self.ensure_one()
@@ -374,7 +380,7 @@ class CashReimbursement(models.Model):
             from_datetime = f"{self.report_from_date} 00:00:00"
             to_datetime = f"{self.report_to_date} 23:59:59"
 
-            iou_requests = self.env['petty.cash.iou.request'].search([
+            iou_requests = self.env['petty.cash.iou.request'].with_context(active_test=False).search([
                 ('float_request_id', '=', self.float_request_id.id),
                 ('request_date', '>=', from_datetime),
                 ('request_date', '<=', to_datetime),
@@ -1,10 +1,24 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+from psycopg2.errors import UniqueViolation
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Partial unique index allowing one pending customization per float
+PENDING_CUSTOMIZATION_INDEX = 'float_customization_pending_uniq'
+
+# Roles allowed to submit float customizations
+SUBMITTER_ROLES = ('float_manager', 'manager', 'accountant', 'system')
+
+# Roles allowed to approve float customizations
+APPROVER_ROLES = ('accountant', 'manager', 'system')
 
 class FloatCustomization(models.Model):
     _name = 'float.customization'
     _description = 'Float Customization'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['petty.cash.workflow.mixin', 'mail.thread', 'mail.activity.mixin']
     _rec_name = 'float_request_id'
     
     float_request_id = fields.Many2one(
@@ -277,95 +291,184 @@ class FloatCustomization(models.Model):
             if not any(modifications):
                 raise ValidationError(_('Please select at least one modification to make.'))
 
-    @api.constrains('float_request_id')
+    def init(self):
+        if not tools.index_exists(self.env.cr, PENDING_CUSTOMIZATION_INDEX):
+            duplicates = self._get_pending_duplicates()
+            if duplicates:
+                _logger.warning(
+                    'Unique index %s not created, resolve these pending customizations '
+                    'and update the module: %s',
+                    PENDING_CUSTOMIZATION_INDEX,
+                    '; '.join(
+                        f'float {float_request_id} (ids {ids})'
+                        for float_request_id, ids in duplicates
+                    ),
+                )
+                return
+            self.env.cr.execute(SQL(
+                "CREATE UNIQUE INDEX %s ON %s (float_request_id) WHERE state IN ('draft', 'requested')",
+                SQL.identifier(PENDING_CUSTOMIZATION_INDEX),
+                SQL.identifier(self._table),
+            ))
+            self.env.registry.clear_cache()
+
+    @api.model
+    @tools.ormcache()
+    def _has_pending_index(self):
+        """Whether PENDING_CUSTOMIZATION_INDEX exists, see ``init``"""
+        return tools.index_exists(self.env.cr, PENDING_CUSTOMIZATION_INDEX)
+
+    @api.model
+    def _get_pending_duplicates(self, float_request_ids=None):
+        """Return ``(float_request_id, ids)`` of the floats with more than one
+        pending customization, among ``float_request_ids`` if given"""
+        self.env.cr.execute(SQL(
+            """SELECT float_request_id, array_agg(id ORDER BY id)
+                 FROM %(table)s
+                WHERE state IN ('draft', 'requested') %(restrict)s
+             GROUP BY float_request_id
+               HAVING COUNT(*) > 1""",
+            table=SQL.identifier(self._table),
+            restrict=SQL(
+                'AND float_request_id IN %s', tuple(float_request_ids),
+            ) if float_request_ids else SQL(),
+        ))
+        return self.env.cr.fetchall()
+
     def _check_pending_customizations(self):
-        """Check for existing pending customizations"""
-        for record in self:
-            if record.float_request_id:
-                existing = self.search([
-                    ('float_request_id', '=', record.float_request_id.id),
-                    ('state', 'in', ['draft', 'requested']),
-                    ('id', '!=', record.id)
-                ])
-                if existing:
-                    raise ValidationError(
-                        _('There are already pending customizations for float "%s". '
-                          'Please resolve them before creating new ones.') % record.float_request_id.name)
+        """Enforce one pending customization per float while the index is missing"""
+        if not self or self._has_pending_index():
+            return
+        self.flush_recordset(['float_request_id', 'state'])
+        duplicates = self._get_pending_duplicates(self.float_request_id.ids)
+        if duplicates:
+            raise self._pending_customization_error([float_id for float_id, __ in duplicates])
+
+    @api.model
+    def _pending_customization_error(self, float_request_ids):
+        float_requests = self.env['float.request'].browse(float_request_ids)
+        return ValidationError(
+            _('There are already pending customizations for float "%s". '
+              'Please resolve them before creating new ones.') % ', '.join(float_requests.mapped('name'))
+        )
+
+    @api.model
+    def _raise_pending_customization(self, error, float_request_ids):
+        """Turn a violation of PENDING_CUSTOMIZATION_INDEX into the user error"""
+        if error.diag.constraint_name != PENDING_CUSTOMIZATION_INDEX:
+            raise error
+        raise self._pending_customization_error(float_request_ids) from error
+
+    def _get_workflow_transitions(self):
+        user = self.env.user
+        return {
+            'submit': {
+                'from': ('draft',),
+                'to': 'requested',
+                'error': _('Only draft requests can be submitted.'),
+                'roles': SUBMITTER_ROLES,
+                'denied': _('You do not have permission to submit customization requests.'),
+                'message': _('Float customization request submitted for approval.'),
+            },
+            'approve': {
+                'from': ('requested',),
+                'to': 'approved',
+                'error': _('Only requested customizations can be approved.'),
+                'roles': APPROVER_ROLES,
+                'denied': _('You do not have permission to approve customizations. Required groups: Petty Cash Accountant, Petty Cash Manager, or System Administrator.'),
+                'values': {
+                    'approved_by': user.id,
+                    'approval_date': fields.Datetime.now(),
+                },
+                'hook': '_apply_customizations',
+            },
+            'reject': {
+                'from': ('requested',),
+                'to': 'rejected',
+                'error': _('Only requested customizations can be rejected.'),
+                'values': {
+                    'rejected_by': user.id,
+                    'rejection_date': fields.Datetime.now(),
+                },
+                'message': lambda record: _('Float customization request rejected by %s\nReason: %s') % (
+                    user.name, record.rejection_reason or '',
+                ),
+                'hook': '_complete_approval_activities',
+            },
+            'reset_to_draft': {
+                'from': ('rejected',),
+                'to': 'draft',
+                'error': _('Only rejected requests can be reset to draft.'),
+                'values': {
+                    'rejected_by': False,
+                    'rejection_date': False,
+                    'rejection_reason': False,
+                },
+            },
+            'cancel': {
+                'from': ('draft', 'requested'),
+                'to': 'cancelled',
+                'error': _('Only draft or requested customizations can be cancelled.'),
+                'message': _('Float customization request cancelled by %s') % user.name,
+            },
+        }
 
     def action_submit(self):
         """Submit request for approval - Enhanced with proper group checks"""
-        for record in self:
-            if record.state != 'draft':
-                raise UserError(_('Only draft requests can be submitted.'))
-            
-            # Check if user can submit (should be Float Manager or higher)
-            can_submit = any([
-                self.env.user.has_group('petty-cash.group_petty_cash_float_manager'),
-                self.env.user.has_group('petty-cash.group_petty_cash_manager'),
-                self.env.user.has_group('petty-cash.group_petty_cash_accountant'),
-                self.env.user.has_group('base.group_system'),
-            ])
-            
-            if not can_submit:
-                raise UserError(_('You do not have permission to submit customization requests.'))
-            
-            record.state = 'requested'
-            
-            # Client notification (more reliable than message_post)
-            record.message_post(
-                body=_('Float customization request submitted for approval.'),
-                message_type='notification'
-            )
-            
-            record._send_approval_notification()
-            
-            # Return success notification
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Success'),
-                    'message': _('Float customization request submitted for approval.'),
-                    'type': 'success',
-                }
+        # Approvers are notified by write() on the state change
+        self._workflow_transition('submit')
+
+        # Return success notification
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': _('Float customization request submitted for approval.'),
+                'type': 'success',
             }
+        }
             
+    def _get_approvers(self):
+        """Users allowed to approve customizations, each listed once"""
+        group_ids = self.env['petty.cash.permission']._get_group_ids(*APPROVER_ROLES)
+        return self.env['res.groups'].browse(group_ids).users
+
     def _send_approval_notification(self):
-        """Send notification to managers for approval"""
-        self.ensure_one()
-        
-        # FIXED: Use your custom petty cash groups instead of account.group_account_manager
-        approver_groups = [
-            'petty-cash.group_petty_cash_accountant',  # Your accountant group
-            'petty-cash.group_petty_cash_manager',     # Your manager group
-        ]
-        
-        approvers = self.env['res.users']
-        for group_xmlid in approver_groups:
-            try:
-                group = self.env.ref(group_xmlid, raise_if_not_found=False)
-                if group and group.users:
-                    approvers |= group.users
-            except:
-                continue
-        
-        # Also include system administrators
-        try:
-            admin_group = self.env.ref('base.group_system', raise_if_not_found=False)
-            if admin_group and admin_group.users:
-                approvers |= admin_group.users
-        except:
-            pass
-        
-        # Create activities for all approvers
-        for approver in approvers:
-            self.activity_schedule(
-                'mail.mail_activity_data_todo',
-                user_id=approver.id,
-                summary=f'Float Customization Approval Required - {self.float_request_id.name}',
-                note=f'Please review and approve the customization request for float: {self.float_request_id.name}'
+        """Send notification to managers for approval
+
+        Activities for all customizations and approvers are created with a
+        single ``create``; the assignment e-mails are replaced by one queued
+        notification per customization, delivered by the mail queue cron
+        instead of during the submit.
+        """
+        approvers = self._get_approvers()
+        if not self or not approvers:
+            return
+
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        res_model_id = self.env['ir.model']._get_id(self._name)
+
+        self.env['mail.activity'].with_context(mail_activity_quick_update=True).create([
+            {
+                'activity_type_id': activity_type.id if activity_type else False,
+                'res_model_id': res_model_id,
+                'res_id': record.id,
+                'user_id': approver.id,
+                'summary': f'Float Customization Approval Required - {record.float_request_id.name}',
+                'note': f'Please review and approve the customization request for float: {record.float_request_id.name}',
+            }
+            for record in self
+            for approver in approvers
+        ])
+
+        for record in self.with_context(mail_notify_force_send=False):
+            record.message_notify(
+                partner_ids=approvers.partner_id.ids,
+                subject=_('Float Customization Approval Required - %s') % record.float_request_id.name,
+                body=_('Please review and approve the customization request for float: %s') % record.float_request_id.name,
             )
-                
+
     @api.model
     def get_system_configurations(self):
         """Get system configuration parameters for customizations"""
@@ -388,81 +491,63 @@ class FloatCustomization(models.Model):
 
     def action_approve(self):
         """Approve the customization request"""
-        for record in self:
-            if record.state != 'requested':
-                raise UserError(_('Only requested customizations can be approved.'))
-            
-            # FIXED: Check for your custom petty cash groups instead of account manager
-            has_permission = any([
-                self.env.user.has_group('petty-cash.group_petty_cash_accountant'),
-                self.env.user.has_group('petty-cash.group_petty_cash_manager'),
-                self.env.user.has_group('base.group_system'),  # System admin
-            ])
-            
-            if not has_permission:
-                raise UserError(_('You do not have permission to approve customizations. Required groups: Petty Cash Accountant, Petty Cash Manager, or System Administrator.'))
-            
+        self._workflow_transition('approve')
 
+    def _apply_customizations(self):
+        """Apply the approved changes to the floats and log them"""
+        summaries = {}
+        for record in self:
             float_record = record.float_request_id
+            vals = {}
             changes = []
-            
+
             # Apply changes and build change log
             if record.modify_float_amount:
-                old_amount = float_record.initial_amount
-                float_record.initial_amount = record.new_float_amount
-                changes.append(f'Float amount: {old_amount} → {record.new_float_amount}')
-                
+                vals['initial_amount'] = record.new_float_amount
+                changes.append(f'Float amount: {float_record.initial_amount} → {record.new_float_amount}')
+
             if record.modify_can_exceed:
                 old_can_exceed = float_record.can_exceed
-                float_record.can_exceed = record.new_can_exceed
+                vals['can_exceed'] = record.new_can_exceed
                 if record.new_can_exceed and record.new_exceed_limit:
-                    float_record.exceed_limit = record.new_exceed_limit
+                    vals['exceed_limit'] = record.new_exceed_limit
                     changes.append(f'Exceed permission: {old_can_exceed} → {record.new_can_exceed} (Limit: Rs. {record.new_exceed_limit})')
                 else:
                     changes.append(f'Exceed permission: {old_can_exceed} → {record.new_can_exceed}')
-               
+
             if record.modify_float_manager:
                 old_manager = float_record.float_manager_id.name if float_record.float_manager_id else 'None'
-                float_record.float_manager_id = record.new_float_manager_id
+                vals['float_manager_id'] = record.new_float_manager_id.id
                 new_manager = record.new_float_manager_id.name if record.new_float_manager_id else 'None'
                 changes.append(f'Float manager: {old_manager} → {new_manager}')
-            
+
             if record.modify_cross_department:
-                old_cross_dept = float_record.allow_cross_department_request
-                float_record.allow_cross_department_request = record.new_allow_cross_department
-                changes.append(f'Cross-department access: {old_cross_dept} → {record.new_allow_cross_department}')
-            
+                vals['allow_cross_department_request'] = record.new_allow_cross_department
+                changes.append(f'Cross-department access: {float_record.allow_cross_department_request} → {record.new_allow_cross_department}')
+
             if record.modify_exceed_margin:
-                old_margin = float_record.exceed_margin_percentage
-                float_record.exceed_margin_percentage = record.new_exceed_margin_percentage
-                changes.append(f'Exceed margin: {old_margin}% → {record.new_exceed_margin_percentage}%')
-            
-            record.state = 'approved'
-            record.approved_by = self.env.user
-            record.approval_date = fields.Datetime.now()
-            
-            changes_summary = '\n'.join(changes)
-            record.message_post(
-                body=_('Float customization approved by %s:\n%s') % (self.env.user.name, changes_summary),
-                message_type='notification'
-            )
-            
+                vals['exceed_margin_percentage'] = record.new_exceed_margin_percentage
+                changes.append(f'Exceed margin: {float_record.exceed_margin_percentage}% → {record.new_exceed_margin_percentage}%')
+
+            float_record.write(vals)
+            summaries[record.id] = '\n'.join(changes)
             float_record.message_post(
-                body=_('Float customization approved: %s') % changes_summary,
+                body=_('Float customization approved: %s') % summaries[record.id],
                 message_type='notification'
             )
-            
-            # Complete any pending activities
-            record._complete_approval_activities()
 
+        self._workflow_log(lambda record: _('Float customization approved by %s:\n%s') % (
+            self.env.user.name, summaries[record.id],
+        ))
+
+        # Complete any pending activities
+        self._complete_approval_activities()
 
     def _complete_approval_activities(self):
         """Complete any pending activities after approval"""
-        for record in self:
-            self.ensure_one()
-            activities = self.activity_ids.filtered(lambda a: a.activity_type_id.name == 'Todo')
-            activities.action_done()
-           
+        activities = self.activity_ids.filtered(lambda a: a.activity_type_id.name == 'Todo')
+        activities.action_done()
+
 
     def action_reject(self):
         """Reject the customization request"""
@@ -477,43 +562,15 @@ class FloatCustomization(models.Model):
         
     def _do_reject(self, reason=''):
         """Internal method to perform rejection"""
-        for record in self:
-            if record.state != 'requested':
-                raise UserError(_('Only requested customizations can be rejected.'))
-            
-            record.state = 'rejected'
-            record.rejected_by = self.env.user
-            record.rejection_date = fields.Datetime.now()
-            record.rejection_reason = reason
-            
-            record.message_post(
-                body=_('Float customization request rejected by %s\nReason: %s') % (self.env.user.name, reason),
-                message_type='notification'
-            )
-            
-            # Complete any pending activities
-            record._complete_approval_activities()
-            
+        self._workflow_transition('reject', {'rejection_reason': reason})
+
     def action_reset_to_draft(self):
         """Reset to draft state"""
-        for record in self:
-            if record.state != 'rejected':
-                raise UserError(_('Only rejected requests can be reset to draft.'))
-            record.state = 'draft'
-            record.rejected_by = False
-            record.rejection_date = False
-            record.rejection_reason = False
-            
+        self._workflow_transition('reset_to_draft')
+
     def action_cancel(self):
         """Cancel the customization request"""
-        for record in self:
-            if record.state not in ['draft', 'requested']:
-                raise UserError(_('Only draft or requested customizations can be cancelled.'))
-            record.state = 'cancelled'
-            record.message_post(
-                body=_('Float customization request cancelled by %s') % self.env.user.name,
-                message_type='notification'
-            )
+        self._workflow_transition('cancel')
             
     def action_duplicate(self):
         """Create a duplicate customization request"""
@@ -549,7 +606,12 @@ class FloatCustomization(models.Model):
     @api.model
     def create(self, vals):
         """Override create to add sequence or auto-naming"""
-        res = super().create(vals)
+        try:
+            with self.env.cr.savepoint(flush=False):
+                res = super().create(vals)
+        except UniqueViolation as e:
+            self._raise_pending_customization(e, [vals.get('float_request_id')])
+        res._check_pending_customizations()
         res.message_post(
             body=_('Float customization request created for %s') % res.float_request_id.name,
             message_type='notification'
@@ -561,11 +623,19 @@ class FloatCustomization(models.Model):
         old_states = {record.id: record.state for record in self}
         res = super().write(vals)
 
+        if {'float_request_id', 'state'}.intersection(vals):
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.flush_recordset(['float_request_id', 'state'])
+            except UniqueViolation as e:
+                self._raise_pending_customization(e, self.float_request_id.ids)
+            self._check_pending_customizations()
+
         if 'state' in vals:
-            for record in self:
-                old_state = old_states.get(record.id)
-                if old_state != record.state and record.state == 'requested':
-                    record._send_approval_notification()
+            submitted = self.filtered(
+                lambda r: old_states.get(r.id) != r.state and r.state == 'requested'
+            )
+            submitted._send_approval_notification()
 
         return res
     
@@ -0,0 +1,167 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+from .float_request import CLOSED_REQUEST_STATES, OVERDUE_REQUEST_STATES
+
+# Reimbursement states still waiting for cash
+OPEN_REIMBURSEMENT_STATES = ("pending", "approved")
+
+
+class FloatDashboard(models.Model):
+    _name = "float.dashboard"
+    _description = "Float Dashboard"
+    _auto = False
+    _order = "department_id, float_request_id"
+    _rec_name = "float_request_id"
+
+    float_request_id = fields.Many2one("float.request", string="Float", readonly=True)
+    department_id = fields.Many2one("hr.department", string="Department", readonly=True)
+    float_manager_id = fields.Many2one("res.users", string="Float Manager", readonly=True)
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("requested", "Requested"),
+            ("approved", "Approved"),
+            ("rejected", "Rejected"),
+            ("completed", "Completed"),
+            ("cancelled", "Cancelled"),
+        ],
+        string="Status",
+        readonly=True,
+    )
+
+    initial_amount = fields.Float(string="Float Amount", readonly=True)
+    current_amount = fields.Float(string="Current Amount", readonly=True)
+    cash_in_hand = fields.Float(string="Cash in Hand", readonly=True)
+    iou_amount = fields.Float(string="IOU Amount", readonly=True)
+    total_disbursed = fields.Float(string="Total Disbursed", readonly=True)
+    available_for_disbursement = fields.Float(string="Available for Disbursement", readonly=True)
+    drawer_amount = fields.Float(string="Cash in Drawer", readonly=True)
+    drawer_updated = fields.Datetime(string="Drawer Updated", readonly=True)
+
+    open_request_count = fields.Integer(string="Open Requests", readonly=True)
+    pending_bill_count = fields.Integer(string="Pending Bills", readonly=True)
+    pending_bill_amount = fields.Float(string="Pending Bill Amount", readonly=True)
+    overdue_iou_count = fields.Integer(string="Overdue IOUs", readonly=True)
+    overdue_iou_amount = fields.Float(string="Overdue IOU Amount", readonly=True)
+    pending_reimbursement_count = fields.Integer(string="Pending Reimbursements", readonly=True)
+    pending_reimbursement_amount = fields.Float(string="Pending Reimbursement Amount", readonly=True)
+
+    refresh_date = fields.Datetime(string="Refreshed On", readonly=True)
+
+    def init(self):
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL(
+            "CREATE MATERIALIZED VIEW %s AS (%s)",
+            SQL.identifier(self._table),
+            self._query(),
+        ))
+        # Required by REFRESH ... CONCURRENTLY, and the dashboard's lookup key
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)",
+            SQL.identifier(f"{self._table}_id_uniq"),
+            SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX %s ON %s (float_manager_id)",
+            SQL.identifier(f"{self._table}_float_manager_idx"),
+            SQL.identifier(self._table),
+        ))
+
+    def _query(self):
+        return SQL(
+            """
+            SELECT f.id AS id,
+                   f.id AS float_request_id,
+                   f.department_id,
+                   f.float_manager_id,
+                   f.state,
+                   f.initial_amount,
+                   f.current_amount,
+                   f.cash_in_hand,
+                   f.iou_amount,
+                   f.total_disbursed,
+                   f.available_for_disbursement,
+                   COALESCE(d.total_amount, 0) AS drawer_amount,
+                   d.last_updated AS drawer_updated,
+                   COALESCE(pc.open_count, 0) + COALESCE(iou.open_count, 0) AS open_request_count,
+                   COALESCE(pc.pending_bill_count, 0) + COALESCE(iou.pending_bill_count, 0) AS pending_bill_count,
+                   COALESCE(pc.pending_bill_amount, 0) + COALESCE(iou.pending_bill_amount, 0) AS pending_bill_amount,
+                   COALESCE(iou.overdue_count, 0) AS overdue_iou_count,
+                   COALESCE(iou.overdue_amount, 0) AS overdue_iou_amount,
+                   COALESCE(rb.pending_count, 0) AS pending_reimbursement_count,
+                   COALESCE(rb.pending_amount, 0) AS pending_reimbursement_amount,
+                   now() AT TIME ZONE 'UTC' AS refresh_date
+              FROM float_request f
+         LEFT JOIN (
+                   SELECT float_request_id,
+                          COUNT(*) FILTER (WHERE state NOT IN %(closed)s) AS open_count,
+                          SUM(pending_bill_count) AS pending_bill_count,
+                          SUM(pending_bill_amount) AS pending_bill_amount
+                     FROM petty_cash_request
+                    WHERE active
+                 GROUP BY float_request_id
+                   ) pc ON pc.float_request_id = f.id
+         LEFT JOIN (
+                   SELECT float_request_id,
+                          COUNT(*) FILTER (WHERE state NOT IN %(closed)s) AS open_count,
+                          SUM(pending_bill_count) AS pending_bill_count,
+                          SUM(pending_bill_amount) AS pending_bill_amount,
+                          COUNT(*) FILTER (WHERE %(overdue)s) AS overdue_count,
+                          SUM(request_amount) FILTER (WHERE %(overdue)s) AS overdue_amount
+                     FROM petty_cash_iou_request
+                    WHERE active
+                 GROUP BY float_request_id
+                   ) iou ON iou.float_request_id = f.id
+         LEFT JOIN (
+                   SELECT float_request_id,
+                          COUNT(*) AS pending_count,
+                          SUM(required_amount) AS pending_amount
+                     FROM cash_reimbursement
+                    WHERE state IN %(open_reimbursement)s
+                 GROUP BY float_request_id
+                   ) rb ON rb.float_request_id = f.id
+         LEFT JOIN LATERAL (
+                   SELECT total_amount, last_updated
+                     FROM float_denomination
+                    WHERE float_request_id = f.id
+                 ORDER BY last_updated DESC NULLS LAST, id DESC
+                    LIMIT 1
+                   ) d ON TRUE
+            """,
+            closed=CLOSED_REQUEST_STATES,
+            overdue=SQL(
+                "state IN %s AND due_date < now() AT TIME ZONE 'UTC'",
+                OVERDUE_REQUEST_STATES,
+            ),
+            open_reimbursement=OPEN_REIMBURSEMENT_STATES,
+        )
+
+    @api.model
+    def _cron_refresh(self):
+        """Refresh the dashboard without blocking readers"""
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY %s", SQL.identifier(self._table)
+        ))
+        self.env.invalidate_all()
+
+    @api.model
+    def _trigger_refresh(self):
+        """Have the refresh cron run once this transaction commits
+
+        Key transitions may happen many times in one transaction; the cron
+        is only triggered once, at commit, and its runs never overlap.
+        """
+        precommit = self.env.cr.precommit
+        if precommit.data.get("float_dashboard_refresh"):
+            return
+        precommit.data["float_dashboard_refresh"] = True
+
+        @precommit.add
+        def trigger():
+            cron = self.env.ref(
+                "petty-cash.ir_cron_float_dashboard_refresh", raise_if_not_found=False
+            )
+            if cron:
+                cron.sudo()._trigger()
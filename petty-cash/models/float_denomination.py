@@ -1,5 +1,35 @@
+import logging
+import time
+
+from psycopg2.errors import LockNotAvailable
+
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Note and coin values held in a float's cash drawer
+DENOMINATION_VALUES = (5000, 1000, 500, 100, 50, 20, 10, 5, 2, 1)
+
+# Attempts and base delay (seconds) when the drawer row is locked by another cashier
+DRAWER_LOCK_ATTEMPTS = 5
+DRAWER_LOCK_RETRY_DELAY = 0.05
+
+
+def to_denomination_vector(quantities):
+    """Return the compact ``{'<value>': qty}`` form of ``{value: qty}``
+
+    Only non-zero quantities are kept, so the vector does not depend on the
+    denominations in use and a new one needs no schema change.
+    """
+    return {str(value): qty for value, qty in quantities.items() if qty}
+
+
+def vector_quantity(vector, value):
+    """Return the quantity of denomination ``value`` in ``vector``"""
+    return (vector or {}).get(str(value), 0)
+
 
 class FloatDenomination(models.Model):
     _name = 'float.denomination'
@@ -56,37 +86,146 @@ class FloatDenomination(models.Model):
                 (record.denom_1_qty * 1)
             )
             
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        Move = self.env['float.denomination.move']
+        Move.create([
+            Move._prepare_move_vals(record, {
+                fname: record[fname] for fname in self._get_denomination_fields()
+            }, 'opening')
+            for record in records
+        ])
+        return records
+
+    def write(self, vals):
+        """Journal manual corrections of the drawer as adjustments"""
+        fnames = [fname for fname in self._get_denomination_fields() if fname in vals]
+        if not fnames:
+            return super().write(vals)
+
+        before = {record.id: {fname: record[fname] for fname in fnames} for record in self}
+        res = super().write(vals)
+
+        Move = self.env['float.denomination.move']
+        vals_list = []
+        for record in self:
+            delta = {fname: record[fname] - before[record.id][fname] for fname in fnames}
+            if any(delta.values()):
+                vals_list.append(Move._prepare_move_vals(record, delta, 'adjustment'))
+        Move.create(vals_list)
+        return res
+
+    @api.model
+    def _get_denomination_fields(self):
+        """Return the quantity field names, highest denomination first"""
+        return [f'denom_{value}_qty' for value in DENOMINATION_VALUES]
+
+    @api.model
+    def _get_drawer(self, float_request):
+        """Return the current denomination record of a float"""
+        return self.search(
+            [('float_request_id', '=', float_request.id)],
+            order='last_updated desc nulls last, id desc',
+            limit=1,
+        )
+
+    def _lock_drawer(self):
+        """Lock the drawer row, retrying a bounded number of times.
+
+        ``NOWAIT`` keeps a busy drawer from queueing cashiers behind each other
+        until the transaction times out; the short back-off lets the holder
+        commit before giving up with a user-facing error.
+        """
+        self.ensure_one()
+        for attempt in range(DRAWER_LOCK_ATTEMPTS):
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(SQL(
+                        'SELECT id FROM float_denomination WHERE id = %s FOR UPDATE NOWAIT',
+                        self.id,
+                    ))
+                return
+            except LockNotAvailable:
+                _logger.debug('Cash drawer %s is locked, attempt %s', self.id, attempt + 1)
+                time.sleep(DRAWER_LOCK_RETRY_DELAY * (attempt + 1))
+        raise UserError(_(
+            'The cash drawer of float %s is being updated by another user. Please try again.'
+        ) % self.float_request_id.name)
+
+    def apply_drawer_delta(self, delta, reference=False, move_type=None):
+        """Move cash in or out of the drawer in one locked SQL update.
+
+        :param delta: dict mapping ``denom_<value>_qty`` to a signed quantity,
+                      negative to take notes out of the drawer
+        :param reference: record the movement originates from
+        :param move_type: journal type of the movement, by default an issue
+                          when cash leaves the drawer and a refill otherwise
+        :return: the signed amount moved
+        """
+        self.ensure_one()
+        fnames = self._get_denomination_fields()
+        unknown = set(delta) - set(fnames)
+        if unknown:
+            raise ValidationError(_('Unknown denominations: %s') % ', '.join(sorted(unknown)))
+
+        delta = {fname: int(delta[fname]) for fname in fnames if delta.get(fname)}
+        if not delta:
+            return 0.0
+        amount = sum(
+            value * delta.get(f'denom_{value}_qty', 0) for value in DENOMINATION_VALUES
+        )
+
+        self.flush_recordset()
+        self._lock_drawer()
+
+        assignments = [
+            SQL('%s = %s + %s', SQL.identifier(fname), SQL.identifier(fname), qty)
+            for fname, qty in delta.items()
+        ]
+        # Never let a concurrent issue leave the drawer short of a note
+        checks = [
+            SQL('%s + %s >= 0', SQL.identifier(fname), qty)
+            for fname, qty in delta.items()
+            if qty < 0
+        ]
+        self.env.cr.execute(SQL(
+            """UPDATE float_denomination
+                  SET %s,
+                      total_amount = total_amount + %s,
+                      last_updated = now() AT TIME ZONE 'UTC',
+                      write_uid = %s,
+                      write_date = now() AT TIME ZONE 'UTC'
+                WHERE id = %s AND %s
+            RETURNING id""",
+            SQL(', ').join(assignments),
+            amount,
+            self.env.uid,
+            self.id,
+            SQL(' AND ').join(checks) if checks else SQL('TRUE'),
+        ))
+        if not self.env.cr.rowcount:
+            raise ValidationError(_(
+                'The cash drawer of float %s does not hold enough notes for this transaction.'
+            ) % self.float_request_id.name)
+
+        self.invalidate_recordset(list(delta) + ['total_amount', 'last_updated', 'write_uid', 'write_date'])
+        self.env['float.denomination.move'].create(
+            self.env['float.denomination.move']._prepare_move_vals(
+                self, delta, move_type or ('issue' if amount < 0 else 'refill'), reference,
+            )
+        )
+        return amount
+
     def update_denomination_after_reimbursement(self, denomination_used):
         """Update the float request's current amount after reimbursement."""
         self.ensure_one()
-        
-        self.denom_5000_qty -= denomination_used.get('denom_5000_qty', 0)
-        self.denom_1000_qty -= denomination_used.get('denom_1000_qty', 0)
-        self.denom_500_qty -= denomination_used.get('denom_500_qty', 0)
-        self.denom_100_qty -= denomination_used.get('denom_100_qty', 0)
-        self.denom_50_qty -= denomination_used.get('denom_50_qty', 0)
-        self.denom_20_qty -= denomination_used.get('denom_20_qty', 0)
-        self.denom_10_qty -= denomination_used.get('denom_10_qty', 0)
-        self.denom_5_qty -= denomination_used.get('denom_5_qty', 0)
-        self.denom_2_qty -= denomination_used.get('denom_2_qty', 0)
-        self.denom_1_qty -= denomination_used.get('denom_1_qty', 0)
-        
-        self.last_updated = fields.Datetime.now()
+        self.apply_drawer_delta(
+            {fname: -qty for fname, qty in denomination_used.items()},
+            move_type='issue',
+        )
         
     def add_denomination_from_reimbursement(self, denomination_used):
         """Add denominations back to the float request after reimbursement."""
         self.ensure_one()
-        
-        self.denom_5000_qty += denomination_used.get('denom_5000_qty', 0)
-        self.denom_1000_qty += denomination_used.get('denom_1000_qty', 0)
-        self.denom_500_qty += denomination_used.get('denom_500_qty', 0)
-        self.denom_100_qty += denomination_used.get('denom_100_qty', 0)
-        self.denom_50_qty += denomination_used.get('denom_50_qty', 0)
-        self.denom_20_qty += denomination_used.get('denom_20_qty', 0)
-        self.denom_10_qty += denomination_used.get('denom_10_qty', 0)
-        self.denom_5_qty += denomination_used.get('denom_5_qty', 0)
-        self.denom_2_qty += denomination_used.get('denom_2_qty', 0)
-        self.denom_1_qty += denomination_used.get('denom_1_qty', 0)
-        
-        self.last_updated = fields.Datetime.now()
-            
\ No newline at end of file
+        self.apply_drawer_delta(denomination_used, move_type='refill')
@@ -0,0 +1,242 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+from .float_denomination import DENOMINATION_VALUES
+
+DENOMINATION_FIELDS = [f'denom_{value}_qty' for value in DENOMINATION_VALUES]
+
+# Movements younger than this are left out of a snapshot, so that a
+# transaction still in flight when the cron runs cannot be skipped
+SNAPSHOT_SAFETY_MARGIN = timedelta(minutes=10)
+
+
+class FloatDenominationMove(models.Model):
+    _name = 'float.denomination.move'
+    _description = 'Float Denomination Movement'
+    _order = 'date desc, id desc'
+
+    float_request_id = fields.Many2one(
+        'float.request',
+        string='Float',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+        index=True,
+    )
+
+    denomination_id = fields.Many2one(
+        'float.denomination',
+        string='Drawer',
+        readonly=True,
+        ondelete='set null',
+    )
+
+    date = fields.Datetime(
+        string='Date',
+        required=True,
+        readonly=True,
+        default=fields.Datetime.now,
+    )
+
+    move_type = fields.Selection([
+        ('opening', 'Opening'),
+        ('issue', 'Issue'),
+        ('refill', 'Refill'),
+        ('adjustment', 'Adjustment'),
+        ('transfer', 'Transfer'),
+    ], string='Type', required=True, readonly=True)
+
+    amount = fields.Float(
+        string='Amount',
+        readonly=True,
+        help='Signed amount moved in (positive) or out (negative) of the drawer',
+    )
+
+    res_model = fields.Char(string='Source Model', readonly=True)
+    res_id = fields.Many2oneReference(string='Source ID', model_field='res_model', readonly=True)
+    reference = fields.Char(string='Reference', readonly=True)
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='User',
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+
+    # Denomination deltas
+    denom_5000_qty = fields.Integer(string='Rs. 5,000 Delta', default=0, readonly=True)
+    denom_1000_qty = fields.Integer(string='Rs. 1,000 Delta', default=0, readonly=True)
+    denom_500_qty = fields.Integer(string='Rs. 500 Delta', default=0, readonly=True)
+    denom_100_qty = fields.Integer(string='Rs. 100 Delta', default=0, readonly=True)
+    denom_50_qty = fields.Integer(string='Rs. 50 Delta', default=0, readonly=True)
+    denom_20_qty = fields.Integer(string='Rs. 20 Delta', default=0, readonly=True)
+    denom_10_qty = fields.Integer(string='Rs. 10 Delta', default=0, readonly=True)
+    denom_5_qty = fields.Integer(string='Rs. 5 Delta', default=0, readonly=True)
+    denom_2_qty = fields.Integer(string='Rs. 2 Delta', default=0, readonly=True)
+    denom_1_qty = fields.Integer(string='Rs. 1 Delta', default=0, readonly=True)
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            'float_denomination_move_float_date_idx',
+            self._table,
+            ['float_request_id', 'date'],
+        )
+        tools.create_index(
+            self.env.cr,
+            'float_denomination_move_drawer_date_idx',
+            self._table,
+            ['denomination_id', 'date'],
+        )
+        # Drawers that predate the journal open it with their current content
+        self.env.cr.execute(SQL(
+            """INSERT INTO float_denomination_move
+                   (float_request_id, denomination_id, date, move_type, amount, %s,
+                    create_uid, create_date, write_uid, write_date)
+               SELECT d.float_request_id, d.id, COALESCE(d.last_updated, d.create_date), 'opening',
+                      d.total_amount, %s, d.create_uid, d.create_date, d.write_uid, d.write_date
+                 FROM float_denomination d
+                WHERE NOT EXISTS (
+                      SELECT 1 FROM float_denomination_move m WHERE m.denomination_id = d.id)""",
+            SQL(', ').join(SQL.identifier(fname) for fname in DENOMINATION_FIELDS),
+            SQL(', ').join(SQL.identifier('d', fname) for fname in DENOMINATION_FIELDS),
+        ))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        self.env['float.dashboard']._trigger_refresh()
+        return moves
+
+    def write(self, vals):
+        raise UserError(_('Denomination movements are append-only and cannot be modified.'))
+
+    @api.ondelete(at_uninstall=False)
+    def _unlink_never(self):
+        raise UserError(_('Denomination movements are append-only and cannot be deleted.'))
+
+    @api.model
+    def _prepare_move_vals(self, drawer, delta, move_type, reference=False):
+        """Return the values of a movement of ``delta`` on ``drawer``"""
+        vals = {
+            'float_request_id': drawer.float_request_id.id,
+            'denomination_id': drawer.id,
+            'move_type': move_type,
+            'amount': sum(
+                value * delta.get(fname, 0)
+                for value, fname in zip(DENOMINATION_VALUES, DENOMINATION_FIELDS)
+            ),
+        }
+        vals.update({fname: delta.get(fname, 0) for fname in DENOMINATION_FIELDS})
+        if reference:
+            vals.update({
+                'res_model': reference._name,
+                'res_id': reference.id,
+                'reference': reference.display_name,
+            })
+        return vals
+
+    @api.model
+    def _get_drawer_as_of(self, drawer, date):
+        """Return the content of ``drawer`` at ``date``
+
+        Starts from the latest snapshot of the drawer taken at or before
+        ``date`` and replays only its movements recorded after it.
+
+        :return: dict mapping ``denom_<value>_qty`` to a quantity
+        """
+        snapshot = self.env['float.denomination.snapshot'].search([
+            ('denomination_id', '=', drawer.id),
+            ('date', '<=', date),
+        ], order='date desc', limit=1)
+
+        domain = [('denomination_id', '=', drawer.id), ('date', '<=', date)]
+        if snapshot:
+            domain.append(('date', '>', snapshot.date))
+        [sums] = self._read_group(domain, [], [f'{fname}:sum' for fname in DENOMINATION_FIELDS])
+
+        return {
+            fname: (snapshot[fname] if snapshot else 0) + (qty or 0)
+            for fname, qty in zip(DENOMINATION_FIELDS, sums)
+        }
+
+
+class FloatDenominationSnapshot(models.Model):
+    _name = 'float.denomination.snapshot'
+    _description = 'Float Denomination Snapshot'
+    _order = 'date desc, id desc'
+
+    denomination_id = fields.Many2one(
+        'float.denomination',
+        string='Drawer',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+
+    float_request_id = fields.Many2one(
+        'float.request',
+        string='Float',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+
+    date = fields.Datetime(string='Date', required=True, readonly=True)
+
+    total_amount = fields.Float(string='Total Amount', readonly=True)
+
+    # Denomination quantities
+    denom_5000_qty = fields.Integer(string='Rs. 5,000 Quantity', default=0, readonly=True)
+    denom_1000_qty = fields.Integer(string='Rs. 1,000 Quantity', default=0, readonly=True)
+    denom_500_qty = fields.Integer(string='Rs. 500 Quantity', default=0, readonly=True)
+    denom_100_qty = fields.Integer(string='Rs. 100 Quantity', default=0, readonly=True)
+    denom_50_qty = fields.Integer(string='Rs. 50 Quantity', default=0, readonly=True)
+    denom_20_qty = fields.Integer(string='Rs. 20 Quantity', default=0, readonly=True)
+    denom_10_qty = fields.Integer(string='Rs. 10 Quantity', default=0, readonly=True)
+    denom_5_qty = fields.Integer(string='Rs. 5 Quantity', default=0, readonly=True)
+    denom_2_qty = fields.Integer(string='Rs. 2 Quantity', default=0, readonly=True)
+    denom_1_qty = fields.Integer(string='Rs. 1 Quantity', default=0, readonly=True)
+
+    _sql_constraints = [
+        ('drawer_date_unique', 'unique(denomination_id, date)',
+         'A drawer can only have one snapshot per date.'),
+    ]
+
+    def init(self):
+        # Snapshots used to sum every drawer of a float; the cron takes them again per drawer
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s WHERE denomination_id IS NULL", SQL.identifier(self._table),
+        ))
+
+    @api.model
+    def _cron_create_snapshots(self):
+        """Checkpoint every drawer moved since its last snapshot"""
+        cutoff = fields.Datetime.now() - SNAPSHOT_SAFETY_MARGIN
+        Move = self.env['float.denomination.move']
+
+        last_snapshot = dict(self._read_group([], ['denomination_id'], ['date:max']))
+        moved_drawers = Move._read_group(
+            [('denomination_id', '!=', False), ('date', '<=', cutoff)],
+            ['denomination_id'], ['date:max'],
+        )
+
+        vals_list = []
+        for drawer, last_move_date in moved_drawers:
+            if drawer in last_snapshot and last_snapshot[drawer] >= last_move_date:
+                continue
+            quantities = Move._get_drawer_as_of(drawer, cutoff)
+            vals_list.append({
+                'denomination_id': drawer.id,
+                'float_request_id': drawer.float_request_id.id,
+                'date': cutoff,
+                'total_amount': sum(
+                    value * quantities[fname]
+                    for value, fname in zip(DENOMINATION_VALUES, DENOMINATION_FIELDS)
+                ),
+                **quantities,
+            })
+        self.create(vals_list)
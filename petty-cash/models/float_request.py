@@ -1,12 +1,27 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
+from collections import defaultdict
 from datetime import date
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+from psycopg2.errors import UniqueViolation
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Request states that no longer count as open
+CLOSED_REQUEST_STATES = ("completed", "cancelled", "hod_rejected", "float_manager_rejected")
+
+# Request states in which the cash is out and a due date can be missed
+OVERDUE_REQUEST_STATES = ("cash_issued", "pending_bill_submission")
+
+# Partial unique index keeping float names unique per department
+NAME_DEPARTMENT_INDEX = "float_request_name_department_uniq"
 
 
 class FloatRequest(models.Model):
     _name = "float.request"
     _description = "Float Request"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["petty.cash.bulk.mixin", "petty.cash.workflow.mixin", "mail.thread", "mail.activity.mixin"]
     _rec_name = "name"
 
     name = fields.Char(
@@ -106,6 +121,15 @@ class FloatRequest(models.Model):
         help="Percentage margin allowed over the initial amount"
     )
 
+    journal_id = fields.Many2one(
+        "account.journal",
+        string="Cash Journal",
+        domain=[("type", "in", ("cash", "bank"))],
+        tracking=True,
+        help="Journal the float's expenses and reimbursements are posted in. "
+        "Floats without a journal are not posted to accounting.",
+    )
+
     max_single_disbursement = fields.Float(
         string="Maximum Single Disbursement",
         default=5000.0,
@@ -121,16 +145,19 @@ class FloatRequest(models.Model):
     )
 
 
+    # Archived history still counts in the balances computed from these
     petty_cash_request_id = fields.One2many(
         "petty.cash.request",
         "float_request_id",
         string="Petty Cash Requests",
+        context={"active_test": False},
     )
 
     iou_request_id = fields.One2many(
         "petty.cash.iou.request",
         "float_request_id",
         string="IOU Requests",
+        context={"active_test": False},
     )
 
     total_iou_requests = fields.Integer(
@@ -151,6 +178,32 @@ class FloatRequest(models.Model):
         store=True,
     )
 
+    open_request_count = fields.Integer(
+        string="Open Requests",
+        compute="_compute_request_totals",
+        store=True,
+    )
+
+    completed_request_count = fields.Integer(
+        string="Completed Requests",
+        compute="_compute_request_totals",
+        store=True,
+    )
+
+    overdue_request_count = fields.Integer(
+        string="Overdue Requests",
+        compute="_compute_overdue_request_count",
+        help="Requests with cash issued that are past their due date",
+    )
+
+    transfer_amount = fields.Float(
+        string="Net Transfers",
+        default=0.0,
+        readonly=True,
+        copy=False,
+        help="Cash received from other floats minus cash transferred to them",
+    )
+
     cash_in_hand = fields.Float(
         string="Cash in Hand",
         compute="_compute_cash_in_hand",
@@ -213,7 +266,127 @@ class FloatRequest(models.Model):
         help="Amount available for new disbursements (considering exceed limits)"
     )
 
-    
+
+    def init(self):
+        if not tools.index_exists(self.env.cr, NAME_DEPARTMENT_INDEX):
+            duplicates = self._get_duplicate_names()
+            if duplicates:
+                _logger.warning(
+                    "Unique index %s not created, rename these duplicate floats and "
+                    "update the module: %s",
+                    NAME_DEPARTMENT_INDEX,
+                    "; ".join(
+                        f"{name!r} in department {department_id} (ids {ids})"
+                        for name, department_id, ids in duplicates
+                    ),
+                )
+                return
+            self.env.cr.execute(SQL(
+                "CREATE UNIQUE INDEX %s ON %s (name, department_id) WHERE state != 'cancelled'",
+                SQL.identifier(NAME_DEPARTMENT_INDEX),
+                SQL.identifier(self._table),
+            ))
+            self.env.registry.clear_cache()
+
+    @api.model
+    @tools.ormcache()
+    def _has_name_index(self):
+        """Whether NAME_DEPARTMENT_INDEX exists, see ``init``"""
+        return tools.index_exists(self.env.cr, NAME_DEPARTMENT_INDEX)
+
+    def _get_duplicate_names(self, ids=None):
+        """Return ``(name, department_id, ids)`` of the floats that would
+        violate NAME_DEPARTMENT_INDEX, only those sharing the name and
+        department of ``ids`` if given"""
+        self.env.cr.execute(SQL(
+            """SELECT name, department_id, array_agg(id ORDER BY id)
+                 FROM %(table)s
+                WHERE state != 'cancelled' AND department_id IS NOT NULL %(restrict)s
+             GROUP BY name, department_id
+               HAVING COUNT(*) > 1""",
+            table=SQL.identifier(self._table),
+            restrict=SQL(
+                "AND (name, department_id) IN (SELECT name, department_id FROM %s WHERE id IN %s)",
+                SQL.identifier(self._table), tuple(ids),
+            ) if ids else SQL(),
+        ))
+        return self.env.cr.fetchall()
+
+    def _check_duplicate_names(self):
+        """Enforce unique names per department while the index is missing"""
+        if not self or self._has_name_index():
+            return
+        self.flush_recordset(["name", "department_id", "state"])
+        duplicates = self._get_duplicate_names(self.ids)
+        if duplicates:
+            name, department_id, __ = duplicates[0]
+            raise self._duplicate_name_error(name, department_id)
+
+    def _duplicate_name_error(self, name, department_id):
+        return ValidationError(
+            _(
+                'A float with the name "%s" already exists for the %s department.'
+            )
+            % (name, self.env["hr.department"].browse(department_id).name)
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        try:
+            with self.env.cr.savepoint(flush=False):
+                records = super().create(vals_list)
+        except UniqueViolation as e:
+            self._raise_duplicate_name(e, [
+                (vals.get("name"), vals.get("department_id"))
+                for vals in vals_list
+                if vals.get("state") != "cancelled"
+            ])
+        records._check_duplicate_names()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"name", "department_id", "state"}.intersection(vals):
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.flush_recordset(["name", "department_id", "state"])
+            except UniqueViolation as e:
+                self._raise_duplicate_name(e, [
+                    (record.name, record.department_id.id)
+                    for record in self
+                    if record.state != "cancelled"
+                ], exclude_ids=self.ids)
+            self._check_duplicate_names()
+        if "state" in vals:
+            self.env["float.dashboard"]._trigger_refresh()
+        return res
+
+    @api.model
+    def _raise_duplicate_name(self, error, candidates, exclude_ids=()):
+        """Turn a violation of NAME_DEPARTMENT_INDEX into the user error
+
+        Uniqueness is enforced by the partial unique index, so saving many
+        floats costs no lookup per record; duplicates are only searched to
+        build the message once the index has rejected the batch.
+
+        :param candidates: ``(name, department id)`` pairs being saved
+        """
+        if error.diag.constraint_name != NAME_DEPARTMENT_INDEX:
+            raise error
+        seen = set()
+        for name, department_id in candidates:
+            if not department_id:
+                continue
+            if (name, department_id) in seen or self.search_count([
+                ("name", "=", name),
+                ("department_id", "=", department_id),
+                ("state", "!=", "cancelled"),
+                ("id", "not in", list(exclude_ids)),
+            ], limit=1):
+                raise self._duplicate_name_error(name, department_id) from error
+            seen.add((name, department_id))
+        raise error
+
     @api.depends('state')
     def _compute_state_display(self):
         """Compute human-readable state display"""
@@ -305,71 +478,78 @@ class FloatRequest(models.Model):
     #         "denom_1_qty": denom_1,
     #     }
 
-    @api.depends("iou_request_id", "petty_cash_request_id")
-    def _compute_request_totals(self):
-        for record in self:
-            record.total_iou_requests = len(record.iou_request_id)
-            record.total_petty_cash_requests = len(record.petty_cash_request_id)
-            record.total_requests = (
-                record.total_iou_requests + record.total_petty_cash_requests
-            )
-
-    @api.depends(
-        "initial_amount",
-        "petty_cash_request_id.request_amount",
-        "petty_cash_request_id.state",
-    )
-    def _compute_current_amount(self):
-        for record in self:
-            completed_requests = record.petty_cash_request_id.filtered(
-                lambda r: r.state in ["approved", "completed", "cash_issued"]
-            )
-            disbursed_amount = sum(completed_requests.mapped("request_amount"))
-            record.current_amount = record.initial_amount - disbursed_amount
+    def _get_workflow_transitions(self):
+        return {
+            "submit": {
+                "from": ("draft",),
+                "to": "requested",
+                "error": _("Only draft requests can be submitted."),
+                "message": _("Float request submitted for approval."),
+            },
+            "approve": {
+                "from": ("requested",),
+                "to": "approved",
+                "error": _('Only requests in "Requested" state can be approved.'),
+                "message": _("Float request approved by %s") % self.env.user.name,
+            },
+            "reject": {
+                "from": ("requested",),
+                "to": "rejected",
+                "error": _('Only requests in "Requested" state can be rejected.'),
+                "message": _("Float request rejected by %s") % self.env.user.name,
+            },
+            "reset_to_draft": {
+                "from": ("rejected", "cancelled"),
+                "to": "draft",
+                "error": _("Only rejected or cancelled requests can be reset to draft."),
+            },
+        }
 
     def action_approve(self):
-        """Approve the float request."""
-        for record in self:
-            if record.state != "requested":
-                raise UserError(
-                    _('Only requests in "Requested" state can be approved.')
-                )
-            record.state = "approved"
-            record.message_post(
-                body=_("Float request approved by %s") % self.env.user.name,
-                message_type="notification",
-            )
-
-            existing_denomination = self.env["float.denomination"].search(
-                [("float_request_id", "=", record.id)]
-            )
+        """Approve the float requests.
+
+        Floats without a drawer yet open the initial denomination wizard.
+        When several of them are approved together, the wizard opens for the
+        first one and all of them are listed, and flagged in their chatter,
+        as still needing their initial denominations.
+        """
+        floats = self._workflow_transition("approve")
+        drawers = self.env["float.denomination"].search([("float_request_id", "in", floats.ids)])
+        without_drawer = floats - drawers.float_request_id
+        (floats - without_drawer)._compute_current_denomination()
+
+        if not without_drawer:
+            return
+        wizard_action = {
+            "type": "ir.actions.act_window",
+            "name": "Setup Initial Denominations",
+            "res_model": "initial.denomination.wizard",
+            "view_mode": "form",
+            "target": "new",
+            "context": {
+                "default_float_request_id": without_drawer[0].id,
+            },
+        }
+        if len(without_drawer) == 1:
+            return wizard_action
 
-            if not existing_denomination:
-                return {
-                    "type": "ir.actions.act_window",
-                    "name": "Setup Initial Denominations",
-                    "res_model": "initial.denomination.wizard",
-                    "view_mode": "form",
-                    "target": "new",
-                    "context": {
-                        "default_float_request_id": record.id,
-                    },
-                }
-            else:
-                record._compute_current_denomination()
+        without_drawer._workflow_log(_("Initial denominations still need to be set up."))
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Initial Denominations Required"),
+                "message": _("Set up the initial denominations of these floats: %s")
+                % ", ".join(without_drawer.mapped("name")),
+                "type": "warning",
+                "sticky": True,
+                "next": wizard_action,
+            },
+        }
 
     def action_reject(self):
         """Reject the float request."""
-        for record in self:
-            if record.state != "requested":
-                raise UserError(
-                    _('Only requests in "Requested" state can be rejected.')
-                )
-            record.state = "rejected"
-            record.message_post(
-                body=_("Float request rejected by %s") % self.env.user.name,
-                message_type="notification",
-            )
+        self._workflow_transition("reject")
             
     def action_create_customization(self):
         """Create new request"""
@@ -448,17 +628,84 @@ class FloatRequest(models.Model):
             },
         }
 
-    @api.depends("iou_request_id", "petty_cash_request_id")
+    def action_view_denomination_moves(self):
+        """Open the denomination movement journal of this float"""
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": f"Cash Movements - {self.name}",
+            "res_model": "float.denomination.move",
+            "view_mode": "list,form",
+            "domain": [("float_request_id", "=", self.id)],
+        }
+
+    def action_view_transfers(self):
+        """Open the cash transfers from or to this float"""
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": f"Cash Transfers - {self.name}",
+            "res_model": "float.transfer",
+            "view_mode": "list,form",
+            "domain": ["|", ("source_float_id", "=", self.id), ("dest_float_id", "=", self.id)],
+            "context": {"default_source_float_id": self.id},
+        }
+
+    def get_drawer_as_of(self, date):
+        """Return the denomination quantities held in the drawer at ``date``"""
+        self.ensure_one()
+        drawer = self.env["float.denomination"]._get_drawer(self)
+        return self.env["float.denomination.move"]._get_drawer_as_of(drawer, date)
+
+    @api.depends("iou_request_id.state", "petty_cash_request_id.state")
     def _compute_request_totals(self):
+        """Count requests per model and state with one grouped query per model"""
+        counts = defaultdict(int)
+        for model in ("petty.cash.request", "petty.cash.iou.request"):
+            groups = self.env[model].with_context(active_test=False)._read_group(
+                [("float_request_id", "in", self._origin.ids)],
+                ["float_request_id", "state"],
+                ["__count"],
+            )
+            for float_request, state, count in groups:
+                counts[float_request, model] += count
+                if state == "completed":
+                    counts[float_request, "completed"] += count
+                elif state not in CLOSED_REQUEST_STATES:
+                    counts[float_request, "open"] += count
+
         for record in self:
-            record.total_iou_requests = len(record.iou_request_id)
-            record.total_petty_cash_requests = len(record.petty_cash_request_id)
+            origin = record._origin
+            record.total_petty_cash_requests = counts[origin, "petty.cash.request"]
+            record.total_iou_requests = counts[origin, "petty.cash.iou.request"]
             record.total_requests = (
                 record.total_iou_requests + record.total_petty_cash_requests
             )
+            record.open_request_count = counts[origin, "open"]
+            record.completed_request_count = counts[origin, "completed"]
+
+    def _compute_overdue_request_count(self):
+        """Count requests past their due date, for all floats at once"""
+        counts = defaultdict(int)
+        for model in ("petty.cash.request", "petty.cash.iou.request"):
+            groups = self.env[model]._read_group(
+                [
+                    ("float_request_id", "in", self._origin.ids),
+                    ("state", "in", OVERDUE_REQUEST_STATES),
+                    ("due_date", "<", fields.Datetime.now()),
+                ],
+                ["float_request_id"],
+                ["__count"],
+            )
+            for float_request, count in groups:
+                counts[float_request] += count
+
+        for record in self:
+            record.overdue_request_count = counts[record._origin]
 
     @api.depends(
         "initial_amount",
+        "transfer_amount",
         "petty_cash_request_id.request_amount",
         "petty_cash_request_id.state",
     )
@@ -468,7 +715,9 @@ class FloatRequest(models.Model):
                 lambda r: r.state in ["approved", "completed", "cash_issued"]
             )
             disbursed_amount = sum(completed_requests.mapped("request_amount"))
-            record.current_amount = record.initial_amount - disbursed_amount
+            record.current_amount = (
+                record.initial_amount + record.transfer_amount - disbursed_amount
+            )
 
     @api.depends(
         "current_amount", "iou_request_id.state", "iou_request_id.request_amount"
@@ -495,6 +744,7 @@ class FloatRequest(models.Model):
         "iou_request_id.request_amount",
         "iou_request_id.state",
         "initial_amount",
+        "transfer_amount",
         "can_exceed",
         "exceed_limit"
     )
@@ -521,6 +771,7 @@ class FloatRequest(models.Model):
                 # Cannot exceed: use initial amount only
                 max_available = record.initial_amount
 
+            max_available += record.transfer_amount
             record.available_for_disbursement = max(0, max_available - record.total_disbursed)
 
     @api.onchange('department_id')
@@ -534,7 +785,7 @@ class FloatRequest(models.Model):
             domain = [
                 '|',
                 ('department_ids', 'in', [self.department_id.id]),
-                ('groups_id', 'in', self.env.ref('petty-cash.group_petty_cash_float_manager').ids)
+                ('groups_id', 'in', self.env['petty.cash.permission']._get_group_ids('float_manager'))
             ]
 
             return {
@@ -549,9 +800,15 @@ class FloatRequest(models.Model):
                 }
             }
 
-    def check_disbursement_limit(self, amount):
-        """Check if a disbursement amount is allowed"""
+    def check_disbursement_limit(self, amount, available=None):
+        """Check if a disbursement amount is allowed
+
+        ``available`` overrides the stored available amount, so callers
+        approving several requests can check against a running balance.
+        """
         self.ensure_one()
+        if available is None:
+            available = self.available_for_disbursement
 
         # Check single disbursement limit
         if not self.can_exceed_single_limit and amount > self.max_single_disbursement:
@@ -561,18 +818,18 @@ class FloatRequest(models.Model):
             )
 
         # Check total available amount
-        if amount > self.available_for_disbursement:
+        if amount > available:
             if self.can_exceed:
                 raise UserError(
                     _("Request amount (Rs. %.2f) exceeds available disbursement limit (Rs. %.2f). "
                       "Total limit with exceed permission: Rs. %.2f")
-                    % (amount, self.available_for_disbursement, self.exceed_limit)
+                    % (amount, available, self.exceed_limit)
                 )
             else:
                 raise UserError(
                     _("Request amount (Rs. %.2f) exceeds available balance (Rs. %.2f). "
                       "This float cannot exceed its initial amount.")
-                    % (amount, self.available_for_disbursement)
+                    % (amount, available)
                 )
 
         return True
@@ -594,14 +851,7 @@ class FloatRequest(models.Model):
 
     def action_submit(self):
         """Submit the float request for approval."""
-        for record in self:
-            if record.state != "draft":
-                raise UserError(_("Only draft requests can be submitted."))
-            record.state = "requested"
-            record.message_post(
-                body=_("Float request submitted for approval."),
-                message_type="notification",
-            )
+        self._workflow_transition("submit")
 
     # def action_approve(self):
     #     """Approve the float request."""
@@ -618,25 +868,11 @@ class FloatRequest(models.Model):
 
     def reject(self):
         """Reject the float request."""
-        for record in self:
-            if record.state != "requested":
-                raise UserError(
-                    _('Only requests in "Requested" state can be rejected.')
-                )
-            record.state = "rejected"
-            record.message_post(
-                body=_("Float request rejected by %s") % self.env.user.name,
-                message_type="notification",
-            )
+        self._workflow_transition("reject")
 
     def action_reset_to_draft(self):
         """Reset the float request to draft state."""
-        for record in self:
-            if record.state not in ["rejected", "cancelled"]:
-                raise UserError(
-                    _("Only rejected or cancelled requests can be reset to draft.")
-                )
-            record.state = "draft"
+        self._workflow_transition("reset_to_draft")
 
     def action_view_petty_cash_requests(self):
         """Open the related petty cash requests."""
@@ -650,6 +886,7 @@ class FloatRequest(models.Model):
             "context": {
                 "default_float_request_id": self.id,
                 "default_request_type": "petty_cash",
+                "active_test": False,
             },
         }
 
@@ -664,6 +901,7 @@ class FloatRequest(models.Model):
             "domain": [("float_request_id", "=", self.id)],
             "context": {
                 "default_float_request_id": self.id,
+                "active_test": False,
             },
         }
 
@@ -681,25 +919,7 @@ class FloatRequest(models.Model):
             if len(record.name) > 100:
                 raise ValidationError(_("Float name cannot exceed 100 characters."))
 
-            if record.department_id:
-
-                domain = [
-                    ("name", "=", record.name),
-                    ("department_id", "=", record.department_id.id),
-                    ("state", "!=", "cancelled"),
-                ]
-
-                if hasattr(record, "id") and record.id:
-                    domain.append(("id", "!=", record.id))
-
-                duplicate = self.env["float.request"].search(domain, limit=1)
-                if duplicate:
-                    raise ValidationError(
-                        _(
-                            'A float with the name "%s" already exists for the %s department.'
-                        )
-                        % (record.name, record.department_id.name)
-                    )
+            # Uniqueness per department is enforced by NAME_DEPARTMENT_INDEX
 
     @api.constrains("float_manager_id")
     def _check_float_manager(self):
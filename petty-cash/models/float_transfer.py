@@ -0,0 +1,215 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+from .float_denomination import DENOMINATION_VALUES
+
+DENOMINATION_FIELDS = [f"denom_{value}_qty" for value in DENOMINATION_VALUES]
+
+
+class FloatTransfer(models.Model):
+    _name = "float.transfer"
+    _description = "Float Cash Transfer"
+    _inherit = ["petty.cash.workflow.mixin", "mail.thread"]
+    _order = "date desc, id desc"
+
+    name = fields.Char(
+        string="Reference",
+        required=True,
+        readonly=True,
+        copy=False,
+        default=lambda self: _("New"),
+    )
+
+    source_float_id = fields.Many2one(
+        "float.request",
+        string="From Float",
+        required=True,
+        domain=[("state", "=", "approved")],
+        tracking=True,
+        index=True,
+    )
+
+    dest_float_id = fields.Many2one(
+        "float.request",
+        string="To Float",
+        required=True,
+        domain=[("state", "=", "approved")],
+        tracking=True,
+        index=True,
+    )
+
+    date = fields.Datetime(
+        string="Transfer Date",
+        readonly=True,
+        copy=False,
+    )
+
+    user_id = fields.Many2one(
+        "res.users",
+        string="Requested By",
+        default=lambda self: self.env.user,
+        readonly=True,
+    )
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("done", "Transferred"),
+            ("cancelled", "Cancelled"),
+        ],
+        string="Status",
+        default="draft",
+        required=True,
+        readonly=True,
+        tracking=True,
+        copy=False,
+    )
+
+    note = fields.Text(string="Reason")
+
+    amount = fields.Float(
+        string="Amount",
+        compute="_compute_amount",
+        store=True,
+    )
+
+    # Denominations moved from the source drawer to the destination drawer
+    denom_5000_qty = fields.Integer(string="Rs. 5,000 Quantity", default=0)
+    denom_1000_qty = fields.Integer(string="Rs. 1,000 Quantity", default=0)
+    denom_500_qty = fields.Integer(string="Rs. 500 Quantity", default=0)
+    denom_100_qty = fields.Integer(string="Rs. 100 Quantity", default=0)
+    denom_50_qty = fields.Integer(string="Rs. 50 Quantity", default=0)
+    denom_20_qty = fields.Integer(string="Rs. 20 Quantity", default=0)
+    denom_10_qty = fields.Integer(string="Rs. 10 Quantity", default=0)
+    denom_5_qty = fields.Integer(string="Rs. 5 Quantity", default=0)
+    denom_2_qty = fields.Integer(string="Rs. 2 Quantity", default=0)
+    denom_1_qty = fields.Integer(string="Rs. 1 Quantity", default=0)
+
+    _sql_constraints = [
+        (
+            "different_floats",
+            "CHECK(source_float_id != dest_float_id)",
+            "Cash can only be transferred between two different floats.",
+        ),
+    ]
+
+    @api.depends(*DENOMINATION_FIELDS)
+    def _compute_amount(self):
+        for record in self:
+            record.amount = sum(
+                value * record[fname] for value, fname in zip(DENOMINATION_VALUES, DENOMINATION_FIELDS)
+            )
+
+    @api.constrains(*DENOMINATION_FIELDS)
+    def _check_quantities(self):
+        for record in self:
+            if any(record[fname] < 0 for fname in DENOMINATION_FIELDS):
+                raise ValidationError(_("Transferred quantities cannot be negative."))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get("name", _("New")) == _("New"):
+                vals["name"] = self.env["ir.sequence"].next_by_code("float.transfer") or _("New")
+        return super().create(vals_list)
+
+    def _get_workflow_transitions(self):
+        return {
+            "transfer": {
+                "from": ("draft",),
+                "to": "done",
+                "error": _("Only draft transfers can be processed."),
+                "roles": ("float_manager", "manager"),
+                "denied": _("Only float managers can transfer cash between floats."),
+            },
+            "cancel": {
+                "from": ("draft", "cancelled"),
+                "to": "cancelled",
+                "error": _("A completed transfer cannot be cancelled; transfer the cash back instead."),
+            },
+            "reset_to_draft": {
+                "from": ("cancelled",),
+                "to": "draft",
+                "skip": True,
+            },
+        }
+
+    def action_transfer(self):
+        """Move the denominations between both drawers in this transaction"""
+        self._workflow_validate("transfer")
+
+        Denomination = self.env["float.denomination"]
+        for transfer in self:
+            if transfer.amount <= 0:
+                raise UserError(_("Select the denominations to transfer."))
+            floats = transfer.source_float_id | transfer.dest_float_id
+            if any(float_request.state != "approved" for float_request in floats):
+                raise UserError(_("Cash can only be transferred between approved floats."))
+
+            source_drawer = Denomination._get_drawer(transfer.source_float_id)
+            dest_drawer = Denomination._get_drawer(transfer.dest_float_id)
+            for float_request, drawer in ((transfer.source_float_id, source_drawer),
+                                          (transfer.dest_float_id, dest_drawer)):
+                if not drawer:
+                    raise UserError(_("No denomination record found for float %s.") % float_request.name)
+
+            # Always lock in id order, so that two transfers crossing the same
+            # drawers in opposite directions cannot deadlock
+            for drawer in (source_drawer | dest_drawer).sorted("id"):
+                drawer._lock_drawer()
+
+            if transfer.amount > transfer.source_float_id.cash_in_hand:
+                raise UserError(
+                    _("Float %s only has Rs. %.2f in hand.")
+                    % (transfer.source_float_id.name, transfer.source_float_id.cash_in_hand)
+                )
+
+            delta = {fname: transfer[fname] for fname in DENOMINATION_FIELDS}
+            try:
+                source_drawer.apply_drawer_delta(
+                    {fname: -qty for fname, qty in delta.items()},
+                    reference=transfer,
+                    move_type="transfer",
+                )
+            except ValidationError as e:
+                raise UserError(str(e))
+            dest_drawer.apply_drawer_delta(delta, reference=transfer, move_type="transfer")
+
+            transfer._update_float_balances()
+            message = _("Rs. %.2f transferred from %s to %s (%s).") % (
+                transfer.amount, transfer.source_float_id.name, transfer.dest_float_id.name, transfer.name,
+            )
+            for float_request in floats:
+                float_request.message_post(body=message)
+
+        self._workflow_transition("transfer", {"date": fields.Datetime.now()})
+        return True
+
+    def _update_float_balances(self):
+        """Shift the transferred amount between both floats' net transfers
+
+        The increment is done in SQL on the locked rows rather than with a
+        read-modify-write, so concurrent transfers on a float add up.
+        """
+        self.ensure_one()
+        self.env.cr.execute(SQL(
+            """UPDATE float_request
+                  SET transfer_amount = COALESCE(transfer_amount, 0)
+                      + CASE WHEN id = %(dest)s THEN %(amount)s ELSE -%(amount)s END
+                WHERE id IN %(ids)s""",
+            dest=self.dest_float_id.id,
+            amount=self.amount,
+            ids=(self.source_float_id.id, self.dest_float_id.id),
+        ))
+        floats = self.source_float_id | self.dest_float_id
+        floats.invalidate_recordset(["transfer_amount"])
+        floats.modified(["transfer_amount"])
+
+    def action_cancel(self):
+        self._workflow_transition("cancel")
+        return True
+
+    def action_reset_to_draft(self):
+        self._workflow_transition("reset_to_draft")
+        return True
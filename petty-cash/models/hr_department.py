@@ -10,22 +10,25 @@ class HrDepartment(models.Model):
         'user_id',
         string="Float Managers",
         help='Users who can manage floats for this department',
-        domain=[('groups_id', 'in', lambda self: [self.env.ref('petty-cash.group_petty_cash_float_manager').id])]
+        domain=lambda self: [('groups_id', 'in', self.env['petty.cash.permission']._get_group_ids('float_manager'))]
     )
 
     active_float_count = fields.Integer(
         string='Active Floats',
-        compute='_compute_active_float_count'
+        compute='_compute_active_float_count',
+        store=True,
     )
 
     @api.depends('float_request_ids.state')
     def _compute_active_float_count(self):
-        """Compute number of active floats for this department"""
+        """Compute number of active floats for all departments in one query"""
+        counts = dict(self.env['float.request']._read_group(
+            [('department_id', 'in', self._origin.ids), ('state', '=', 'approved')],
+            ['department_id'],
+            ['__count'],
+        ))
         for department in self:
-            department.active_float_count = self.env['float.request'].search_count([
-                ('department_id', '=', department.id),
-                ('state', '=', 'approved')
-            ])
+            department.active_float_count = counts.get(department._origin, 0)
 
     # Reverse relation to float requests
     float_request_ids = fields.One2many(
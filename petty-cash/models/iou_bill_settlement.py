@@ -1,11 +1,12 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from datetime import datetime
 
 
 class IouBillSettlement(models.Model):
     _name = 'iou.bill.settlement'
     _description = 'IOU Bill Settlement'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['petty.cash.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
+    _bulk_parent_field = 'iou_request_id'
     #_rec_name = 'name'  # Use 'name' as the display name in views
     _order = 'date desc'
     
@@ -64,6 +65,15 @@ class IouBillSettlement(models.Model):
         ('reject', 'Reject'),
     ], string='Action')
     
+    def init(self):
+        # Bill totals and postings group the bills of IOUs by status
+        tools.create_index(
+            self.env.cr,
+            'iou_bill_settlement_request_status_idx',
+            self._table,
+            ['iou_request_id', 'status'],
+        )
+
     @api.onchange('action')
     def onchange_action(self):
         """Update status based on action selected"""
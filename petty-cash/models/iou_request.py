@@ -1,12 +1,16 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from datetime import datetime, timedelta
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+from .petty_cash_metric import instrumented
 
 
 class IouRequest(models.Model):
     _name = "petty.cash.iou.request"
     _description = "IOU Request"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["petty.cash.bulk.mixin", "petty.cash.workflow.mixin", "mail.thread", "mail.activity.mixin"]
+    _bulk_parent_field = "float_request_id"
     _rec_name = "name"  # Use 'name' as the display name in views
 
     name = fields.Char(
@@ -143,13 +147,59 @@ class IouRequest(models.Model):
 
     settlement_amount = fields.Float(
         string="Settlement Amount",
-        compute="_compute_settlement_amount",
+        compute="_compute_bill_totals",
         store=True,
     )
 
     settlement_date = fields.Datetime(
         string="Settlement Date",
-        compute="_compute_settlement_date",
+        compute="_compute_bill_totals",
+        store=True,
+    )
+
+    has_pending_bills = fields.Boolean(
+        string="Has Pending Bills",
+        compute="_compute_bill_totals",
+        store=True,
+        index=True,
+        help="True if there are bills pending approval",
+    )
+
+    pending_bill_count = fields.Integer(
+        string="Pending Bills",
+        compute="_compute_bill_totals",
+        store=True,
+        index=True,
+        help="Number of bills awaiting review",
+    )
+
+    pending_bill_amount = fields.Float(
+        string="Pending Bills Amount",
+        compute="_compute_bill_totals",
+        store=True,
+    )
+
+    approved_bill_count = fields.Integer(
+        string="Approved Bills",
+        compute="_compute_bill_totals",
+        store=True,
+    )
+
+    approved_bill_amount = fields.Float(
+        string="Approved Bills Amount",
+        compute="_compute_bill_totals",
+        store=True,
+    )
+
+    rejected_bill_count = fields.Integer(
+        string="Rejected Bills",
+        compute="_compute_bill_totals",
+        store=True,
+    )
+
+    rejected_bill_amount = fields.Float(
+        string="Rejected Bills Amount",
+        compute="_compute_bill_totals",
         store=True,
     )
 
@@ -160,6 +210,29 @@ class IouRequest(models.Model):
         help="Select the float which you want to use for this petty cash request",
         tracking=True,
     )
+
+    active = fields.Boolean(
+        string="Active",
+        default=True,
+        help="Closed IOUs older than the archive horizon are archived. "
+        "They are left out of searches unless asked for, but still count in the float totals.",
+    )
+
+    account_move_id = fields.Many2one(
+        "account.move",
+        string="Journal Entry",
+        readonly=True,
+        copy=False,
+        index="btree_not_null",
+        help="Daily journal entry of the float this IOU's bills were posted in",
+    )
+
+    posting_error = fields.Char(
+        string="Posting Error",
+        readonly=True,
+        copy=False,
+        help="Why the IOU could not be posted to accounting; it is left out of the postings until retried",
+    )
     
     @api.onchange('isHodApproved')
     def _onchange_isHodApproved(self):
@@ -173,42 +246,56 @@ class IouRequest(models.Model):
             
     def _get_hod_users(self):
         """Get HOD users"""
-        try:
-            group = self.env.ref('petty-cash.group_petty_cash_hod', raise_if_not_found=False)
-            return [group.id] if group else []
-        except:
-            # Fallback - search by name
-            group = self.env['res.groups'].search([('name', '=', 'HOD (Head of Department)')], limit=1)
-            return [group.id] if group else []
-        
+        return self.env["petty.cash.permission"]._get_group_ids("hod")
+    
     def _get_float_manager_users(self):
         """Get Float managers"""
-        try:
-            group = self.env.ref('petty-cash.group_petty_cash_float_manager', raise_if_not_found=False)
-            return [group.id] if group else []
-        except:
-            # Fallback - search by name
-            group = self.env['res.groups'].search([('name', '=', 'Float Manager')], limit=1)
-            return [group.id] if group else []
+        return self.env["petty.cash.permission"]._get_group_ids("float_manager")
                 
         
         
-    @api.depends("bill_ids.amount", "bill_ids.status")
-    def _compute_settlement_amount(self):
-        """Compute the total settlement amount from related bills"""
+    @api.depends("bill_ids.amount", "bill_ids.status", "bill_ids.date")
+    def _compute_bill_totals(self):
+        """Compute bill counts, amounts and the settlement totals per status"""
+        totals = self._get_bill_totals()
         for record in self:
-            appproved_bills = record.bill_ids.filtered(lambda b: b.status == "approved")
-            record.settlement_amount = sum(appproved_bills.mapped("amount"))
-
-    @api.depends("bill_ids.date", "bill_ids.status")
-    def _compute_settlement_date(self):
-        """Compute the latest settlement date from approved bills"""
-        for record in self:
-            approved_bills = record.bill_ids.filtered(lambda b: b.status == "approved")
-            if approved_bills:
-                record.settlement_date = max(approved_bills.mapped("date"))
-            else:
-                record.settlement_date = False
+            pending_count, pending_amount, __ = totals.get((record.id, "pending"), (0, 0.0, False))
+            approved_count, approved_amount, approved_date = totals.get((record.id, "approved"), (0, 0.0, False))
+            rejected_count, rejected_amount, __ = totals.get((record.id, "rejected"), (0, 0.0, False))
+            record.has_pending_bills = bool(pending_count)
+            record.pending_bill_count = pending_count
+            record.pending_bill_amount = pending_amount
+            record.approved_bill_count = approved_count
+            record.approved_bill_amount = approved_amount
+            record.rejected_bill_count = rejected_count
+            record.rejected_bill_amount = rejected_amount
+            record.settlement_amount = approved_amount
+            record.settlement_date = approved_date
+
+    def _get_bill_totals(self):
+        """Return {(request id, status): (count, amount, latest date)} for the bills
+
+        Saved requests are aggregated with a single grouped query over the
+        bill table; requests that only exist in a form (onchange) fall back
+        to their cached lines.
+        """
+        saved = self.filtered(lambda r: isinstance(r.id, int))
+        totals = {}
+        if saved:
+            groups = self.env["iou.bill.settlement"]._read_group(
+                [("iou_request_id", "in", saved.ids)],
+                ["iou_request_id", "status"],
+                ["__count", "amount:sum", "date:max"],
+            )
+            for request, status, count, amount, latest_date in groups:
+                totals[request.id, status] = (count, amount, latest_date)
+        for record in self - saved:
+            for bill in record.bill_ids:
+                count, amount, latest_date = totals.get((record.id, bill.status), (0, 0.0, False))
+                if bill.date and (not latest_date or bill.date > latest_date):
+                    latest_date = bill.date
+                totals[record.id, bill.status] = (count + 1, amount + bill.amount, latest_date)
+        return totals
 
     def action_approve_selected(self):
         """Action to approve selected IOU requests"""
@@ -247,20 +334,60 @@ class IouRequest(models.Model):
 
         return True
 
+    def action_retry_posting(self):
+        """Queue the IOUs for the next accounting posting again"""
+        self.write({"posting_error": False})
+        return True
+
     def action_complete_iou(self):
         """Action to complete the IOU request"""
-        self.ensure_one()
-        if abs(self.settlement_amount - self.request_amount) > 0.01:
-            raise UserError(
-                _(
-                    "Settlement amount (%.2f) must equal request amount (%.2f) to complete IOU."
+        self._workflow_transition("complete")
+        return True
+
+    def _check_approvals(self):
+        """Both the HOD and the float manager must approve before the cash is issued"""
+        for record in self:
+            if not record.isHodApproved:
+                raise UserError(_("%s is not approved by the HOD yet.") % record.name)
+            if not record.isFloatManagerApproved:
+                raise UserError(_("%s is not approved by the float manager yet.") % record.name)
+
+    def _check_can_complete(self):
+        for record in self:
+            if abs(record.settlement_amount - record.request_amount) > 0.01:
+                raise UserError(
+                    _(
+                        "Settlement amount (%.2f) must equal request amount (%.2f) to complete IOU."
+                    )
+                    % (record.settlement_amount, record.request_amount)
                 )
-                % (self.settlement_amount, self.request_amount)
-            )
 
-        self.state = "completed"
-        self.message_post(body=_("IOU request completed successfully."))
-        return True
+    def init(self):
+        # Archived requests are all closed, so the scans of open requests
+        # (due date alerts, overdue counts, dashboard) only index active rows
+        self.env.cr.execute(SQL("DROP INDEX IF EXISTS petty_cash_iou_request_state_due_date_idx"))
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_iou_request_active_state_due_date_idx",
+            self._table,
+            ["state", "due_date"],
+            where="active",
+        )
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_iou_request_active_float_state_idx",
+            self._table,
+            ["float_request_id", "state"],
+            where="active",
+        )
+        # Period expenses, reports and the float totals filter on the float and
+        # the state, then on the request date range
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_iou_request_float_state_date_idx",
+            self._table,
+            ["float_request_id", "state", "request_date"],
+        )
 
     @api.depends("request_date")
     def _compute_due_date(self):
@@ -284,66 +411,78 @@ class IouRequest(models.Model):
         """Method to get IOU due days"""
         return int(self.env["ir.config_parameter"].sudo().get_param("iou.due.days", 10))
 
+    def _get_workflow_transitions(self):
+        return {
+            "submit": {
+                "from": ("draft",),
+                "to": "requested",
+                "skip": True,
+                "message": _("IOU request submitted successfully."),
+            },
+            "cancel": {
+                "from": ("draft", "requested"),
+                "to": "cancelled",
+                "error": _("You can only cancel a request in draft or requested state."),
+                "message": _("IOU request cancelled."),
+            },
+            "issue_cash": {
+                "from": ("requested",),
+                "to": "pending_bill_submission",
+                "error": _("You can only issue cash for requests in the requested state."),
+                "check": "_check_approvals",
+                "values": {"cashReceivedByEmployee": True},
+            },
+            "complete": {
+                "from": ("pending_bill_submission",),
+                "to": "completed",
+                "error": _(
+                    "You can only complete requests that are in pending bill submission state."
+                ),
+                "check": "_check_can_complete",
+                "message": _("IOU request completed successfully."),
+            },
+        }
+
     def action_submit(self):
         """Action to submit the IOU request"""
-        self.ensure_one()
-        if self.state == "draft":
-            self.state = "requested"
-            self.message_post(body=_("IOU request submitted successfully."))
+        self._workflow_transition("submit")
         return True
 
     def action_cancel(self):
         """Action to cancel the IOU request"""
-        self.ensure_one()
-        if self.state in ["draft", "requested"]:
-            self.state = "cancelled"
-            self.message_post(body=_("IOU request cancelled."))
-        else:
-            raise UserError(
-                _("You can only cancel a request in draft or requested state.")
-            )
+        self._workflow_transition("cancel")
         return True
 
+    @instrumented
     def action_cash_issued(self):
-        """Action to mark cash as issued to employee and denomination"""
+        """Action to mark cash as issued to employee and denomination
+
+        The denomination wizard applies the ``issue_cash`` transition once
+        the cash is counted out.
+        """
         self.ensure_one()
-        if self.state == "requested":
-            return {
-                "type": "ir.actions.act_window",
-                "name": "Cash Denomination - IOU",
-                "res_model": "cash.denomination.wizard",
-                "view_mode": "form",
-                #'view_id': self.env.ref('petty_cash_iou_request.cash_denomination_iou_wizard_form'),
-                "target": "new",
-                "context": {
-                    "default_iou_request_id": self.id,
-                    "default_request_amount": self.request_amount,
-                    "default_request_type": "iou",
-                    "float_request_id": (
-                        self.float_request_id.id if self.float_request_id else False
-                    ),
-                },
-            }
-        else:
-            raise UserError(
-                _("You can only issue cash for requests in the requested state.")
-            )
+        self._workflow_validate("issue_cash")
+        return {
+            "type": "ir.actions.act_window",
+            "name": "Cash Denomination - IOU",
+            "res_model": "cash.denomination.wizard",
+            "view_mode": "form",
+            #'view_id': self.env.ref('petty_cash_iou_request.cash_denomination_iou_wizard_form'),
+            "target": "new",
+            "context": {
+                "default_iou_request_id": self.id,
+                "default_request_amount": self.request_amount,
+                "default_request_type": "iou",
+                "float_request_id": (
+                    self.float_request_id.id if self.float_request_id else False
+                ),
+            },
+        }
 
     def action_complete_request(self):
         """Action to mark the IOU request as completed"""
-        self.ensure_one()
-        if self.state in ["hod_approved", "float_manager_approved"]:
-            self.ensure_one()
-            if self.state != "pending_bill_submission":
-                raise UserError(
-                    _(
-                        "You can only complete requests that are in pending bill submission state."
-                    )
-                )
-
-            self.state = "completed"
-            self.message_post(body=_("IOU request completed successfully."))
-            return True
+        self._workflow_transition("complete")
+        return True
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -352,6 +491,12 @@ class IouRequest(models.Model):
                 vals["name"] = self._generate_sequence_number("petty.cash.iou.request")
         return super().create(vals_list)
 
+    def write(self, vals):
+        res = super().write(vals)
+        if "state" in vals:
+            self.env["float.dashboard"]._trigger_refresh()
+        return res
+
     def _generate_sequence_number(self, sequence_code):
         """Generate sequence number with proper error handling"""
         sequence = self.env["ir.sequence"].next_by_code(sequence_code)
@@ -447,12 +592,9 @@ class IouRequest(models.Model):
                         "Due date cannot be earlier than request date. Please select a valid due date."
                     )
                 )
-            if not record.isHodApproved:
-                errors.append(_("HOD Approved must be ticked"))
+            # Both approvals are only required before the cash is issued
             if record.isHodApproved and not record.hodApprovedBy:
                 errors.append(_("Select the approved HOD."))
-            if not record.isFloatManagerApproved:
-                errors.append(_("Float Manager Approved must be ticked"))
             if record.isFloatManagerApproved and not record.floatManagerApprovedBy:
                 errors.append(_("Select the Approved Float Manager."))
             if not record.float_request_id:
@@ -0,0 +1,200 @@
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api, Command, _
+
+_logger = logging.getLogger(__name__)
+
+# Records posted per source and cron call; the cron is re-triggered while some remain
+ENTRY_BATCH_SIZE = 2000
+
+
+class PettyCashAccounting(models.AbstractModel):
+    _name = "petty.cash.accounting"
+    _description = "Petty Cash Accounting Bridge"
+
+    @api.model
+    def _cron_post_journal_entries(self):
+        """Post the completed petty cash, IOUs and reimbursements to accounting
+
+        Expenses are aggregated into one entry per float and day, with a line
+        per expense account and category; each reimbursement gets an entry of
+        its own. All the entries of a run are created and posted in bulk.
+        """
+        config = self.env["petty.cash.config"].get_active_config()
+
+        petty_cash, more_petty_cash = self._get_unposted(
+            "petty.cash.request", "settlement_amount",
+            [("bill_settlement_ids.status", "=", "approved")],
+        )
+        ious, more_ious = self._get_unposted(
+            "petty.cash.iou.request", "settlement_amount",
+            [("bill_ids.status", "=", "approved")],
+        )
+        expenses = self._get_petty_cash_expenses(petty_cash, config)
+        expenses.update(self._get_iou_expenses(ious, config))
+        vals_list, records_list, errors = self._prepare_expense_moves(expenses)
+        for record in [*petty_cash, *ious]:
+            if record not in expenses:
+                errors[record] = _("No approved bills to post")
+        remaining = more_petty_cash or more_ious
+
+        if config.reimbursement_account_id:
+            reimbursements, more_reimbursements = self._get_unposted(
+                "cash.reimbursement", "received_amount"
+            )
+            for reimbursement in reimbursements:
+                vals_list.append(self._prepare_reimbursement_move_vals(reimbursement, config))
+                records_list.append({"cash.reimbursement": [reimbursement.id]})
+            remaining = remaining or more_reimbursements
+
+        self._create_moves(vals_list, records_list)
+        self._mark_posting_errors(errors)
+        done = sum(len(ids) for records in records_list for ids in records.values()) + len(errors)
+        self.env["ir.cron"]._notify_progress(done=done, remaining=1 if remaining and done else 0)
+
+    @api.model
+    def _get_unposted(self, model_name, amount_field, domain=None):
+        """Return a batch of completed records not posted yet, and whether more remain
+
+        Records that cannot be posted are left out here rather than skipped
+        later, so that they never fill the batch ahead of postable ones.
+        """
+        records = self.env[model_name].with_context(active_test=False).search([
+            ("state", "=", "completed"),
+            ("account_move_id", "=", False),
+            ("posting_error", "=", False),
+            ("float_request_id.journal_id.default_account_id", "!=", False),
+            (amount_field, ">", 0),
+            *(domain or []),
+        ], order="id", limit=ENTRY_BATCH_SIZE + 1)
+        return records[:ENTRY_BATCH_SIZE], len(records) > ENTRY_BATCH_SIZE
+
+    @api.model
+    def _get_petty_cash_expenses(self, requests, config):
+        """Return {request: {(account, label): amount}} of the approved bills"""
+        expenses = defaultdict(lambda: defaultdict(float))
+        for request, category, amount in self.env["petty.cash.bill.settlement"]._read_group(
+            [("petty_cash_request_id", "in", requests.ids), ("status", "=", "approved")],
+            ["petty_cash_request_id", "category"],
+            ["amount:sum"],
+        ):
+            account = category.expense_account_id or config.default_expense_account_id
+            expenses[request][account, category.display_name] += amount
+        return expenses
+
+    @api.model
+    def _get_iou_expenses(self, requests, config):
+        """Return {request: {(account, label): amount}} of the approved IOU bills"""
+        expenses = defaultdict(lambda: defaultdict(float))
+        for request, amount in self.env["iou.bill.settlement"]._read_group(
+            [("iou_request_id", "in", requests.ids), ("status", "=", "approved")],
+            ["iou_request_id"],
+            ["amount:sum"],
+        ):
+            expenses[request][config.default_expense_account_id, _("IOU Settlements")] += amount
+        return expenses
+
+    @api.model
+    def _prepare_expense_moves(self, expenses):
+        """Aggregate the expenses per float and day
+
+        :return: the entries' values, for each entry the ``{model: ids}`` of
+                 the records it posts, and ``{record: error}`` of those that
+                 cannot be posted
+        """
+        amounts_by_key = defaultdict(lambda: defaultdict(float))
+        records_by_key = defaultdict(lambda: defaultdict(list))
+        errors = {}
+        for record, amounts in expenses.items():
+            float_request = record.float_request_id
+            if not all(account for account, __ in amounts):
+                errors[record] = _("No expense account for its categories")
+                continue
+            if not float_request.journal_id.default_account_id:
+                errors[record] = _("Journal of float %s has no cash account") % float_request.name
+                continue
+            date = fields.Date.context_today(record, record.settlement_date or record.request_date)
+            key = (float_request, date)
+            for line_key, amount in amounts.items():
+                amounts_by_key[key][line_key] += amount
+            records_by_key[key][record._name].append(record.id)
+
+        vals_list = [
+            self._prepare_expense_move_vals(float_request, date, amounts)
+            for (float_request, date), amounts in amounts_by_key.items()
+        ]
+        return vals_list, list(records_by_key.values()), errors
+
+    @api.model
+    def _mark_posting_errors(self, errors):
+        """Flag the records that cannot be posted, so later runs leave them out"""
+        ids_by_key = defaultdict(list)
+        for record, error in errors.items():
+            _logger.warning("%s not posted: %s", record.name, error)
+            ids_by_key[record._name, error].append(record.id)
+        for (model_name, error), ids in ids_by_key.items():
+            self.env[model_name].browse(ids).write({"posting_error": error})
+
+    @api.model
+    def _prepare_expense_move_vals(self, float_request, date, amounts):
+        """Return the values of the daily expense entry of a float"""
+        journal = float_request.journal_id
+        currency = journal.currency_id or journal.company_id.currency_id
+        ref = _("Petty cash of %(float)s on %(date)s", float=float_request.name, date=date)
+        amounts = {line_key: currency.round(amount) for line_key, amount in amounts.items()}
+        line_ids = [
+            Command.create({"name": label, "account_id": account.id, "debit": amount})
+            for (account, label), amount in amounts.items()
+        ]
+        line_ids.append(Command.create({
+            "name": ref,
+            "account_id": journal.default_account_id.id,
+            "credit": sum(amounts.values()),
+        }))
+        return {
+            "move_type": "entry",
+            "journal_id": journal.id,
+            "date": date,
+            "ref": ref,
+            "line_ids": line_ids,
+        }
+
+    @api.model
+    def _prepare_reimbursement_move_vals(self, reimbursement, config):
+        """Return the values of the entry paying a reimbursement into the float"""
+        journal = reimbursement.float_request_id.journal_id
+        currency = journal.currency_id or journal.company_id.currency_id
+        amount = currency.round(reimbursement.received_amount)
+        return {
+            "move_type": "entry",
+            "journal_id": journal.id,
+            "date": fields.Date.context_today(
+                reimbursement, reimbursement.approval_date or reimbursement.request_date
+            ),
+            "ref": reimbursement.name,
+            "line_ids": [
+                Command.create({
+                    "name": reimbursement.name,
+                    "account_id": journal.default_account_id.id,
+                    "debit": amount,
+                }),
+                Command.create({
+                    "name": reimbursement.name,
+                    "account_id": config.reimbursement_account_id.id,
+                    "credit": amount,
+                }),
+            ],
+        }
+
+    @api.model
+    def _create_moves(self, vals_list, records_list):
+        """Create and post the entries in bulk, then link them to their records"""
+        if not vals_list:
+            return self.env["account.move"]
+        moves = self.env["account.move"].sudo().create(vals_list)
+        moves.action_post()
+        for move, records in zip(moves, records_list):
+            for model_name, ids in records.items():
+                self.env[model_name].browse(ids).write({"account_move_id": move.id})
+        return moves
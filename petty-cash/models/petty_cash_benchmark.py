@@ -0,0 +1,419 @@
+import base64
+import json
+import logging
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+from .float_request import OVERDUE_REQUEST_STATES
+
+_logger = logging.getLogger(__name__)
+
+# Default data volumes seeded before the operations are measured
+BENCHMARK_VOLUMES = {
+    "departments": 5,
+    "floats_per_department": 2,
+    "categories": 20,
+    "requests_per_float": 50,
+    "bills_per_request": 2,
+    "ious_per_float": 20,
+    "reimbursements_per_float": 5,
+    "drawer_moves_per_float": 50,
+}
+
+# ir.config_parameter holding the baseline measurements as JSON
+BASELINE_PARAM = "petty_cash.benchmark_baseline"
+
+# Wall time allowed above the baseline before an operation is a regression
+DEFAULT_TIME_TOLERANCE = 0.25
+
+# Stand-in receipt for seeded bills
+DUMMY_RECEIPT = base64.b64encode(b"%PDF-1.4 benchmark receipt")
+
+
+class _BenchmarkRollback(Exception):
+    """Raised to roll back the benchmark data once measured"""
+
+
+class PettyCashBenchmark(models.AbstractModel):
+    _name = "petty.cash.benchmark"
+    _description = "Petty Cash Benchmark"
+
+    @api.model
+    def run(self, volumes=None, save_baseline=False, tolerance=DEFAULT_TIME_TOLERANCE):
+        """Seed synthetic data, measure key operations and compare with the baseline.
+
+        The plans of the key queries are checked against the seeded data too:
+        each one must be able to use the index tuned for it.
+
+        Meant to be run from ``odoo-bin shell``, e.g.
+        ``env["petty.cash.benchmark"].run({"requests_per_float": 500})``.
+        All seeded data is rolled back; only the baseline, when saved, is kept.
+
+        :param volumes: overrides of ``BENCHMARK_VOLUMES``
+        :param save_baseline: store these measurements as the new baseline
+        :param tolerance: relative wall time increase tolerated over the baseline
+        :return: dict with the ``results`` per operation and the ``regressions``,
+                 including the queries whose plan misses its index
+        """
+        if not self.env.is_superuser() and not self.env.user.has_group("base.group_system"):
+            raise UserError(_("Only administrators can run the petty cash benchmark."))
+
+        volumes = {**BENCHMARK_VOLUMES, **(volumes or {})}
+        results = {}
+        plan_regressions = []
+        try:
+            with self.env.cr.savepoint():
+                data = self._seed(volumes)
+                for name, operation in self._get_operations():
+                    results[name] = self._measure(operation, data)
+                plan_regressions = self._check_query_plans(data)
+                raise _BenchmarkRollback()
+        except _BenchmarkRollback:
+            pass
+        finally:
+            self.env.invalidate_all(flush=False)
+
+        regressions = self._compare_with_baseline(results, tolerance) + plan_regressions
+        self._log_report(volumes, results, regressions)
+        if save_baseline:
+            self.env["ir.config_parameter"].sudo().set_param(
+                BASELINE_PARAM, json.dumps({"volumes": volumes, "results": results})
+            )
+        return {"results": results, "regressions": regressions}
+
+    @api.model
+    def _measure(self, operation, data):
+        """Return the query count, wall time and record count of ``operation``"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        start = time.perf_counter()
+        records = operation(data)
+        self.env.flush_all()
+        return {
+            "queries": cr.sql_log_count - queries_before,
+            "time": round(time.perf_counter() - start, 4),
+            "records": records,
+        }
+
+    @api.model
+    def _get_operations(self):
+        """Return the ``(name, callable)`` operations to measure, in order"""
+        return [
+            ("request_create", self._bench_request_create),
+            ("bill_approval", self._bench_bill_approval),
+            ("cash_issue", self._bench_cash_issue),
+            ("disbursement_totals", self._bench_disbursement_totals),
+            ("reimbursement_report", self._bench_reimbursement_report),
+            ("due_date_scan", self._bench_due_date_scan),
+        ]
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _seed(self, volumes):
+        """Create the synthetic dataset and return the records operations use"""
+        user = self.env.user
+        now = fields.Datetime.now()
+
+        departments = self.env["hr.department"].create([
+            {"name": f"Benchmark Department {i}"} for i in range(volumes["departments"])
+        ])
+        categories = self.env["petty.cash.category"].create([
+            {"name": f"Benchmark Category {i}", "code": f"BENCH{i:05d}"}
+            for i in range(volumes["categories"])
+        ])
+        floats = self.env["float.request"].create([
+            {
+                "name": f"Benchmark Float {department.id}-{i}",
+                "department_id": department.id,
+                "initial_amount": 1_000_000,
+                "float_manager_id": user.id,
+                "state": "approved",
+            }
+            for department in departments
+            for i in range(volumes["floats_per_department"])
+        ])
+        drawers = self.env["float.denomination"].create([
+            {
+                "float_request_id": float_request.id,
+                "denom_1000_qty": 500,
+                "denom_500_qty": 500,
+                "denom_100_qty": 1000,
+                "denom_50_qty": 1000,
+                "denom_10_qty": 1000,
+                "denom_1_qty": 1000,
+            }
+            for float_request in floats
+        ])
+        for drawer in drawers:
+            for i in range(volumes["drawer_moves_per_float"]):
+                sign = -1 if i % 2 else 1
+                drawer.apply_drawer_delta({"denom_100_qty": sign, "denom_10_qty": sign * 5})
+
+        approvals = {
+            "request_by": user.id,
+            "isHodApproved": True,
+            "hodApprovedBy": user.id,
+            "isFloatManagerApproved": True,
+            "floatManagerApprovedBy": user.id,
+        }
+        requests = self.env["petty.cash.request"].create([
+            {
+                **approvals,
+                "float_request_id": float_request.id,
+                "category": categories[i % len(categories)].id,
+                "request_amount": 1000,
+                "request_date": now - timedelta(days=i % 30),
+                "request_voucher_filename": "voucher.pdf",
+                "description": "Benchmark request",
+                "state": "requested",
+            }
+            for float_request in floats
+            for i in range(volumes["requests_per_float"])
+        ])
+        bill_amount = 1000 / max(volumes["bills_per_request"], 1)
+        self.env["petty.cash.bill.settlement"].create([
+            {
+                "petty_cash_request_id": request.id,
+                "category": request.category.id,
+                "amount": bill_amount,
+                "attach_receipt": DUMMY_RECEIPT,
+                "receipt_filename": "receipt.pdf",
+                "status": "submitted",
+            }
+            for request in requests
+            for _i in range(volumes["bills_per_request"])
+        ])
+
+        ious = self.env["petty.cash.iou.request"].create([
+            {
+                **approvals,
+                "float_request_id": float_request.id,
+                "request_amount": 500,
+                "request_date": now - timedelta(days=i % 60),
+                "reason_in_advance": "Benchmark IOU",
+                "state": "pending_bill_submission" if i % 2 else "requested",
+            }
+            for float_request in floats
+            for i in range(volumes["ious_per_float"])
+        ])
+        self.env["iou.bill.settlement"].create([
+            {
+                "iou_request_id": iou.id,
+                "date": iou.request_date,
+                "category": "other",
+                "amount": 250,
+                "status": "pending",
+            }
+            for iou in ious
+        ])
+
+        reimbursements = self.env["cash.reimbursement"].create([
+            {
+                "float_request_id": float_request.id,
+                "request_date": now,
+                "handler_name": user.id,
+                "required_amount": 5000,
+                "justification": "Benchmark reimbursement",
+                "state": "pending",
+                "report_from_date": fields.Date.today() - timedelta(days=90),
+                "report_to_date": fields.Date.today(),
+            }
+            for float_request in floats
+            for _i in range(volumes["reimbursements_per_float"])
+        ])
+
+        return {
+            "floats": floats,
+            "categories": categories,
+            "requests": requests,
+            "ious": ious,
+            "reimbursements": reimbursements,
+        }
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _bench_request_create(self, data):
+        user = self.env.user
+        floats, categories = data["floats"], data["categories"]
+        requests = self.env["petty.cash.request"].create([
+            {
+                "request_by": user.id,
+                "isHodApproved": True,
+                "hodApprovedBy": user.id,
+                "isFloatManagerApproved": True,
+                "floatManagerApprovedBy": user.id,
+                "float_request_id": floats[i % len(floats)].id,
+                "category": categories[i % len(categories)].id,
+                "request_amount": 100,
+                "request_voucher_filename": "voucher.pdf",
+                "description": "Benchmark request",
+            }
+            for i in range(100)
+        ])
+        return len(requests)
+
+    @api.model
+    def _bench_bill_approval(self, data):
+        bills = data["requests"].bill_settlement_ids.filtered(lambda b: b.status == "submitted")
+        bills.action_approve()
+        return len(bills)
+
+    @api.model
+    def _bench_cash_issue(self, data):
+        requests = data["requests"][:20]
+        for request in requests:
+            action = request.action_cash_issued()
+            wizard = self.env["cash.denomination.wizard"].with_context(
+                **action["context"]
+            ).create({})
+            wizard.action_auto_calculate()
+            wizard.action_update_amount()
+        return len(requests)
+
+    @api.model
+    def _bench_disbursement_totals(self, data):
+        floats = data["floats"]
+        floats._compute_disbursement_totals()
+        return len(floats)
+
+    @api.model
+    def _bench_reimbursement_report(self, data):
+        reimbursements = data["reimbursements"][:5]
+        for reimbursement in reimbursements:
+            reimbursement.action_view_reimbursement_report()
+        return len(reimbursements)
+
+    @api.model
+    def _bench_due_date_scan(self, data):
+        Alert = self.env["petty.cash.due.alert"]
+        sent_before = Alert.search_count([])
+        Alert._cron_send_due_date_alerts()
+        return Alert.search_count([]) - sent_before
+
+    # ------------------------------------------------------------------
+    # Query plans
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _get_query_plans(self, data):
+        """Return the ``(name, model, domain, index)`` of the queries to explain"""
+        float_request, floats = data["floats"][:1], data["floats"]
+        now = fields.Datetime.now()
+        period = [
+            ("float_request_id", "=", float_request.id),
+            ("request_date", ">=", now - timedelta(days=30)),
+            ("request_date", "<=", now),
+        ]
+        Request = self.env["petty.cash.request"].with_context(active_test=False)
+        Iou = self.env["petty.cash.iou.request"].with_context(active_test=False)
+        return [
+            ("period_expenses", Request,
+             period + [("state", "in", ["completed", "cash_issued"])],
+             "petty_cash_request_float_state_date_idx"),
+            ("period_ious", Iou,
+             period + [("state", "in", ["completed", "pending_bill_submission"])],
+             "petty_cash_iou_request_float_state_date_idx"),
+            ("float_request_totals", Request,
+             [("float_request_id", "in", floats.ids)],
+             "petty_cash_request_float_state_date_idx"),
+            ("float_iou_totals", Iou,
+             [("float_request_id", "in", floats.ids)],
+             "petty_cash_iou_request_float_state_date_idx"),
+            ("request_bill_totals", self.env["petty.cash.bill.settlement"],
+             [("petty_cash_request_id", "in", data["requests"][:50].ids)],
+             "petty_cash_bill_settlement_request_status_idx"),
+            ("iou_bill_totals", self.env["iou.bill.settlement"],
+             [("iou_request_id", "in", data["ious"][:50].ids)],
+             "iou_bill_settlement_request_status_idx"),
+            ("float_reimbursements", self.env["cash.reimbursement"],
+             [("float_request_id", "=", float_request.id), ("state", "=", "pending")],
+             "cash_reimbursement_float_state_date_idx"),
+            # Default searches only see active requests, as the open request scans
+            ("overdue_requests", self.env["petty.cash.request"],
+             [("state", "in", OVERDUE_REQUEST_STATES), ("due_date", "<", now)],
+             "petty_cash_request_active_state_due_date_idx"),
+            ("overdue_ious", self.env["petty.cash.iou.request"],
+             [("state", "in", OVERDUE_REQUEST_STATES), ("due_date", "<", now)],
+             "petty_cash_iou_request_active_state_due_date_idx"),
+        ]
+
+    @api.model
+    def _check_query_plans(self, data):
+        """Return a message per key query whose plan does not use its index
+
+        Sequential scans are disabled while explaining, so that the plans
+        tell whether the index can serve the query at any data volume. The
+        setting is local to the transaction, which the benchmark and the
+        tests roll back.
+        """
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute(SQL("SET LOCAL enable_seqscan = off"))
+        regressions = []
+        for name, model, domain, index in self._get_query_plans(data):
+            query = model._search(domain)
+            cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+            used = set(self._get_plan_indexes(cr.fetchone()[0][0]["Plan"]))
+            if index not in used:
+                regressions.append(
+                    f"{name}: plan does not use {index} ({', '.join(sorted(used)) or 'no index'})"
+                )
+        return regressions
+
+    @api.model
+    def _get_plan_indexes(self, plan):
+        """Yield the names of the indexes scanned by ``plan`` and its sub-plans"""
+        if "Index Name" in plan:
+            yield plan["Index Name"]
+        for subplan in plan.get("Plans", ()):
+            yield from self._get_plan_indexes(subplan)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _get_baseline(self):
+        baseline = self.env["ir.config_parameter"].sudo().get_param(BASELINE_PARAM)
+        return json.loads(baseline)["results"] if baseline else {}
+
+    @api.model
+    def _compare_with_baseline(self, results, tolerance):
+        """Return a message per operation slower or chattier than the baseline"""
+        regressions = []
+        for name, baseline in self._get_baseline().items():
+            result = results.get(name)
+            if not result:
+                continue
+            if result["queries"] > baseline["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, baseline {baseline['queries']}"
+                )
+            if result["time"] > baseline["time"] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {result['time']:.3f}s, baseline {baseline['time']:.3f}s"
+                )
+        return regressions
+
+    @api.model
+    def _log_report(self, volumes, results, regressions):
+        lines = [f"Petty cash benchmark with {volumes}"]
+        lines.extend(
+            f"  {name:<24} {result['queries']:>7} queries {result['time']:>9.3f}s "
+            f"{result['records']:>7} records"
+            for name, result in results.items()
+        )
+        lines.extend(f"  REGRESSION {regression}" for regression in regressions)
+        _logger.log(logging.WARNING if regressions else logging.INFO, "\n".join(lines))
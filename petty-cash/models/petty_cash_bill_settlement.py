@@ -1,12 +1,15 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from datetime import datetime
 from odoo.exceptions import ValidationError
 
+from .petty_cash_metric import instrumented
+
 
 class PettyCashBillSettlement(models.Model):
     _name = "petty.cash.bill.settlement"
     _description = "Petty Cash Bill Settlement"
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['petty.cash.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
+    _bulk_parent_field = 'petty_cash_request_id'
     _order = "date desc"
 
     petty_cash_request_id = fields.Many2one(
@@ -96,6 +99,15 @@ class PettyCashBillSettlement(models.Model):
         help="Reason for rejection if the settlement is rejected",
     )
     
+    def init(self):
+        # Bill totals and postings group the bills of requests by status
+        tools.create_index(
+            self.env.cr,
+            'petty_cash_bill_settlement_request_status_idx',
+            self._table,
+            ['petty_cash_request_id', 'status'],
+        )
+
     @api.onchange('action')
     def _onchange_action(self):
         """Update the status based on the action taken."""
@@ -107,6 +119,7 @@ class PettyCashBillSettlement(models.Model):
             if record.amount <= 0:
                 raise ValidationError(_("The amount must be positive."))
             
+    @instrumented
     def action_approve(self):
         """Approve bill settlement"""
         for record in self:
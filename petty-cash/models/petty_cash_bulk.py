@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from markupsafe import Markup
+
+from odoo import models, api, _
+from odoo.tools import html2plaintext
+
+# Context key set on records in bulk mode
+BULK_MODE_KEY = "petty_cash_bulk"
+
+# Pre-commit data key of the messages queued for the summaries
+BULK_SUMMARY_KEY = "petty_cash_bulk_summary"
+
+# Record names listed per summary line
+SUMMARY_NAME_LIMIT = 10
+
+
+class PettyCashBulkMixin(models.AbstractModel):
+    """Bulk mode for the petty cash documents
+
+    In bulk mode tracking, creation logs and auto-subscription are disabled
+    and the chatter messages of the records are not posted one by one. They
+    are queued instead, and each affected parent gets a single summary
+    message when the transaction commits.
+    """
+    _name = "petty.cash.bulk.mixin"
+    _description = "Petty Cash Bulk Mode"
+    _inherit = ["mail.thread"]
+
+    # Field of the record whose chatter gets the summary, the record itself if unset
+    _bulk_parent_field = None
+
+    def _bulk_mode(self):
+        """Return these records with bulk mode enabled"""
+        return self.with_context(**{
+            BULK_MODE_KEY: True,
+            "tracking_disable": True,
+            "mail_notrack": True,
+            "mail_create_nolog": True,
+            "mail_create_nosubscribe": True,
+        })
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if self.env.context.get(BULK_MODE_KEY):
+            records._bulk_log(_("Created"))
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self.env.context.get(BULK_MODE_KEY):
+            tracked = self._track_get_fields() & set(vals)
+            if tracked:
+                self._bulk_log(_("Updated %s") % ", ".join(
+                    sorted(self._fields[fname].string for fname in tracked)
+                ))
+        return res
+
+    def message_post(self, **kwargs):
+        # Messages addressed to someone are still sent, only the log is summarized
+        if not self.env.context.get(BULK_MODE_KEY) or kwargs.get("partner_ids"):
+            return super().message_post(**kwargs)
+        self._bulk_log(kwargs.get("body") or kwargs.get("subject") or "")
+        return self.env["mail.message"]
+
+    def _bulk_parent(self):
+        self.ensure_one()
+        parent = self._bulk_parent_field and self[self._bulk_parent_field]
+        return parent or self
+
+    def _bulk_log(self, body):
+        """Queue ``body`` for the summary of each record's parent
+
+        Records are kept as a set per message, so a write retried after a
+        rolled back savepoint is only counted once.
+        """
+        precommit = self.env.cr.precommit
+        summary = precommit.data.get(BULK_SUMMARY_KEY)
+        if summary is None:
+            summary = precommit.data[BULK_SUMMARY_KEY] = defaultdict(lambda: defaultdict(set))
+
+            @precommit.add
+            def post_summaries():
+                self._bulk_post_summaries(precommit.data.pop(BULK_SUMMARY_KEY))
+
+        body = html2plaintext(body) if isinstance(body, Markup) else str(body)
+        for record in self:
+            parent = record._bulk_parent()
+            summary[parent._name, parent.id][body].add((record._name, record.id))
+
+    def _bulk_post_summaries(self, summary):
+        """Post one message per parent summing up the queued messages"""
+        env = self.env(context=dict(self.env.context, **{BULK_MODE_KEY: False}))
+        for (model_name, res_id), messages in summary.items():
+            parent = env[model_name].browse(res_id).exists()
+            if not parent:
+                continue
+            refs = set().union(*messages.values())
+            lines = Markup().join(
+                Markup("<li>%s &times; %s%s</li>") % (
+                    len(records), body, self._bulk_record_names(env, records),
+                )
+                for body, records in messages.items()
+            )
+            parent.sudo().message_post(
+                body=Markup("<p>%s</p><ul>%s</ul>") % (
+                    _("Bulk operation on %s record(s):") % len(refs), lines,
+                ),
+                message_type="notification",
+            )
+
+    @api.model
+    def _bulk_record_names(self, env, records):
+        names = [
+            env[model_name].browse(res_id).display_name
+            for model_name, res_id in sorted(records)[:SUMMARY_NAME_LIMIT]
+        ]
+        if len(records) > SUMMARY_NAME_LIMIT:
+            names.append("...")
+        return " (%s)" % ", ".join(names)
@@ -5,16 +5,19 @@ class PettyCashCategory(models.Model):
     _description = 'Petty Cash Category'
     _order = 'name'
     _rec_name = 'name'  # Use 'name' as the display name in views
+    _rec_names_search = ['name', 'code']
 
     name = fields.Char(
         string='Category Name',
         required=True,
+        index='trigram',
         help='Name of the petty cash category',
     )
 
     code = fields.Char(
         string='Category Code',
         required=True,
+        index='trigram',
         help='Unique code for the petty cash category',
     )
 
@@ -34,35 +37,26 @@ class PettyCashCategory(models.Model):
         help='Color code for the category',
     )
 
+    expense_account_id = fields.Many2one(
+        'account.account',
+        string='Expense Account',
+        domain="[('account_type', 'in', ('expense', 'expense_direct_cost'))]",
+        help='Account the bills of this category are expensed to. '
+             'Falls back to the default expense account of the configuration.',
+    )
+
     _sql_constraints = [
         ('unique_code', 'UNIQUE(code)', _('The category code must be unique.')),
         ('unique_name', 'UNIQUE(name)', _('The category name must be unique.')),
     ]
 
-    @api.model
-    def name_search(self, name='', args=None, operator='ilike', limit=100):
-        if args is None:
-            args = []
-
-        if name:
-            categories = self.search([
-                '|',
-                ('name', operator, name),
-                ('code', operator, name)
-            ] + args, limit=limit)
-            return categories.name_get()
-
-        return super().name_search(name, args, operator, limit)
-    
-    def name_get(self):
-        result = []
+    @api.depends('name', 'code')
+    def _compute_display_name(self):
         for category in self:
             if category.code:
-                name= f"[{category.code}] {category.name}"
+                category.display_name = f"[{category.code}] {category.name}"
             else:
-                name = category.name
-            result.append((category.id, name))
-        return result
+                category.display_name = category.name
     
     def action_save_and_close(self):
         """Save record and return to list view"""
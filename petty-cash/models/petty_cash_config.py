@@ -1,5 +1,20 @@
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+from .float_request import CLOSED_REQUEST_STATES
+
+# Requests archived once closed for longer than the archive horizon
+ARCHIVE_MODELS = ("petty.cash.request", "petty.cash.iou.request")
+
+# Requests archived per cron call; the cron is re-triggered while some remain
+ARCHIVE_BATCH_SIZE = 10000
+
+
+class _AlertTestRollback(Exception):
+    """Raised to roll back the mails and alert logs of a test run"""
 
 
 class PettyCashConfig(models.Model):
@@ -110,6 +125,29 @@ class PettyCashConfig(models.Model):
         help="Warn when float balance goes below this amount.",
     )
 
+    # Accounting
+    default_expense_account_id = fields.Many2one(
+        "account.account",
+        string="Default Expense Account",
+        domain="[('account_type', 'in', ('expense', 'expense_direct_cost'))]",
+        help="Account for IOU settlements and for categories without an expense account.",
+    )
+
+    reimbursement_account_id = fields.Many2one(
+        "account.account",
+        string="Reimbursement Funding Account",
+        help="Bank or transfer account reimbursed cash is paid from into the float's journal.",
+    )
+
+    # Archiving
+    archive_after_days = fields.Integer(
+        string="Archive Closed Requests After (Days)",
+        default=365,
+        help="Closed requests older than this are archived every night, keeping searches on "
+        "open requests fast. Archived requests stay in reports and float totals. "
+        "0 disables archiving.",
+    )
+
     # Security settings
     restrict_handler_edit_approved = fields.Boolean(
         string="Restrict Handler Edit After Approval",
@@ -147,6 +185,7 @@ class PettyCashConfig(models.Model):
         "max_iou_amount",
         "auto_approve_threshold",
         "min_float_balance_warning",
+        "archive_after_days",
     )
     def _check_positive_values(self):
         """Validate that numeric fields have appropriate values"""
@@ -171,6 +210,8 @@ class PettyCashConfig(models.Model):
                 raise ValidationError(_("Auto-approval threshold cannot be negative."))
             if record.min_float_balance_warning < 0:
                 raise ValidationError(_("Minimum balance warning cannot be negative."))
+            if record.archive_after_days < 0:
+                raise ValidationError(_("Archive horizon cannot be negative."))
 
     @api.model
     def get_active_config(self):
@@ -231,14 +272,84 @@ class PettyCashConfig(models.Model):
         return {}
 
     def action_test_alerts(self):
-        """Test the alert system with current settings"""
-        # This would trigger test alerts based on current configuration
+        """Dry run the due date alert engine with current settings
+
+        The mails and alert logs of the run are rolled back, so the real
+        alerts still go out on the next cron run.
+        """
+        Alert = self.env["petty.cash.due.alert"]
+        sent = 0
+        try:
+            with self.env.cr.savepoint():
+                sent_before = Alert.search_count([])
+                Alert._cron_send_due_date_alerts()
+                sent = Alert.search_count([]) - sent_before
+                raise _AlertTestRollback()
+        except _AlertTestRollback:
+            pass
+        finally:
+            self.env.invalidate_all(flush=False)
         return {
             "type": "ir.actions.client",
             "tag": "display_notification",
             "params": {
                 "title": _("Alert Test"),
-                "message": _("Alert system tested with current settings."),
+                "message": _("%s due date alert(s) would be sent with current settings.") % sent,
                 "type": "info",
             },
         }
+
+    @api.model
+    def _cron_archive_closed_requests(self):
+        """Archive the requests closed before the archive horizon
+
+        Archived requests are hidden from the default searches, so lists and
+        lookups on open requests stay fast as history grows, while reports
+        and float totals still read them.
+        """
+        config = self.get_active_config()
+        if not config.archive_after_days:
+            return
+
+        cutoff = fields.Datetime.now() - timedelta(days=config.archive_after_days)
+        remaining = ARCHIVE_BATCH_SIZE
+        for model_name in ARCHIVE_MODELS:
+            if not remaining:
+                break
+            remaining -= self._archive_closed_requests(model_name, cutoff, remaining)
+
+        # A full batch may have left requests behind, run again right away
+        self.env["ir.cron"]._notify_progress(
+            done=ARCHIVE_BATCH_SIZE - remaining, remaining=0 if remaining else 1
+        )
+
+    @api.model
+    def _archive_closed_requests(self, model_name, cutoff, limit):
+        """Archive up to ``limit`` closed requests dated before ``cutoff``
+
+        :return: the number of requests archived
+        """
+        model = self.env[model_name]
+        model.flush_model(["active", "state", "request_date"])
+        self.env.cr.execute(SQL(
+            """UPDATE %(table)s
+                  SET active = FALSE,
+                      write_uid = %(uid)s,
+                      write_date = now() AT TIME ZONE 'UTC'
+                WHERE id IN (
+                      SELECT id FROM %(table)s
+                       WHERE active
+                         AND state IN %(closed)s
+                         AND request_date < %(cutoff)s
+                    ORDER BY id
+                       LIMIT %(limit)s)
+            RETURNING id""",
+            table=SQL.identifier(model._table),
+            uid=self.env.uid,
+            closed=CLOSED_REQUEST_STATES,
+            cutoff=cutoff,
+            limit=limit,
+        ))
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        model.browse(ids).invalidate_recordset(["active", "write_uid", "write_date"])
+        return len(ids)
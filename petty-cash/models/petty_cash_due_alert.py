@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, _
+from odoo.tools import SQL
+
+from .float_request import OVERDUE_REQUEST_STATES
+
+# Requests scanned for due date alerts
+ALERT_MODELS = ("petty.cash.request", "petty.cash.iou.request")
+
+# Requests alerted per cron call; the cron is re-triggered while some remain
+ALERT_BATCH_SIZE = 5000
+
+
+class PettyCashDueAlert(models.Model):
+    _name = "petty.cash.due.alert"
+    _description = "Petty Cash Due Date Alert"
+    _order = "create_date desc, id desc"
+
+    res_model = fields.Char(string="Request Model", required=True, readonly=True)
+    res_id = fields.Many2oneReference(
+        string="Request ID", model_field="res_model", required=True, readonly=True
+    )
+    reference = fields.Char(string="Request", readonly=True)
+
+    alert_type = fields.Selection(
+        [
+            ("before_due", "Due Soon"),
+            ("after_due", "Overdue"),
+        ],
+        string="Alert Type",
+        required=True,
+        readonly=True,
+    )
+
+    due_date = fields.Datetime(string="Due Date", required=True, readonly=True)
+
+    user_id = fields.Many2one(
+        "res.users",
+        string="Recipient",
+        readonly=True,
+        ondelete="set null",
+    )
+
+    _sql_constraints = [
+        (
+            "alert_unique",
+            "unique(res_model, res_id, alert_type, due_date)",
+            "This alert has already been sent for the request.",
+        ),
+    ]
+
+    @api.model
+    def _cron_send_due_date_alerts(self):
+        """Alert requesters of requests due soon or overdue
+
+        Candidates come from a range scan on the partial (state, due_date)
+        index of the active requests of each model, skipping requests already alerted for the same
+        due date, so a run only handles new work and can safely be repeated.
+        """
+        config = self.env["petty.cash.config"].get_active_config()
+        if not config.enable_due_date_alerts:
+            return
+
+        now = fields.Datetime.now()
+        windows = {
+            "before_due": (now, now + timedelta(days=config.first_alert_days_before)),
+            "after_due": (None, now - timedelta(days=config.second_alert_days_after)),
+        }
+
+        remaining = ALERT_BATCH_SIZE
+        for model_name in ALERT_MODELS:
+            for alert_type, (start, end) in windows.items():
+                if not remaining:
+                    break
+                request_ids = self._get_alert_candidates(model_name, alert_type, start, end, remaining)
+                self._send_alerts(model_name, alert_type, request_ids)
+                remaining -= len(request_ids)
+
+        # A full batch may have left candidates behind, run again right away
+        self.env["ir.cron"]._notify_progress(
+            done=ALERT_BATCH_SIZE - remaining, remaining=0 if remaining else 1
+        )
+
+    @api.model
+    def _get_alert_candidates(self, model_name, alert_type, start, end, limit):
+        """Return the ids of the requests still to be alerted"""
+        model = self.env[model_name]
+        model.flush_model(["state", "due_date", "request_by"])
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """SELECT r.id
+                 FROM %(table)s r
+                WHERE r.active
+                  AND r.state IN %(states)s
+                  AND r.due_date <= %(end)s
+                  AND %(start_clause)s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM petty_cash_due_alert a
+                       WHERE a.res_model = %(model)s AND a.res_id = r.id
+                         AND a.alert_type = %(alert_type)s AND a.due_date = r.due_date)
+             ORDER BY r.due_date, r.id
+                LIMIT %(limit)s""",
+            table=SQL.identifier(model._table),
+            states=tuple(OVERDUE_REQUEST_STATES),
+            end=end,
+            start_clause=SQL("r.due_date > %s", start) if start else SQL("TRUE"),
+            model=model_name,
+            alert_type=alert_type,
+            limit=limit,
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _send_alerts(self, model_name, alert_type, request_ids):
+        """Queue one summary mail per recipient and log the alerts sent"""
+        if not request_ids:
+            return
+        requests = self.env[model_name].browse(request_ids)
+        by_recipient = {}
+        for request in requests:
+            by_recipient.setdefault(request.request_by, []).append(request)
+
+        mail_values = []
+        for user, user_requests in by_recipient.items():
+            if not user.partner_id:
+                continue
+            mail_values.append({
+                "subject": self._get_alert_subject(alert_type, len(user_requests)),
+                "body_html": self._get_alert_body(alert_type, user_requests),
+                "recipient_ids": [(4, user.partner_id.id)],
+                "auto_delete": True,
+            })
+        self.env["mail.mail"].sudo().create(mail_values)
+
+        self.create([
+            {
+                "res_model": model_name,
+                "res_id": request.id,
+                "reference": request.name,
+                "alert_type": alert_type,
+                "due_date": request.due_date,
+                "user_id": request.request_by.id,
+            }
+            for request in requests
+        ])
+
+    @api.model
+    def _get_alert_subject(self, alert_type, count):
+        if alert_type == "before_due":
+            return _("%s petty cash request(s) due soon") % count
+        return _("%s petty cash request(s) overdue") % count
+
+    @api.model
+    def _get_alert_body(self, alert_type, requests):
+        intro = (
+            _("The following requests are due for settlement soon:")
+            if alert_type == "before_due"
+            else _("The following requests are past their settlement due date:")
+        )
+        lines = Markup().join(
+            Markup("<tr><td>%s</td><td>%s</td><td>Rs. %s</td></tr>") % (
+                request.name,
+                fields.Date.to_string(request.due_date),
+                f"{request.request_amount:,.2f}",
+            )
+            for request in requests
+        )
+        return Markup("""
+        <p>%s</p>
+        <table class="table table-sm">
+            <thead>
+                <tr><th>%s</th><th>%s</th><th>%s</th></tr>
+            </thead>
+            <tbody>%s</tbody>
+        </table>
+        """) % (intro, _("Request"), _("Due Date"), _("Amount"), lines)
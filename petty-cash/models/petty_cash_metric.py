@@ -0,0 +1,178 @@
+import functools
+import json
+import logging
+import threading
+import time
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# ir.config_parameter switching the instrumentation on ("1") or off
+INSTRUMENTATION_PARAM = "petty_cash.instrumentation"
+
+# ir.config_parameter holding the number of metrics kept in the ring buffer
+BUFFER_SIZE_PARAM = "petty_cash.instrumentation_buffer_size"
+DEFAULT_BUFFER_SIZE = 10000
+
+# The buffer is trimmed once every so many inserted metrics
+TRIM_INTERVAL = 100
+
+
+def instrumented(method):
+    """Record query count, SQL time, Python time and record count of ``method``
+
+    Does nothing unless the ``petty_cash.instrumentation`` parameter is set,
+    in which case every call is logged as one JSON line and kept in the
+    ``petty.cash.action.metric`` ring buffer.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.env["petty.cash.action.metric"]._call(self, method, *args, **kwargs)
+
+    return wrapper
+
+
+class PettyCashActionMetric(models.Model):
+    _name = "petty.cash.action.metric"
+    _description = "Petty Cash Action Metric"
+    _order = "id desc"
+    _log_access = False
+
+    name = fields.Char(string="Action", readonly=True, index=True)
+    user_id = fields.Many2one("res.users", string="User", readonly=True)
+    date = fields.Datetime(string="Date", readonly=True)
+    record_count = fields.Integer(string="Records", readonly=True, aggregator="avg")
+    query_count = fields.Integer(string="Queries", readonly=True, aggregator="avg")
+    sql_time = fields.Float(string="SQL Time (s)", readonly=True, digits=(16, 4), aggregator="avg")
+    python_time = fields.Float(
+        string="Python Time (s)", readonly=True, digits=(16, 4), aggregator="avg"
+    )
+    total_time = fields.Float(
+        string="Total Time (s)", readonly=True, digits=(16, 4), aggregator="avg"
+    )
+    error = fields.Char(string="Error", readonly=True)
+
+    @api.model
+    def _is_enabled(self):
+        return self.env["ir.config_parameter"].sudo().get_param(INSTRUMENTATION_PARAM) == "1"
+
+    @api.model
+    def _call(self, records, method, *args, **kwargs):
+        """Call ``method`` on ``records`` and record its metric when enabled
+
+        Used by ``instrumented``, and by the modules that instrument their
+        own methods without importing this one, e.g. mo_multicurrency.
+        """
+        if not self._is_enabled():
+            return method(records, *args, **kwargs)
+
+        thread = threading.current_thread()
+        # Query time is only accumulated on threads serving HTTP requests
+        track_thread = not hasattr(thread, "query_time")
+        if track_thread:
+            thread.query_count, thread.query_time = 0, 0.0
+        cr = records.env.cr
+        queries_before, sql_time_before = cr.sql_log_count, thread.query_time
+        start = time.perf_counter()
+        error = None
+        try:
+            return method(records, *args, **kwargs)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            total_time = time.perf_counter() - start
+            sql_time = thread.query_time - sql_time_before
+            if track_thread:
+                del thread.query_count, thread.query_time
+            self._record({
+                "name": f"{records._name}.{method.__name__}",
+                "record_count": len(records),
+                "query_count": cr.sql_log_count - queries_before,
+                "sql_time": sql_time,
+                "python_time": max(total_time - sql_time, 0.0),
+                "total_time": total_time,
+                "error": error,
+            })
+
+    @api.model
+    def _record(self, values):
+        """Log a metric and append it to the ring buffer
+
+        The metric is written and committed through its own cursor, so the
+        metrics of actions that raise survive the rollback of the action.
+        """
+        _logger.info("petty_cash.metric %s", json.dumps(values, default=str))
+        try:
+            with self.env.registry.cursor() as cr:
+                cr.execute(SQL(
+                    """INSERT INTO petty_cash_action_metric
+                           (name, user_id, date, record_count, query_count,
+                            sql_time, python_time, total_time, error)
+                       VALUES (%s, %s, now() AT TIME ZONE 'UTC', %s, %s, %s, %s, %s, %s)
+                    RETURNING id""",
+                    values["name"], self.env.uid, values["record_count"],
+                    values["query_count"], values["sql_time"], values["python_time"],
+                    values["total_time"], values["error"],
+                ))
+                [metric_id] = cr.fetchone()
+                if not metric_id % TRIM_INTERVAL:
+                    self.with_env(self.env(cr=cr))._trim(metric_id)
+        except Exception:
+            # The log line remains when the metric cannot be stored
+            _logger.debug("Could not store petty cash metric", exc_info=True)
+
+    @api.model
+    def _trim(self, last_id):
+        """Drop the metrics that fell out of the ring buffer"""
+        size = int(
+            self.env["ir.config_parameter"].sudo().get_param(BUFFER_SIZE_PARAM, DEFAULT_BUFFER_SIZE)
+        )
+        self.env.cr.execute(SQL(
+            "DELETE FROM petty_cash_action_metric WHERE id <= %s", last_id - size
+        ))
+
+
+class PettyCashActionMetricSummary(models.Model):
+    _name = "petty.cash.action.metric.summary"
+    _description = "Petty Cash Action Metric Summary"
+    _auto = False
+    _order = "max_time desc"
+
+    name = fields.Char(string="Action", readonly=True)
+    call_count = fields.Integer(string="Calls", readonly=True)
+    error_count = fields.Integer(string="Errors", readonly=True)
+    avg_records = fields.Float(string="Avg Records", readonly=True, digits=(16, 1))
+    avg_queries = fields.Float(string="Avg Queries", readonly=True, digits=(16, 1))
+    max_queries = fields.Integer(string="Max Queries", readonly=True)
+    avg_sql_time = fields.Float(string="Avg SQL Time (s)", readonly=True, digits=(16, 4))
+    avg_python_time = fields.Float(string="Avg Python Time (s)", readonly=True, digits=(16, 4))
+    avg_time = fields.Float(string="Avg Time (s)", readonly=True, digits=(16, 4))
+    p95_time = fields.Float(string="95th Percentile (s)", readonly=True, digits=(16, 4))
+    max_time = fields.Float(string="Slowest (s)", readonly=True, digits=(16, 4))
+    last_date = fields.Datetime(string="Last Call", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """CREATE VIEW %s AS (
+                SELECT MIN(id) AS id,
+                       name,
+                       COUNT(*) AS call_count,
+                       COUNT(error) AS error_count,
+                       AVG(record_count) AS avg_records,
+                       AVG(query_count) AS avg_queries,
+                       MAX(query_count) AS max_queries,
+                       AVG(sql_time) AS avg_sql_time,
+                       AVG(python_time) AS avg_python_time,
+                       AVG(total_time) AS avg_time,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY total_time) AS p95_time,
+                       MAX(total_time) AS max_time,
+                       MAX(date) AS last_date
+                  FROM petty_cash_action_metric
+              GROUP BY name
+            )""",
+            SQL.identifier(self._table),
+        ))
@@ -0,0 +1,51 @@
+from odoo import models, api, tools
+
+# Petty cash roles and the group granting each of them
+ROLE_GROUPS = {
+    "user": "petty-cash.group_petty_cash_user",
+    "handler": "petty-cash.group_petty_cash_handler",
+    "hod": "petty-cash.group_petty_cash_hod",
+    "float_manager": "petty-cash.group_petty_cash_float_manager",
+    "manager": "petty-cash.group_petty_cash_manager",
+    "accountant": "petty-cash.group_petty_cash_accountant",
+    "admin": "petty-cash.group_petty_cash_admin",
+    "system": "base.group_system",
+}
+
+
+class PettyCashPermission(models.AbstractModel):
+    _name = "petty.cash.permission"
+    _description = "Petty Cash Permission Resolver"
+
+    @api.model
+    @tools.ormcache("xmlid")
+    def _get_group_id(self, xmlid):
+        """Return the id of the group with this XML ID, or False"""
+        return self.env["ir.model.data"]._xmlid_to_res_id(xmlid, raise_if_not_found=False)
+
+    @api.model
+    def _get_group_ids(self, *roles):
+        """Return the ids of the groups granting the given roles"""
+        group_ids = (self._get_group_id(ROLE_GROUPS[role]) for role in roles)
+        return [group_id for group_id in group_ids if group_id]
+
+    @api.model
+    @tools.ormcache("self.env.uid")
+    def _get_user_roles(self):
+        """Return the petty cash roles of the current user
+
+        The result is cached per user and dropped by the registry when group
+        memberships change, so permission gates looping over many records
+        cost no query after the first lookup.
+        """
+        user_group_ids = set(self.env.user.sudo().groups_id.ids)
+        return frozenset(
+            role
+            for role, xmlid in ROLE_GROUPS.items()
+            if self._get_group_id(xmlid) in user_group_ids
+        )
+
+    @api.model
+    def has_role(self, *roles):
+        """Check if the current user has any of the given roles"""
+        return not self._get_user_roles().isdisjoint(roles)
@@ -1,19 +1,23 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from datetime import datetime, timedelta
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
 
 
 import logging
 from PIL import Image
 from pdf2image import convert_from_bytes
 
+from .petty_cash_metric import instrumented
+
 _logger = logging.getLogger(__name__)
 
 
 class PettyCashRequest(models.Model):
     _name = "petty.cash.request"
     _description = "Petty Cash Request"
-    _inherit = ["mail.thread", "mail.activity.mixin", "portal.mixin"]
+    _inherit = ["petty.cash.bulk.mixin", "petty.cash.workflow.mixin", "mail.thread", "mail.activity.mixin", "portal.mixin"]
+    _bulk_parent_field = "float_request_id"
     _order = "request_date desc, name desc"
     _rec_name = "name"  # Use 'name' as the display name in views
 
@@ -174,29 +178,92 @@ class PettyCashRequest(models.Model):
     
     settlement_amount = fields.Float(
         string= 'Settlement Amount',
-        compute='_compute_settlement_amount',
+        compute='_compute_bill_totals',
         store=True,
         help="Total amount of all related bill settlements"
     )
     
     settlement_date = fields.Datetime(
         string='Settlement Date',
-        compute='_compute_settlement_date',
+        compute='_compute_bill_totals',
         store=True,
         help="Latest settlement date from approved bills"
     )
     
     has_pending_bills = fields.Boolean(
         string='Has Pending Bills',
-        compute='_compute_has_pending_bills',
+        compute='_compute_bill_totals',
+        store=True,
+        index=True,
         help='True if there are bills pending approval'
     )
+
+    pending_bill_count = fields.Integer(
+        string='Pending Bills',
+        compute='_compute_bill_totals',
+        store=True,
+        index=True,
+        help="Number of submitted bills awaiting review"
+    )
+
+    pending_bill_amount = fields.Float(
+        string='Pending Bills Amount',
+        compute='_compute_bill_totals',
+        store=True,
+    )
+
+    approved_bill_count = fields.Integer(
+        string='Approved Bills',
+        compute='_compute_bill_totals',
+        store=True,
+    )
+
+    approved_bill_amount = fields.Float(
+        string='Approved Bills Amount',
+        compute='_compute_bill_totals',
+        store=True,
+    )
+
+    rejected_bill_count = fields.Integer(
+        string='Rejected Bills',
+        compute='_compute_bill_totals',
+        store=True,
+    )
+
+    rejected_bill_amount = fields.Float(
+        string='Rejected Bills Amount',
+        compute='_compute_bill_totals',
+        store=True,
+    )
     
     reason_in_advance = fields.Text(
         string='Reason for Advance',
         help="Reason for requesting advance payment (for IOU requests)"
     )
 
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+        help="Closed requests older than the archive horizon are archived. "
+             "They are left out of searches unless asked for, but still count in the float totals."
+    )
+
+    account_move_id = fields.Many2one(
+        'account.move',
+        string='Journal Entry',
+        readonly=True,
+        copy=False,
+        index='btree_not_null',
+        help="Daily journal entry of the float this request's bills were posted in"
+    )
+
+    posting_error = fields.Char(
+        string='Posting Error',
+        readonly=True,
+        copy=False,
+        help="Why the request could not be posted to accounting; it is left out of the postings until retried",
+    )
+
     @api.depends('request_by')
     def _compute_employee_dept(self):
         for record in self:
@@ -223,49 +290,54 @@ class PettyCashRequest(models.Model):
     
     def _get_hod_users(self):
         """Get list of user IDs who have HOD role"""
-        try:
-            group = self.env.ref('petty-cash.group_petty_cash_hod', raise_if_not_found=False)
-            return [group.id] if group else []
-        except:
-            # Fallback - search by name
-            group = self.env['res.groups'].search([('name', '=', 'HOD (Head of Department)')], limit=1)
-            return [group.id] if group else []
+        return self.env['petty.cash.permission']._get_group_ids('hod')
     
     def _get_float_manager_users(self):
         """Get list of user IDs who have Float Manager role"""
-        try:
-            group = self.env.ref('petty-cash.group_petty_cash_float_manager', raise_if_not_found=False)
-            return [group.id] if group else []
-        except:
-            # Fallback - search by name  
-            group = self.env['res.groups'].search([('name', '=', 'Float Manager')], limit=1)
-            return [group.id] if group else []
+        return self.env['petty.cash.permission']._get_group_ids('float_manager')
     
-    @api.depends('bill_settlement_ids.amount', 'bill_settlement_ids.status')
-    def _compute_settlement_amount(self):
-        """Compute the total settlement amount from approved bills"""
+    @api.depends('bill_settlement_ids.amount', 'bill_settlement_ids.status', 'bill_settlement_ids.approval_date')
+    def _compute_bill_totals(self):
+        """Compute bill counts, amounts and the settlement totals per status"""
+        totals = self._get_bill_totals()
         for record in self:
-            approved_bills = record.bill_settlement_ids.filtered(lambda b: b.status == 'approved')
-            record.settlement_amount = sum(approved_bills.mapped('amount'))
-            
-    @api.depends('bill_settlement_ids.date', 'bill_settlement_ids.status')
-    def _compute_settlement_date(self):
-        """Compute the latest settlement date from approved bills"""
-        for record in self:
-            approved_bills = record.bill_settlement_ids.filtered(lambda b: b.status == 'approved')
-            if approved_bills:
-                record.settlement_date = max(approved_bills.mapped('approval_date'))
-            else:
-                record.settlement_date = False
-                
-    @api.depends('bill_settlement_ids.status')
-    def _compute_has_pending_bills(self):
-        """Check if there are pending bills"""
-        for record in self:
-            pending_bills = record.bill_settlement_ids.filtered(lambda b: b.status == 'submitted')
-            record.has_pending_bills = bool(pending_bills)
-    
-
+            pending_count, pending_amount, __ = totals.get((record.id, 'submitted'), (0, 0.0, False))
+            approved_count, approved_amount, approved_date = totals.get((record.id, 'approved'), (0, 0.0, False))
+            rejected_count, rejected_amount, __ = totals.get((record.id, 'rejected'), (0, 0.0, False))
+            record.has_pending_bills = bool(pending_count)
+            record.pending_bill_count = pending_count
+            record.pending_bill_amount = pending_amount
+            record.approved_bill_count = approved_count
+            record.approved_bill_amount = approved_amount
+            record.rejected_bill_count = rejected_count
+            record.rejected_bill_amount = rejected_amount
+            record.settlement_amount = approved_amount
+            record.settlement_date = approved_date
+
+    def _get_bill_totals(self):
+        """Return {(request id, status): (count, amount, latest approval_date)} for the bills
+
+        Saved requests are aggregated with a single grouped query over the
+        bill table; requests that only exist in a form (onchange) fall back
+        to their cached lines.
+        """
+        saved = self.filtered(lambda r: isinstance(r.id, int))
+        totals = {}
+        if saved:
+            groups = self.env['petty.cash.bill.settlement']._read_group(
+                [('petty_cash_request_id', 'in', saved.ids)],
+                ['petty_cash_request_id', 'status'],
+                ['__count', 'amount:sum', 'approval_date:max'],
+            )
+            for request, status, count, amount, latest_date in groups:
+                totals[request.id, status] = (count, amount, latest_date)
+        for record in self - saved:
+            for bill in record.bill_settlement_ids:
+                count, amount, latest_date = totals.get((record.id, bill.status), (0, 0.0, False))
+                if bill.approval_date and (not latest_date or bill.approval_date > latest_date):
+                    latest_date = bill.approval_date
+                totals[record.id, bill.status] = (count + 1, amount + bill.amount, latest_date)
+        return totals
 
     def action_approve_selected_bills(self):
         """Action to approve selected bills"""
@@ -341,22 +413,22 @@ class PettyCashRequest(models.Model):
         )
         return True
     
+    def action_retry_posting(self):
+        """Queue the requests for the next accounting posting again"""
+        self.write({"posting_error": False})
+        return True
+
     def action_complete_petty_cash(self):
         """Complete the petty cash request after cash receipt confirmation"""
-        self.ensure_one()
-        
-        if self.state != 'cash_issued':
-            raise UserError(_("Only cash issued requests can be completed.")) 
-        
-        if not self.cashReceivedByEmployee:
+        self._workflow_transition("complete")
+        return True
+
+    def _check_can_complete(self):
+        if not all(self.mapped("cashReceivedByEmployee")):
             raise UserError(_("Please confirm that employee has received the cash."))
-        
-        if not self.received_voucher:
-            raise UserError(_("Please attach the signed received voucher."))
 
-        self.state = "completed"
-        self.message_post(body=_("Petty cash request completed successfully."))
-        return True
+        if not all(self.mapped("received_voucher")):
+            raise UserError(_("Please attach the signed received voucher."))
     
     def action_adjust_request_amount(self):
         """Adjust the request amount based on the approved bills"""
@@ -402,12 +474,32 @@ class PettyCashRequest(models.Model):
             }
     }
 
-    @api.depends('bill_settlement_ids.status')
-    def _compute_pending_bills(self):
-        """Check if there are pending bills"""
-        for record in self:
-            pending_bills = record.bill_settlement_ids.filtered(lambda b: b.status in ['draft', 'submitted'])
-            record.has_pending_bills = bool(pending_bills)
+    def init(self):
+        # Archived requests are all closed, so the scans of open requests
+        # (due date alerts, overdue counts, dashboard) only index active rows
+        self.env.cr.execute(SQL("DROP INDEX IF EXISTS petty_cash_request_state_due_date_idx"))
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_request_active_state_due_date_idx",
+            self._table,
+            ["state", "due_date"],
+            where="active",
+        )
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_request_active_float_state_idx",
+            self._table,
+            ["float_request_id", "state"],
+            where="active",
+        )
+        # Period expenses, reports and the float totals filter on the float and
+        # the state, then on the request date range
+        tools.create_index(
+            self.env.cr,
+            "petty_cash_request_float_state_date_idx",
+            self._table,
+            ["float_request_id", "state", "request_date"],
+        )
 
     @api.depends("request_date")
     def _compute_due_date(self):
@@ -442,6 +534,12 @@ class PettyCashRequest(models.Model):
                     vals["name"] = self._generate_sequence_number("petty.cash.request")
         return super().create(vals_list)
 
+    def write(self, vals):
+        res = super().write(vals)
+        if "state" in vals:
+            self.env["float.dashboard"]._trigger_refresh()
+        return res
+
     def _generate_sequence_number(self, sequence_code):
         """Generate sequence number with proper error handling"""
         sequence = self.env["ir.sequence"].next_by_code(sequence_code)
@@ -483,65 +581,97 @@ class PettyCashRequest(models.Model):
             else:
                 self.name = "New PC"
 
+    def _get_workflow_transitions(self):
+        return {
+            "submit": {
+                "from": ("draft",),
+                "to": "requested",
+                "skip": True,
+            },
+            "cancel": {
+                "from": ("draft", "requested"),
+                "to": "cancelled",
+                "error": _("Request can only be cancelled in Draft or Requested state"),
+                "message": _("Request cancelled"),
+            },
+            "issue_cash": {
+                "from": ("requested",),
+                "to": "cash_issued",
+                "error": _("Cash can only be issued for requested petty cash"),
+                "check": "_check_can_issue_cash",
+            },
+            "complete": {
+                "from": ("cash_issued",),
+                "to": "completed",
+                "error": _("Only cash issued requests can be completed."),
+                "check": "_check_can_complete",
+                "message": _("Petty cash request completed successfully."),
+            },
+        }
+
     def action_submit(self):
         """Submit petty cash request"""
-        if self.state == "draft":
-            self.state = "requested"
+        self._workflow_transition("submit")
         return True
 
     def action_cancel(self):
         """Cancel petty cash request"""
-        self.ensure_one()
-        if self.state in ["draft", "requested"]:
-            self.state = "cancelled"
-            self.message_post(body=_("Request cancelled"))
-        else:
-            raise UserError(
-                _("Request can only be cancelled in Draft or Requested state")
-            )
+        self._workflow_transition("cancel")
         return True
 
+    @instrumented
     def action_cash_issued(self):
-        """Issue cash - opens denomination popup"""
+        """Issue cash - opens denomination popup
+
+        The denomination wizard applies the ``issue_cash`` transition once
+        the cash is counted out.
+        """
         self.ensure_one()
-        if self.state == "requested":
-            
-            if not self.bill_settlement_ids:
+        self._workflow_validate("issue_cash")
+        # Open denomination popup wizard
+        return {
+            "name": "Cash Denomination - Petty Cash",
+            "type": "ir.actions.act_window",
+            "res_model": "cash.denomination.wizard",
+            "view_mode": "form",
+            "view_id": self.env.ref('petty-cash.cash_denomination_wizard_form').id,
+            "target": "new",
+            "context": {
+                "default_request_id": self.id,
+                "default_request_amount": self.request_amount,
+                "default_request_type": "petty_cash",
+                "float_request_id": (
+                    self.float_request_id.id if self.float_request_id else False
+                ),
+            },
+        }
+
+    def _check_approvals(self):
+        """Both the HOD and the float manager must approve before the cash is issued"""
+        for record in self:
+            if not record.isHodApproved:
+                raise UserError(_("%s is not approved by the HOD yet.") % record.name)
+            if not record.isFloatManagerApproved:
+                raise UserError(_("%s is not approved by the float manager yet.") % record.name)
+
+    def _check_can_issue_cash(self):
+        self._check_approvals()
+        for record in self:
+            if not record.bill_settlement_ids:
                 raise UserError(_("Please submit bills before issuing cash."))
-            
+
             #check for pending bills
-            pending_bills = self.bill_settlement_ids.filtered(lambda b:b.status == 'submitted')
-            if pending_bills:
+            if record.has_pending_bills:
                 raise UserError(_("Please approve or reject all bills before issuing cash."))
-            
-            approved_bills = self.bill_settlement_ids.filtered(lambda b: b.status == 'approved')
-            if not approved_bills:
+
+            if not record.approved_bill_count:
                 raise UserError(_("No bills have been approved yet."))
-            
-            if abs(self.settlement_amount - self.request_amount) > 0.01:
+
+            if abs(record.settlement_amount - record.request_amount) > 0.01:
                 raise UserError(
-                    _("Settlement amount (Rs. %.2f) should equal request amount (Rs. %.2f)") % 
-                    (self.settlement_amount, self.request_amount)
+                    _("Settlement amount (Rs. %.2f) should equal request amount (Rs. %.2f)") %
+                    (record.settlement_amount, record.request_amount)
                 )
-            # Open denomination popup wizard
-            return {
-                "name": "Cash Denomination - Petty Cash",
-                "type": "ir.actions.act_window",
-                "res_model": "cash.denomination.wizard",
-                "view_mode": "form",
-                "view_id": self.env.ref('petty-cash.cash_denomination_wizard_form').id,
-                "target": "new",
-                "context": {
-                    "default_request_id": self.id,
-                    "default_request_amount": self.request_amount,
-                    "default_request_type": "petty_cash",
-                    "float_request_id": (
-                        self.float_request_id.id if self.float_request_id else False
-                    ),
-                },
-            }
-        else:
-            raise UserError(_("Cash can only be issued for requested petty cash"))
 
     @api.constrains(
         "request_amount",
@@ -573,12 +703,9 @@ class PettyCashRequest(models.Model):
                         "Due date cannot be earlier than request date. Please select a valid due date."
                     )
                 )
-            if not record.isHodApproved:
-                errors.append(_("HOD Approved must be ticked"))
+            # Both approvals are only required before the cash is issued
             if record.isHodApproved and not record.hodApprovedBy:
                 errors.append(_("Select the approved HOD."))
-            if not record.isFloatManagerApproved:
-                errors.append(_("Float Manager Approved must be ticked"))
             if record.isFloatManagerApproved and not record.floatManagerApprovedBy:
                 errors.append(_("Select the Approved Float Manager."))
             if not record.float_request_id:
@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from odoo import models, _
+from odoo.exceptions import UserError
+
+from .petty_cash_bulk import BULK_MODE_KEY
+
+
+class PettyCashWorkflowMixin(models.AbstractModel):
+    """Declarative state machine for the petty cash documents
+
+    Each model describes its transitions in ``_get_workflow_transitions``.
+    A transition is applied to a whole recordset at once: the records are
+    validated together, written with one ``write`` per target state, and
+    the hooks run once for all of them.
+
+    Keys of a transition:
+
+    * ``from``: states the transition applies to
+    * ``to``: target state, or a callable returning it for a record
+    * ``error``: message raised when a record is not in a ``from`` state
+    * ``skip``: ignore such records instead of raising
+    * ``roles``: permission roles allowed to apply it, see ``has_role``
+    * ``denied``: message raised when the user has none of the ``roles``
+    * ``check``: method validating the records before the write
+    * ``values``: other values written along with the state
+    * ``message``: chatter message, or a callable returning it for a record
+    * ``hook``: method called on the moved records after the write
+    """
+    _name = "petty.cash.workflow.mixin"
+    _description = "Petty Cash Workflow"
+    _inherit = ["mail.thread"]
+
+    # Selection field moved by the transitions
+    _workflow_field = "state"
+
+    def _get_workflow_transitions(self):
+        """Return the transitions of the model as ``{name: transition}``"""
+        return {}
+
+    def _workflow_validate(self, name):
+        """Check that transition ``name`` can be applied to these records
+
+        :return: the records to move, those skipped excluded
+        """
+        transition = self._get_workflow_transitions()[name]
+        roles = transition.get("roles")
+        if roles and not self.env["petty.cash.permission"].has_role(*roles):
+            raise UserError(transition["denied"])
+
+        fname = self._workflow_field
+        records = self.filtered(lambda record: record[fname] in transition["from"])
+        if len(records) < len(self) and not transition.get("skip"):
+            raise UserError(transition["error"])
+        if records and transition.get("check"):
+            getattr(records, transition["check"])()
+        return records
+
+    def _workflow_transition(self, name, values=None):
+        """Apply transition ``name`` to these records
+
+        :param values: values written along with the state, on top of the
+                       transition's own ``values``
+        :return: the records moved
+        """
+        records = self._workflow_validate(name)
+        if not records:
+            return records
+
+        transition = self._get_workflow_transitions()[name]
+        values = {**transition.get("values", {}), **(values or {})}
+        for state, group in records._workflow_group(transition["to"]).items():
+            group.write({**values, self._workflow_field: state})
+
+        if transition.get("message"):
+            records._workflow_log(transition["message"])
+        if transition.get("hook"):
+            getattr(records, transition["hook"])()
+        return records
+
+    def _workflow_group(self, to):
+        """Return ``{state: records}`` of the target state of each record"""
+        if not callable(to):
+            return {to: self}
+        ids_by_state = defaultdict(list)
+        for record in self:
+            ids_by_state[to(record)].append(record.id)
+        return {state: self.browse(ids) for state, ids in ids_by_state.items()}
+
+    def _workflow_log(self, message):
+        """Post ``message`` in the chatter of the records
+
+        Followers are notified of each state change, as the documents did
+        before the workflow was shared. In bulk mode the messages are
+        summarised by ``_bulk_log`` instead.
+        """
+        bodies = {
+            record.id: message(record) if callable(message) else message
+            for record in self
+        }
+        if self.env.context.get(BULK_MODE_KEY) and hasattr(self, "_bulk_log"):
+            ids_by_body = defaultdict(list)
+            for res_id, body in bodies.items():
+                ids_by_body[body].append(res_id)
+            for body, ids in ids_by_body.items():
+                self.browse(ids)._bulk_log(body)
+            return
+        for record in self:
+            record.message_post(body=bodies[record.id], message_type="notification")
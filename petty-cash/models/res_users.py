@@ -22,16 +22,20 @@ class ResUsers(models.Model):
 
     managed_float_count = fields.Integer(
         string='Managed Floats Count',
-        compute='_compute_managed_float_count'
+        compute='_compute_managed_float_count',
+        store=True,
     )
 
     @api.depends('managed_float_ids.state')
     def _compute_managed_float_count(self):
-        """Compute number of active floats managed by this user"""
+        """Compute number of active floats managed by all users in one query"""
+        counts = dict(self.env['float.request']._read_group(
+            [('float_manager_id', 'in', self._origin.ids), ('state', '=', 'approved')],
+            ['float_manager_id'],
+            ['__count'],
+        ))
         for user in self:
-            user.managed_float_count = len(user.managed_float_ids.filtered(
-                lambda f: f.state == 'approved'
-            ))
+            user.managed_float_count = counts.get(user._origin, 0)
 
     def action_view_managed_floats(self):
         """Open floats managed by this user"""
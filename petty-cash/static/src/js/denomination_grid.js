@@ -0,0 +1,169 @@
+/** @odoo-module **/
+
+import { Component } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { formatFloat } from "@web/views/fields/formatters";
+import { standardWidgetProps } from "@web/views/widgets/standard_widget_props";
+
+// Keep in sync with DENOMINATION_VALUES in models/float_denomination.py
+export const DENOMINATION_VALUES = [5000, 1000, 500, 100, 50, 20, 10, 5, 2, 1];
+
+// Wizard fields holding {"<denomination value>": quantity} vectors
+const VECTOR_FIELDS = {
+    denom: "denomination_quantities",
+    balance: "balance_quantities",
+};
+
+function vectorQuantity(vector, value) {
+    return (vector && vector[value]) || 0;
+}
+
+/**
+ * Denomination grid of the cash denomination and initial denomination wizards.
+ *
+ * Totals, availability and differences are computed in the browser and the
+ * quantity vectors are written to the record locally, so no field of the grid
+ * triggers an onchange. The server is only called when the wizard is saved
+ * (validation) and when its button is clicked (commit).
+ *
+ * ``mode="issue"`` draws from the float's drawer and supports handing back a
+ * balance, a reimbursement refills the drawer so its notes are not capped; ``mode="count"`` counts a drawer against the float's initial amount.
+ */
+export class DenominationGrid extends Component {
+    static template = "petty-cash.DenominationGrid";
+    static props = {
+        ...standardWidgetProps,
+        mode: { type: String, optional: true },
+    };
+    static defaultProps = {
+        mode: "issue",
+    };
+
+    get data() {
+        return this.props.record.data;
+    }
+
+    get isIssue() {
+        return this.props.mode === "issue";
+    }
+
+    get isRefill() {
+        return this.isIssue && this.data.request_type === "reimbursement";
+    }
+
+    get isCashBalanced() {
+        return this.isIssue && this.data.is_cash_balanced;
+    }
+
+    get rows() {
+        return DENOMINATION_VALUES.map((value) => {
+            const qty = vectorQuantity(this.data.denomination_quantities, value);
+            const row = {
+                value,
+                label: `Rs. ${value.toLocaleString("en-US")}`,
+                qty,
+                amount: qty * value,
+            };
+            if (this.isIssue) {
+                const available = vectorQuantity(this.data.denomination_available, value);
+                const balanceQty = vectorQuantity(this.data.balance_quantities, value);
+                Object.assign(row, {
+                    available,
+                    short: !this.isRefill && qty > available,
+                    balanceQty,
+                    balanceAvailable: Math.max(0, available - qty),
+                    balanceShort: this.isCashBalanced && balanceQty > available,
+                });
+            }
+            return row;
+        });
+    }
+
+    get selectedAmount() {
+        return this.rows.reduce((total, row) => total + row.amount, 0);
+    }
+
+    get selectedBalanceAmount() {
+        if (!this.isCashBalanced) {
+            return 0;
+        }
+        return this.rows.reduce((total, row) => total + row.balanceQty * row.value, 0);
+    }
+
+    get targetAmount() {
+        if (!this.isIssue) {
+            return this.data.initial_amount || 0;
+        }
+        return (this.data.requested_amount || 0) + this.selectedBalanceAmount;
+    }
+
+    get difference() {
+        return this.selectedAmount - this.targetAmount;
+    }
+
+    get isMatched() {
+        return Math.abs(this.difference) < 0.01;
+    }
+
+    get hasShortage() {
+        return this.rows.some((row) => row.short || row.balanceShort);
+    }
+
+    formatAmount(amount) {
+        return `Rs. ${formatFloat(amount, { digits: [16, 2] })}`;
+    }
+
+    onQuantityInput(kind, value, ev) {
+        const fieldName = VECTOR_FIELDS[kind];
+        const vector = { ...(this.data[fieldName] || {}) };
+        const qty = Math.max(0, parseInt(ev.target.value, 10) || 0);
+        if (qty) {
+            vector[value] = qty;
+        } else {
+            delete vector[value];
+        }
+        this.props.record.update({ [fieldName]: vector });
+    }
+
+    onToggleBalance(ev) {
+        const changes = { is_cash_balanced: ev.target.checked };
+        if (!ev.target.checked) {
+            changes.balance_quantities = {};
+        }
+        this.props.record.update(changes);
+    }
+
+    /**
+     * Greedy breakdown of the requested amount over the available notes,
+     * mirroring ``cash.denomination.wizard.action_auto_calculate``.
+     */
+    onAutoFill() {
+        let remaining = this.data.requested_amount || 0;
+        const quantities = {};
+        for (const row of this.rows) {
+            const qty = Math.min(Math.floor(remaining / row.value), row.available);
+            if (qty) {
+                quantities[row.value] = qty;
+            }
+            remaining -= qty * row.value;
+        }
+        this.props.record.update({ denomination_quantities: quantities });
+    }
+
+    onClear() {
+        const changes = { denomination_quantities: {} };
+        if (this.isIssue) {
+            changes.balance_quantities = {};
+        }
+        this.props.record.update(changes);
+    }
+}
+
+export const denominationGrid = {
+    component: DenominationGrid,
+    extractProps: ({ attrs }) => ({
+        mode: attrs.mode,
+    }),
+};
+
+registry.category("view_widgets").add("denomination_grid", denominationGrid);
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_bulk_approval
+from . import test_query_plans
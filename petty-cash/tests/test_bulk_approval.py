@@ -0,0 +1,57 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestBulkApproval(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = new_test_user(
+            cls.env,
+            login="petty_cash_bulk_manager",
+            groups="base.group_user,petty-cash.group_petty_cash_manager",
+        )
+        department = cls.env["hr.department"].create({"name": "Bulk Approval Department"})
+        category = cls.env["petty.cash.category"].create({"name": "Bulk Approval", "code": "BULKAPP"})
+        cls.float_request = cls.env["float.request"].create({
+            "name": "Bulk Approval Float",
+            "department_id": department.id,
+            "initial_amount": 3000,
+            "float_manager_id": cls.manager.id,
+            "state": "approved",
+        })
+        cls.requests = cls.env["petty.cash.request"].create([
+            {
+                "request_by": cls.manager.id,
+                "float_request_id": cls.float_request.id,
+                "category": category.id,
+                "request_amount": amount,
+                "request_voucher_filename": "voucher.pdf",
+                "description": "Bulk approval request",
+            }
+            for amount in (1000, 1500)
+        ])
+
+    def test_bulk_approve_requests(self):
+        self.assertFalse(any(self.requests.mapped("isHodApproved")))
+        wizard = self.env["petty.cash.bulk.approval.wizard"].with_user(self.manager).create({
+            "approval_type": "hod",
+            "petty_cash_request_ids": [(6, 0, self.requests.ids)],
+        })
+        wizard.action_approve()
+
+        self.assertEqual(wizard.approved_count, 2)
+        self.assertEqual(wizard.failed_count, 0)
+        self.assertTrue(all(self.requests.mapped("isHodApproved")))
+        self.assertEqual(self.requests.hodApprovedBy, self.manager)
+
+    def test_bulk_approve_over_float_balance(self):
+        self.requests[1].request_amount = 2500
+        result = self.env["petty.cash.bulk.approval.wizard"].with_user(self.manager).bulk_approve(
+            "float_manager", petty_cash_requests=self.requests.with_user(self.manager),
+        )
+
+        self.assertEqual(result["approved"]["petty.cash.request"], self.requests[0])
+        self.assertEqual([name for name, __ in result["failed"]], [self.requests[1].name])
+        self.assertFalse(self.requests[1].isFloatManagerApproved)
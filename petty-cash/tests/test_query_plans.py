@@ -0,0 +1,24 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestQueryPlans(TransactionCase):
+    """The key period and float queries must be able to use their indexes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.benchmark = cls.env["petty.cash.benchmark"]
+        cls.data = cls.benchmark._seed({
+            "departments": 2,
+            "floats_per_department": 2,
+            "categories": 3,
+            "requests_per_float": 5,
+            "bills_per_request": 2,
+            "ious_per_float": 4,
+            "reimbursements_per_float": 2,
+            "drawer_moves_per_float": 2,
+        })
+
+    def test_query_plans_use_indexes(self):
+        self.assertFalse(self.benchmark._check_query_plans(self.data))
@@ -1,2 +1,4 @@
 from . import cash_denomination_wizard
-from . import initial_denomination_wizard
\ No newline at end of file
+from . import initial_denomination_wizard
+from . import bulk_approval_wizard
+from . import history_import_wizard
@@ -0,0 +1,235 @@
+import logging
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+
+from ..models.petty_cash_metric import instrumented
+
+_logger = logging.getLogger(__name__)
+
+# Approval type -> (flag field, approver field, role allowed to approve)
+APPROVAL_FIELDS = {
+    "hod": ("isHodApproved", "hodApprovedBy", "hod"),
+    "float_manager": (
+        "isFloatManagerApproved",
+        "floatManagerApprovedBy",
+        "float_manager",
+    ),
+}
+
+# States in which a request can still be approved
+APPROVABLE_STATES = ["draft", "requested"]
+
+
+class PettyCashBulkApprovalWizard(models.TransientModel):
+    _name = "petty.cash.bulk.approval.wizard"
+    _description = "Petty Cash Bulk Approval Wizard"
+
+    approval_type = fields.Selection(
+        [
+            ("hod", "HOD Approval"),
+            ("float_manager", "Float Manager Approval"),
+        ],
+        string="Approval Type",
+        required=True,
+        default="hod",
+    )
+
+    petty_cash_request_ids = fields.Many2many(
+        "petty.cash.request",
+        string="Petty Cash Requests",
+        domain=[("state", "in", APPROVABLE_STATES)],
+    )
+
+    iou_request_ids = fields.Many2many(
+        "petty.cash.iou.request",
+        string="IOU Requests",
+        domain=[("state", "in", APPROVABLE_STATES)],
+    )
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("done", "Done"),
+        ],
+        string="Status",
+        default="draft",
+    )
+
+    approved_count = fields.Integer(
+        string="Approved",
+        readonly=True,
+    )
+
+    failed_count = fields.Integer(
+        string="Failed",
+        readonly=True,
+    )
+
+    result_log = fields.Text(
+        string="Result",
+        readonly=True,
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        defaults = super().default_get(fields_list)
+
+        active_model = self.env.context.get("active_model")
+        active_ids = self.env.context.get("active_ids") or []
+        if active_model == "petty.cash.request":
+            defaults["petty_cash_request_ids"] = [(6, 0, active_ids)]
+        elif active_model == "petty.cash.iou.request":
+            defaults["iou_request_ids"] = [(6, 0, active_ids)]
+
+        return defaults
+
+    @api.model
+    def bulk_approve(self, approval_type, petty_cash_requests=None, iou_requests=None):
+        """Approve petty cash and IOU requests in bulk.
+
+        Requests may be given as recordsets or as search domains. Each float's
+        disbursement limit is checked against a running balance, in request
+        date order, and the approvals are applied with one write per model.
+        A failing request is reported without aborting the rest of the batch.
+        The requests are written in bulk mode, so each float gets a single
+        summary message instead of tracking on every request.
+
+        :return: dict with the ``approved`` records per model and a list of
+                 ``(request name, reason)`` tuples under ``failed``
+        """
+        if approval_type not in APPROVAL_FIELDS:
+            raise UserError(_("Unknown approval type: %s") % approval_type)
+
+        flag_field, approver_field, role = APPROVAL_FIELDS[approval_type]
+        if not self.env["petty.cash.permission"].has_role(role, "manager"):
+            raise UserError(_("You do not have permission to grant this approval."))
+
+        batches = [
+            self._resolve_requests("petty.cash.request", petty_cash_requests)._bulk_mode(),
+            self._resolve_requests("petty.cash.iou.request", iou_requests)._bulk_mode(),
+        ]
+
+        # Running balance per float, shared by both request models
+        running_balance = {}
+        result = {"approved": {}, "failed": []}
+
+        for requests in batches:
+            approvable = requests.browse()
+            for request in requests.sorted(lambda r: (r.request_date, r.id)):
+                try:
+                    self._check_request(request, flag_field, running_balance)
+                except (UserError, ValidationError) as e:
+                    result["failed"].append((request.name, str(e)))
+                    continue
+                approvable |= request
+
+            approved, failed = self._write_approvals(
+                approvable,
+                {flag_field: True, approver_field: self.env.user.id},
+            )
+            result["approved"][requests._name] = approved
+            result["failed"].extend(failed)
+
+            # Requests whose write was rejected give their reservation back
+            for request in approvable - approved:
+                running_balance[request.float_request_id.id] += request.request_amount
+
+        return result
+
+    @api.model
+    def _resolve_requests(self, model_name, requests):
+        """Return a recordset from a recordset, a domain or None"""
+        model = self.env[model_name]
+        if requests is None:
+            return model
+        if isinstance(requests, list):
+            return model.search(requests)
+        return requests
+
+    @api.model
+    def _check_request(self, request, flag_field, running_balance):
+        """Validate one request and reserve its amount on the running balance"""
+        if request.state not in APPROVABLE_STATES:
+            raise UserError(_("Request is not awaiting approval."))
+        if request[flag_field]:
+            raise UserError(_("Request is already approved."))
+
+        float_request = request.float_request_id
+        if not float_request:
+            raise UserError(_("Request has no float."))
+        if float_request.state != "approved":
+            raise UserError(_("Float %s is not approved.") % float_request.name)
+
+        available = running_balance.get(
+            float_request.id, float_request.available_for_disbursement
+        )
+        float_request.check_disbursement_limit(request.request_amount, available=available)
+        running_balance[float_request.id] = available - request.request_amount
+
+    @api.model
+    def _write_approvals(self, requests, vals):
+        """Write ``vals`` on all requests at once, isolating failures.
+
+        If the batched write is rejected, the requests are written one by one
+        so that only the offending ones are reported.
+        """
+        if not requests:
+            return requests, []
+
+        try:
+            with self.env.cr.savepoint():
+                requests.write(vals)
+            return requests, []
+        except (UserError, ValidationError) as e:
+            _logger.info("Bulk approval batch rejected, retrying per request: %s", e)
+
+        approved = requests.browse()
+        failed = []
+        for request in requests:
+            try:
+                with self.env.cr.savepoint():
+                    request.write(vals)
+                approved |= request
+            except (UserError, ValidationError) as e:
+                failed.append((request.name, str(e)))
+        return approved, failed
+
+    @instrumented
+    def action_approve(self):
+        """Run the bulk approval and show the result"""
+        self.ensure_one()
+
+        if not self.petty_cash_request_ids and not self.iou_request_ids:
+            raise UserError(_("Please select at least one request to approve."))
+
+        result = self.bulk_approve(
+            self.approval_type,
+            petty_cash_requests=self.petty_cash_request_ids,
+            iou_requests=self.iou_request_ids,
+        )
+
+        approved_count = sum(len(records) for records in result["approved"].values())
+        lines = [_("%d request(s) approved.") % approved_count]
+        if result["failed"]:
+            lines.append(_("%d request(s) failed:") % len(result["failed"]))
+            lines.extend(f"- {name}: {reason}" for name, reason in result["failed"])
+
+        self.write({
+            "state": "done",
+            "approved_count": approved_count,
+            "failed_count": len(result["failed"]),
+            "result_log": "\n".join(lines),
+        })
+
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Bulk Approval"),
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def action_cancel(self):
+        """Cancel the wizard"""
+        return {"type": "ir.actions.act_window_close"}
@@ -1,10 +1,27 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError , ValidationError
+from odoo.tools import SQL
 
 import logging
 
+from ..models.float_denomination import (
+    DENOMINATION_VALUES,
+    to_denomination_vector,
+    vector_quantity,
+)
+from ..models.petty_cash_metric import instrumented
+
 _logger = logging.getLogger(__name__)
 
+# Context key -> (source model, wizard field, amount field, request type)
+PRELOAD_SOURCES = {
+    "default_request_id": ("petty.cash.request", "request_id", "request_amount", "petty_cash"),
+    "default_iou_request_id": ("petty.cash.iou.request", "iou_request_id", "request_amount", "iou"),
+    "default_reimbursement_id": (
+        "cash.reimbursement", "reimbursement_id", "required_amount", "reimbursement",
+    ),
+}
+
 
 class CashDenominationWizard(models.TransientModel):
     _name = "cash.denomination.wizard"
@@ -72,131 +89,179 @@ class CashDenominationWizard(models.TransientModel):
         compute="_compute_amount_difference",
     )
 
-    # Denomination fields
-    denom_5000_qty = fields.Integer(string="Rs. 5,000 Quantity", default=0)
-    denom_1000_qty = fields.Integer(string="Rs. 1,000 Quantity", default=0)
-    denom_500_qty = fields.Integer(string="Rs. 500 Quantity", default=0)
-    denom_100_qty = fields.Integer(string="Rs. 100 Quantity", default=0)
-    denom_50_qty = fields.Integer(string="Rs. 50 Quantity", default=0)
-    denom_20_qty = fields.Integer(string="Rs. 20 Quantity", default=0)
-    denom_10_qty = fields.Integer(string="Rs. 10 Quantity", default=0)
-    denom_5_qty = fields.Integer(string="Rs. 5 Quantity", default=0)
-    denom_2_qty = fields.Integer(string="Rs. 2 Quantity", default=0)
-    denom_1_qty = fields.Integer(string="Rs. 1 Quantity", default=0)
-
-    # Available denomination quantities - Regular fields, not computed
+    # Wizard state, stored as {"<denomination value>": quantity} vectors
+    denomination_quantities = fields.Json(string="Denomination Quantities")
+    denomination_available = fields.Json(
+        string="Available Denominations",
+        readonly=True,
+    )
+    balance_quantities = fields.Json(string="Balance Quantities")
+
+    # Denomination fields, virtual views on the vectors above
+    denom_5000_qty = fields.Integer(
+        string="Rs. 5,000 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_1000_qty = fields.Integer(
+        string="Rs. 1,000 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_500_qty = fields.Integer(
+        string="Rs. 500 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_100_qty = fields.Integer(
+        string="Rs. 100 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_50_qty = fields.Integer(
+        string="Rs. 50 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_20_qty = fields.Integer(
+        string="Rs. 20 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_10_qty = fields.Integer(
+        string="Rs. 10 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_5_qty = fields.Integer(
+        string="Rs. 5 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_2_qty = fields.Integer(
+        string="Rs. 2 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_1_qty = fields.Integer(
+        string="Rs. 1 Quantity",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_denomination_quantities",
+    )
+
+    # Available denomination quantities
     denom_5000_available = fields.Integer(
-        string="Rs. 5,000 Available", readonly=True, default=0
+        string="Rs. 5,000 Available", compute="_compute_denomination_fields"
     )
     denom_1000_available = fields.Integer(
-        string="Rs. 1,000 Available", readonly=True, default=0
+        string="Rs. 1,000 Available", compute="_compute_denomination_fields"
     )
     denom_500_available = fields.Integer(
-        string="Rs. 500 Available", readonly=True, default=0
+        string="Rs. 500 Available", compute="_compute_denomination_fields"
     )
     denom_100_available = fields.Integer(
-        string="Rs. 100 Available", readonly=True, default=0
+        string="Rs. 100 Available", compute="_compute_denomination_fields"
     )
     denom_50_available = fields.Integer(
-        string="Rs. 50 Available", readonly=True, default=0
+        string="Rs. 50 Available", compute="_compute_denomination_fields"
     )
     denom_20_available = fields.Integer(
-        string="Rs. 20 Available", readonly=True, default=0
+        string="Rs. 20 Available", compute="_compute_denomination_fields"
     )
     denom_10_available = fields.Integer(
-        string="Rs. 10 Available", readonly=True, default=0
+        string="Rs. 10 Available", compute="_compute_denomination_fields"
     )
     denom_5_available = fields.Integer(
-        string="Rs. 5 Available", readonly=True, default=0
+        string="Rs. 5 Available", compute="_compute_denomination_fields"
     )
     denom_2_available = fields.Integer(
-        string="Rs. 2 Available", readonly=True, default=0
+        string="Rs. 2 Available", compute="_compute_denomination_fields"
     )
     denom_1_available = fields.Integer(
-        string="Rs. 1 Available", readonly=True, default=0
+        string="Rs. 1 Available", compute="_compute_denomination_fields"
     )
 
     # Balance denomination fields
-    balance_5000_qty = fields.Integer(string="Balance Rs. 5,000", default=0)
-    balance_1000_qty = fields.Integer(string="Balance Rs. 1,000", default=0)
-    balance_500_qty = fields.Integer(string="Balance Rs. 500", default=0)
-    balance_100_qty = fields.Integer(string="Balance Rs. 100", default=0)
-    balance_50_qty = fields.Integer(string="Balance Rs. 50", default=0)
-    balance_20_qty = fields.Integer(string="Balance Rs. 20", default=0)
-    balance_10_qty = fields.Integer(string="Balance Rs. 10", default=0)
-    balance_5_qty = fields.Integer(string="Balance Rs. 5", default=0)
-    balance_2_qty = fields.Integer(string="Balance Rs. 2", default=0)
-    balance_1_qty = fields.Integer(string="Balance Rs. 1", default=0)
+    balance_5000_qty = fields.Integer(
+        string="Balance Rs. 5,000",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_1000_qty = fields.Integer(
+        string="Balance Rs. 1,000",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_500_qty = fields.Integer(
+        string="Balance Rs. 500",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_100_qty = fields.Integer(
+        string="Balance Rs. 100",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_50_qty = fields.Integer(
+        string="Balance Rs. 50",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_20_qty = fields.Integer(
+        string="Balance Rs. 20",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_10_qty = fields.Integer(
+        string="Balance Rs. 10",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_5_qty = fields.Integer(
+        string="Balance Rs. 5",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_2_qty = fields.Integer(
+        string="Balance Rs. 2",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
+    balance_1_qty = fields.Integer(
+        string="Balance Rs. 1",
+        compute="_compute_denomination_fields",
+        inverse="_inverse_balance_quantities",
+    )
 
     balance_5000_available = fields.Integer(
-        string="Balance Rs. 5,000 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 5,000 Available", compute="_compute_denomination_fields"
     )
     balance_1000_available = fields.Integer(
-        string="Balance Rs. 1,000 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 1,000 Available", compute="_compute_denomination_fields"
     )
     balance_500_available = fields.Integer(
-        string="Balance Rs. 500 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 500 Available", compute="_compute_denomination_fields"
     )
     balance_100_available = fields.Integer(
-        string="Balance Rs. 100 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 100 Available", compute="_compute_denomination_fields"
     )
     balance_50_available = fields.Integer(
-        string="Balance Rs. 50 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 50 Available", compute="_compute_denomination_fields"
     )
     balance_20_available = fields.Integer(
-        string="Balance Rs. 20 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 20 Available", compute="_compute_denomination_fields"
     )
     balance_10_available = fields.Integer(
-        string="Balance Rs. 10 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 10 Available", compute="_compute_denomination_fields"
     )
     balance_5_available = fields.Integer(
-        string="Balance Rs. 5 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 5 Available", compute="_compute_denomination_fields"
     )
     balance_2_available = fields.Integer(
-        string="Balance Rs. 2 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 2 Available", compute="_compute_denomination_fields"
     )
     balance_1_available = fields.Integer(
-        string="Balance Rs. 1 Available",
-        readonly=True,
-        default=0,
-        compute="_compute_balance_available",
-        store=True,
+        string="Balance Rs. 1 Available", compute="_compute_denomination_fields"
     )
 
     selected_balance_amount = fields.Float(
@@ -210,6 +275,30 @@ class CashDenominationWizard(models.TransientModel):
         readonly=True,
     )
 
+    @api.depends("denomination_quantities", "denomination_available", "balance_quantities")
+    def _compute_denomination_fields(self):
+        for record in self:
+            for value in DENOMINATION_VALUES:
+                qty = vector_quantity(record.denomination_quantities, value)
+                available = vector_quantity(record.denomination_available, value)
+                record[f"denom_{value}_qty"] = qty
+                record[f"denom_{value}_available"] = available
+                record[f"balance_{value}_qty"] = vector_quantity(record.balance_quantities, value)
+                # Available balance denominations after main selection
+                record[f"balance_{value}_available"] = max(0, available - qty)
+
+    def _inverse_denomination_quantities(self):
+        for record in self:
+            record.denomination_quantities = to_denomination_vector({
+                value: record[f"denom_{value}_qty"] for value in DENOMINATION_VALUES
+            })
+
+    def _inverse_balance_quantities(self):
+        for record in self:
+            record.balance_quantities = to_denomination_vector({
+                value: record[f"balance_{value}_qty"] for value in DENOMINATION_VALUES
+            })
+
     @api.depends("selected_amount", "requested_amount")
     def _compute_amount_difference(self):
         for record in self:
@@ -217,306 +306,115 @@ class CashDenominationWizard(models.TransientModel):
             record.amount_difference = difference
             record.is_amount_matched = difference < 0.01
 
-    @api.depends(
-        "denom_5000_qty",
-        "denom_1000_qty",
-        "denom_500_qty",
-        "denom_100_qty",
-        "denom_50_qty",
-        "denom_20_qty",
-        "denom_10_qty",
-        "denom_5_qty",
-        "denom_2_qty",
-        "denom_1_qty",
-    )
+    @api.depends("denomination_quantities")
     def _compute_selected_amount(self):
         for record in self:
-            amount = (
-                record.denom_5000_qty * 5000
-                + record.denom_1000_qty * 1000
-                + record.denom_500_qty * 500
-                + record.denom_100_qty * 100
-                + record.denom_50_qty * 50
-                + record.denom_20_qty * 20
-                + record.denom_10_qty * 10
-                + record.denom_5_qty * 5
-                + record.denom_2_qty * 2
-                + record.denom_1_qty * 1
+            record.selected_amount = sum(
+                value * vector_quantity(record.denomination_quantities, value)
+                for value in DENOMINATION_VALUES
             )
-            record.selected_amount = amount
 
     @api.depends("selected_amount", "requested_amount")
     def _compute_balance_amount(self):
         for record in self:
             record.balance_amount = record.selected_amount - record.requested_amount
 
-    @api.depends(
-        "denom_5000_available",
-        "denom_5000_qty",
-        "denom_1000_available",
-        "denom_1000_qty",
-        "denom_500_available",
-        "denom_500_qty",
-        "denom_100_available",
-        "denom_100_qty",
-        "denom_50_available",
-        "denom_50_qty",
-        "denom_20_available",
-        "denom_20_qty",
-        "denom_10_available",
-        "denom_10_qty",
-        "denom_5_available",
-        "denom_5_qty",
-        "denom_2_available",
-        "denom_2_qty",
-        "denom_1_available",
-        "denom_1_qty",
-    )
-    def _compute_balance_available(self):
-        """Compute available balance denominations after main selection"""
-        for record in self:
-            record.balance_5000_available = max(
-                0, record.denom_5000_available - record.denom_5000_qty
-            )
-            record.balance_1000_available = max(
-                0, record.denom_1000_available - record.denom_1000_qty
-            )
-            record.balance_500_available = max(
-                0, record.denom_500_available - record.denom_500_qty
-            )
-            record.balance_100_available = max(
-                0, record.denom_100_available - record.denom_100_qty
-            )
-            record.balance_50_available = max(
-                0, record.denom_50_available - record.denom_50_qty
-            )
-            record.balance_20_available = max(
-                0, record.denom_20_available - record.denom_20_qty
-            )
-            record.balance_10_available = max(
-                0, record.denom_10_available - record.denom_10_qty
-            )
-            record.balance_5_available = max(
-                0, record.denom_5_available - record.denom_5_qty
-            )
-            record.balance_2_available = max(
-                0, record.denom_2_available - record.denom_2_qty
-            )
-            record.balance_1_available = max(
-                0, record.denom_1_available - record.denom_1_qty
-            )
-
-    @api.depends(
-        "balance_5000_qty",
-        "balance_1000_qty",
-        "balance_500_qty",
-        "balance_100_qty",
-        "balance_50_qty",
-        "balance_20_qty",
-        "balance_10_qty",
-        "balance_5_qty",
-        "balance_2_qty",
-        "balance_1_qty",
-    )
+    @api.depends("balance_quantities")
     def _compute_selected_balance_amount(self):
         for record in self:
-            amount = (
-                record.balance_5000_qty * 5000
-                + record.balance_1000_qty * 1000
-                + record.balance_500_qty * 500
-                + record.balance_100_qty * 100
-                + record.balance_50_qty * 50
-                + record.balance_20_qty * 20
-                + record.balance_10_qty * 10
-                + record.balance_5_qty * 5
-                + record.balance_2_qty * 2
-                + record.balance_1_qty * 1
+            record.selected_balance_amount = sum(
+                value * vector_quantity(record.balance_quantities, value)
+                for value in DENOMINATION_VALUES
             )
-            record.selected_balance_amount = amount
 
     @api.model
+    @instrumented
     def default_get(self, fields_list):
-        """Set default values with proper context handling"""
+        """Preload the request and its float's drawer from the context"""
         defaults = super().default_get(fields_list)
+        for context_key, source in PRELOAD_SOURCES.items():
+            if self.env.context.get(context_key):
+                defaults.update(self._preload(source, self.env.context[context_key]))
+                break
+        return defaults
 
-        try:
-            # Handle different request types from context
-            if self.env.context.get("default_request_id"):
-                request_id = self.env.context.get("default_request_id")
-                request = self.env["petty.cash.request"].browse(request_id)
-                if request.exists():
-                    defaults.update({
-                        "request_id": request_id,
-                        "request_number": request.name,
-                        "requested_amount": request.request_amount,
-                        "request_type": "petty_cash"
-                    })
-                    float_request = request.float_request_id
-
-            elif self.env.context.get("default_iou_request_id"):
-                iou_request_id = self.env.context.get("default_iou_request_id")
-                iou_request = self.env["petty.cash.iou.request"].browse(iou_request_id)
-                if iou_request.exists():
-                    defaults.update({
-                        "iou_request_id": iou_request_id,
-                        "request_number": iou_request.name,
-                        "requested_amount": iou_request.request_amount,
-                        "request_type": "iou"
-                    })
-                    float_request = iou_request.float_request_id
-
-            elif self.env.context.get("default_reimbursement_id"):
-                reimbursement_id = self.env.context.get("default_reimbursement_id")
-                reimbursement = self.env["cash.reimbursement"].browse(reimbursement_id)
-                if reimbursement.exists():
-                    defaults.update({
-                        "reimbursement_id": reimbursement_id,
-                        "request_number": reimbursement.name,
-                        "requested_amount": reimbursement.required_amount,
-                        "request_type": "reimbursement"
-                    })
-                    float_request = reimbursement.float_request_id
-
-            # Load current cash in hand and denomination data
-            if 'float_request' in locals() and float_request:
-                defaults["cash_in_hand"] = float_request.cash_in_hand
-
-                # Get latest denomination record
-                denom_record = self.env["float.denomination"].search(
-                    [("float_request_id", "=", float_request.id)],
-                    order="last_updated desc",
-                    limit=1,
-                )
-
-                if denom_record:
-                    # Load current available denominations
-                    defaults.update({
-                        "available_denom_5000_qty": denom_record.denom_5000_qty,
-                        "available_denom_1000_qty": denom_record.denom_1000_qty,
-                        "available_denom_500_qty": denom_record.denom_500_qty,
-                        "available_denom_100_qty": denom_record.denom_100_qty,
-                        "available_denom_50_qty": denom_record.denom_50_qty,
-                        "available_denom_20_qty": denom_record.denom_20_qty,
-                        "available_denom_10_qty": denom_record.denom_10_qty,
-                        "available_denom_5_qty": denom_record.denom_5_qty,
-                        "available_denom_2_qty": denom_record.denom_2_qty,
-                        "available_denom_1_qty": denom_record.denom_1_qty,
-                    })
-
-        except Exception as e:
-            _logger.error(f"Error in default_get: {e}")
-            # Set safe defaults
-            defaults.update({
-                "request_number": "",
-                "requested_amount": 0.0,
-                "cash_in_hand": 0.0,
-            })
+    @api.model
+    def _preload(self, source, res_id):
+        """Return the wizard values of a source request in a single query
 
-        return defaults
+        Fetches the request amount, its float's cash in hand and the float's
+        current drawer together, instead of browsing each in turn.
+        """
+        model_name, field_name, amount_field, request_type = source
+        request = self.env[model_name].browse(res_id)
+        request.check_access("read")
+
+        request.flush_model(["name", amount_field, "float_request_id"])
+        self.env["float.request"].flush_model(["cash_in_hand"])
+        self.env["float.denomination"].flush_model()
+        self.env.cr.execute(SQL(
+            """SELECT r.name, r.%(amount)s, f.id, f.name, f.cash_in_hand, d.id, %(denominations)s
+                 FROM %(table)s r
+            LEFT JOIN float_request f ON f.id = r.float_request_id
+            LEFT JOIN LATERAL (
+                      SELECT *
+                        FROM float_denomination
+                       WHERE float_request_id = f.id
+                    ORDER BY last_updated DESC NULLS LAST, id DESC
+                       LIMIT 1
+                      ) d ON TRUE
+                WHERE r.id = %(res_id)s""",
+            amount=SQL.identifier(amount_field),
+            denominations=SQL(", ").join(
+                SQL.identifier("d", f"denom_{value}_qty") for value in DENOMINATION_VALUES
+            ),
+            table=SQL.identifier(request._table),
+            res_id=request.id,
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            raise UserError(_("The request to issue cash for no longer exists."))
+        name, amount, float_id, float_name, cash_in_hand, drawer_id, *quantities = row
+        if not float_id:
+            raise UserError(_("Request %s is not linked to a float.") % name)
+        if not drawer_id:
+            raise UserError(_("No denomination record found for float %s.") % float_name)
 
-    @api.onchange('is_cash_balanced', 'selected_balance_amount', 'requested_amount')
-    def _onchange_balance_amount(self):
-        """Calculate selected amount when balance is involved"""
-        if self.is_cash_balanced and self.selected_balance_amount:
-            # When giving balance, total disbursed = requested + balance
-            self.selected_amount = self.requested_amount + self.selected_balance_amount
-        elif not self.is_cash_balanced:
-            # No balance - only give requested amount
-            self.selected_amount = self.requested_amount
-            self.selected_balance_amount = 0.0
-
-    @api.onchange('denom_5000_qty', 'denom_1000_qty', 'denom_500_qty', 'denom_100_qty',
-                  'denom_50_qty', 'denom_20_qty', 'denom_10_qty', 'denom_5_qty',
-                  'denom_2_qty', 'denom_1_qty')
-    def _onchange_denomination_quantities(self):
-        """Calculate selected amount based on denomination quantities"""
-        total = (
-                (self.denom_5000_qty or 0) * 5000 +
-                (self.denom_1000_qty or 0) * 1000 +
-                (self.denom_500_qty or 0) * 500 +
-                (self.denom_100_qty or 0) * 100 +
-                (self.denom_50_qty or 0) * 50 +
-                (self.denom_20_qty or 0) * 20 +
-                (self.denom_10_qty or 0) * 10 +
-                (self.denom_5_qty or 0) * 5 +
-                (self.denom_2_qty or 0) * 2 +
-                (self.denom_1_qty or 0) * 1
-        )
-
-        self.selected_amount = total
-
-        # Auto-calculate balance if needed
-        if self.is_cash_balanced and total > self.requested_amount:
-            self.selected_balance_amount = total - self.requested_amount
-        elif not self.is_cash_balanced:
-            self.selected_balance_amount = 0.0
+        return {
+            field_name: request.id,
+            "request_number": name,
+            "requested_amount": amount,
+            "request_type": request_type,
+            "cash_in_hand": cash_in_hand,
+            "denomination_available": to_denomination_vector(
+                dict(zip(DENOMINATION_VALUES, quantities))
+            ),
+        }
 
     def _get_denomination_data(self, float_request):
         """Get denomination data from float request"""
-        # Search for the latest denomination record
-        current_denom = self.env["float.denomination"].search(
-            [("float_request_id", "=", float_request.id)],
-            order="last_updated desc",
-            limit=1,
-        )
-
-        if current_denom:
-            _logger.info(
-                f"Found denomination record: {current_denom.id} with total: {current_denom.total_amount}"
-            )
-            return {
-                "denom_5000_available": current_denom.denom_5000_qty,
-                "denom_1000_available": current_denom.denom_1000_qty,
-                "denom_500_available": current_denom.denom_500_qty,
-                "denom_100_available": current_denom.denom_100_qty,
-                "denom_50_available": current_denom.denom_50_qty,
-                "denom_20_available": current_denom.denom_20_qty,
-                "denom_10_available": current_denom.denom_10_qty,
-                "denom_5_available": current_denom.denom_5_qty,
-                "denom_2_available": current_denom.denom_2_qty,
-                "denom_1_available": current_denom.denom_1_qty,
-            }
-        else:
+        current_denom = self.env["float.denomination"]._get_drawer(float_request)
+
+        if not current_denom:
             _logger.warning(
                 f"No denomination record found for float: {float_request.name}"
             )
-            return {
-                "denom_5000_available": 0,
-                "denom_1000_available": 0,
-                "denom_500_available": 0,
-                "denom_100_available": 0,
-                "denom_50_available": 0,
-                "denom_20_available": 0,
-                "denom_10_available": 0,
-                "denom_5_available": 0,
-                "denom_2_available": 0,
-                "denom_1_available": 0,
-            }
+        return {
+            "denomination_available": to_denomination_vector({
+                value: current_denom[f"denom_{value}_qty"] for value in DENOMINATION_VALUES
+            }),
+        }
 
     @api.model_create_multi
+    @instrumented
     def create(self, vals_list):
         """Override create to ensure proper initialization"""
         records = super().create(vals_list)
 
         for record in records:
             # If denominations weren't loaded in default_get, load them now
-            if hasattr(record, "request_id") or hasattr(record, "iou_request_id"):
-                if all(
-                    getattr(record, f"denom_{d}_available", 0) == 0
-                    for d in [
-                        "5000",
-                        "1000",
-                        "500",
-                        "100",
-                        "50",
-                        "20",
-                        "10",
-                        "5",
-                        "2",
-                        "1",
-                    ]
-                ):
-                    record._load_denominations()
+            if not record.denomination_available:
+                record._load_denominations()
 
         return records
 
@@ -563,20 +461,12 @@ class CashDenominationWizard(models.TransientModel):
             },
         }
 
-    @api.constrains(
-        "denom_5000_qty",
-        "denom_1000_qty",
-        "denom_500_qty",
-        "denom_100_qty",
-        "denom_50_qty",
-        "denom_20_qty",
-        "denom_10_qty",
-        "denom_5_qty",
-        "denom_2_qty",
-        "denom_1_qty",
-    )
+    @api.constrains("denomination_quantities", "denomination_available")
     def _check_available_denominations(self):
         for record in self:
+            # A reimbursement refills the drawer, it is not limited by its contents
+            if record.request_type == "reimbursement":
+                continue
             errors = []
 
             checks = [
@@ -604,18 +494,7 @@ class CashDenominationWizard(models.TransientModel):
                 )
                 raise UserError(error_msg)
 
-    @api.constrains(
-        "balance_5000_qty",
-        "balance_1000_qty",
-        "balance_500_qty",
-        "balance_100_qty",
-        "balance_50_qty",
-        "balance_20_qty",
-        "balance_10_qty",
-        "balance_5_qty",
-        "balance_2_qty",
-        "balance_1_qty",
-    )
+    @api.constrains("balance_quantities", "denomination_available", "is_cash_balanced")
     def _check_balance_denominations(self):
         for record in self:
             if not record.is_cash_balanced:
@@ -682,16 +561,7 @@ class CashDenominationWizard(models.TransientModel):
             remaining -= needed * value
 
         # Update fields
-        self.denom_5000_qty = breakdown.get(5000, 0)
-        self.denom_1000_qty = breakdown.get(1000, 0)
-        self.denom_500_qty = breakdown.get(500, 0)
-        self.denom_100_qty = breakdown.get(100, 0)
-        self.denom_50_qty = breakdown.get(50, 0)
-        self.denom_20_qty = breakdown.get(20, 0)
-        self.denom_10_qty = breakdown.get(10, 0)
-        self.denom_5_qty = breakdown.get(5, 0)
-        self.denom_2_qty = breakdown.get(2, 0)
-        self.denom_1_qty = breakdown.get(1, 0)
+        self.denomination_quantities = to_denomination_vector(breakdown)
 
         if remaining > 0:
             raise UserError(
@@ -711,6 +581,7 @@ class CashDenominationWizard(models.TransientModel):
             },
         }
 
+    @instrumented
     def action_update_amount(self):
         """Update the denomination and process the request"""
         self.ensure_one()
@@ -728,67 +599,48 @@ class CashDenominationWizard(models.TransientModel):
                     _("Selected amount does not match the requested amount.")
                 )
 
-        operation = 'subtract'
-
+        # Cash leaves the drawer for requests and comes back for reimbursements
+        sign = -1
 
         # Get float request
         float_request = None
         if self.request_id:
             float_request = self.request_id.float_request_id
             record = self.request_id
-            record.state = "cash_issued"
+            record._workflow_transition("issue_cash")
         elif self.iou_request_id:
             float_request = self.iou_request_id.float_request_id
             record = self.iou_request_id
-            record.state = "pending_bill_submission"
-            record.cashReceivedByEmployee = True
+            record._workflow_transition("issue_cash")
         elif self.reimbursement_id:
             float_request = self.reimbursement_id.float_request_id
             record = self.reimbursement_id
-            operation == 'add'
+            sign = 1
             record.received_amount = self.selected_amount
             record.cash_received_by_handler = True
 
         if not float_request:
             raise UserError(_("No float request found."))
 
-        # Get current denomination and update it
-        current_denom = self.env["float.denomination"].search(
-            [("float_request_id", "=", float_request.id)],
-            order="last_updated desc",
-            limit=1,
-        )
-
+        current_denom = self.env["float.denomination"]._get_drawer(float_request)
         if not current_denom:
-            raise UserError(_("No float request found."))
+            raise UserError(_("No denomination record found for float %s.") % float_request.name)
 
-        denomination_changes = {
-            "denom_5000_qty": self.denom_5000_qty,
-            "denom_1000_qty": self.denom_1000_qty,
-            "denom_500_qty": self.denom_500_qty,
-            "denom_100_qty": self.denom_100_qty,
-            "denom_50_qty": self.denom_50_qty,
-            "denom_20_qty": self.denom_20_qty,
-            "denom_10_qty": self.denom_10_qty,
-            "denom_5_qty": self.denom_5_qty,
-            "denom_2_qty": self.denom_2_qty,
-            "denom_1_qty": self.denom_1_qty,
-        }
+        # Change handed back moves the other way
+        denomination_changes = {}
+        for value in DENOMINATION_VALUES:
+            qty = self[f"denom_{value}_qty"]
+            if self.is_cash_balanced:
+                qty -= self[f"balance_{value}_qty"]
+            denomination_changes[f"denom_{value}_qty"] = sign * qty
 
         try:
-            current_denom.update_denomination(denomination_changes, operation)
+            current_denom.apply_drawer_delta(denomination_changes, reference=record)
         except ValidationError as e:
             raise UserError(str(e))
 
-            # Update cash in hand for the float
-        if operation == 'subtract':
-            float_request.cash_in_hand -= self.selected_amount
-        else:
-            float_request.cash_in_hand += self.selected_amount
-
-            # Create denomination message
-
-        denomination_details = self._create_denomination_message(operation)
+        # Create denomination message
+        denomination_details = self._create_denomination_message()
         record.message_post(body=denomination_details)
 
         return {
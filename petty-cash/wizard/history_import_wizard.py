@@ -0,0 +1,552 @@
+import base64
+import codecs
+import csv
+import io
+import logging
+
+import psycopg2
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.models import LOG_ACCESS_COLUMNS
+from odoo.tools import SQL
+
+from ..models.float_denomination import DENOMINATION_VALUES
+
+_logger = logging.getLogger(__name__)
+
+# Temporary table the CSV file is copied into, dropped at commit
+STAGING_TABLE = "petty_cash_import_staging"
+
+# Invalid lines reported back to the user
+ERROR_LIMIT = 100
+
+# Column kind -> (pattern the text must match, column type it is cast to)
+COLUMN_KINDS = {
+    "char": (None, "varchar"),
+    "text": (None, "text"),
+    "selection": (None, "varchar"),
+    "float": (r"^-?[0-9]+(\.[0-9]+)?$", "numeric"),
+    "integer": (r"^[0-9]+$", "integer"),
+    "date": (r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$", "date"),
+    "datetime": (r"^[0-9]{4}-[0-9]{2}-[0-9]{2}( [0-9]{2}:[0-9]{2}(:[0-9]{2})?)?$", "timestamp"),
+}
+
+# CSV columns of the denomination snapshots: (field, kind, required, reference)
+DENOMINATION_COLUMNS = {
+    f"denom_{value}_qty": (f"denom_{value}_qty", "integer", False, None)
+    for value in DENOMINATION_VALUES
+}
+
+# Import type -> target model and CSV columns. Each column maps to a
+# (field, kind, required, reference) tuple, references being looked up
+# by a (model, key field) pair. Rows without a name get one from the
+# sequence, dated by the date column. Defaults may be callables of the
+# environment. Historical requests are approved, by the importing user
+# unless the approvers are given.
+IMPORT_TYPES = {
+    "float": {
+        "model": "float.request",
+        "columns": {
+            "name": ("name", "char", True, None),
+            "department": ("department_id", "many2one", True, ("hr.department", "name")),
+            "float_manager": ("float_manager_id", "many2one", True, ("res.users", "login")),
+            "initial_amount": ("initial_amount", "float", True, None),
+            "date_created": ("date_created", "date", False, None),
+            "state": ("state", "selection", False, None),
+        },
+        "defaults": {"state": "approved"},
+        "positive": ("initial_amount",),
+        "unique": ("name", "department"),
+    },
+    "petty_cash": {
+        "model": "petty.cash.request",
+        "sequence": "petty.cash.request",
+        "date_column": "request_date",
+        "columns": {
+            "name": ("name", "char", False, None),
+            "float": ("float_request_id", "many2one", True, ("float.request", "name")),
+            "request_by": ("request_by", "many2one", True, ("res.users", "login")),
+            "category": ("category", "many2one", True, ("petty.cash.category", "code")),
+            "request_date": ("request_date", "datetime", True, None),
+            "request_amount": ("request_amount", "float", True, None),
+            "description": ("description", "text", True, None),
+            "state": ("state", "selection", False, None),
+            "hod_approved_by": ("hodApprovedBy", "many2one", False, ("res.users", "login")),
+            "float_manager_approved_by": (
+                "floatManagerApprovedBy", "many2one", False, ("res.users", "login"),
+            ),
+        },
+        "defaults": {
+            "state": "completed",
+            "hod_approved_by": lambda env: env.uid,
+            "float_manager_approved_by": lambda env: env.uid,
+        },
+        "computed": {
+            "isHodApproved": SQL("TRUE"),
+            "isFloatManagerApproved": SQL("TRUE"),
+        },
+        "positive": ("request_amount",),
+        "unique": ("name",),
+    },
+    "iou": {
+        "model": "petty.cash.iou.request",
+        "sequence": "iou.request",
+        "date_column": "request_date",
+        "columns": {
+            "name": ("name", "char", False, None),
+            "float": ("float_request_id", "many2one", True, ("float.request", "name")),
+            "request_by": ("request_by", "many2one", True, ("res.users", "login")),
+            "request_date": ("request_date", "datetime", True, None),
+            "request_amount": ("request_amount", "float", True, None),
+            "reason_in_advance": ("reason_in_advance", "text", True, None),
+            "remarks": ("remarks", "text", False, None),
+            "state": ("state", "selection", False, None),
+            "hod_approved_by": ("hodApprovedBy", "many2one", False, ("res.users", "login")),
+            "float_manager_approved_by": (
+                "floatManagerApprovedBy", "many2one", False, ("res.users", "login"),
+            ),
+        },
+        "defaults": {
+            "state": "completed",
+            "hod_approved_by": lambda env: env.uid,
+            "float_manager_approved_by": lambda env: env.uid,
+        },
+        "computed": {
+            "isHodApproved": SQL("TRUE"),
+            "isFloatManagerApproved": SQL("TRUE"),
+        },
+        "positive": ("request_amount",),
+        "unique": ("name",),
+    },
+    "petty_cash_bill": {
+        "model": "petty.cash.bill.settlement",
+        "columns": {
+            "request": ("petty_cash_request_id", "many2one", True, ("petty.cash.request", "name")),
+            "date": ("date", "date", True, None),
+            "category": ("category", "many2one", True, ("petty.cash.category", "code")),
+            "amount": ("amount", "float", True, None),
+            "description": ("description", "text", False, None),
+            "status": ("status", "selection", False, None),
+        },
+        "defaults": {"status": "approved"},
+        "positive": ("amount",),
+    },
+    "iou_bill": {
+        "model": "iou.bill.settlement",
+        "columns": {
+            "request": ("iou_request_id", "many2one", True, ("petty.cash.iou.request", "name")),
+            "date": ("date", "datetime", True, None),
+            "category": ("category", "selection", True, None),
+            "amount": ("amount", "float", True, None),
+            "remarks": ("remarks", "text", False, None),
+            "status": ("status", "selection", False, None),
+        },
+        "defaults": {"status": "approved"},
+        "positive": ("amount",),
+    },
+    "snapshot": {
+        "model": "float.denomination.snapshot",
+        "columns": {
+            "float": ("float_request_id", "many2one", True, ("float.request", "name")),
+            "date": ("date", "datetime", True, None),
+            **DENOMINATION_COLUMNS,
+        },
+        "computed": {
+            "total_amount": SQL(" + ").join(
+                SQL("%s * COALESCE(NULLIF(trim(s.%s), '')::integer, 0)", value, SQL.identifier(name))
+                for value, name in zip(DENOMINATION_VALUES, DENOMINATION_COLUMNS)
+            ),
+        },
+        "unique": ("float", "date"),
+    },
+}
+
+
+class PettyCashHistoryImport(models.TransientModel):
+    _name = "petty.cash.history.import"
+    _description = "Petty Cash History Import"
+
+    import_type = fields.Selection(
+        [
+            ("float", "Floats"),
+            ("petty_cash", "Petty Cash Requests"),
+            ("iou", "IOU Requests"),
+            ("petty_cash_bill", "Petty Cash Bills"),
+            ("iou_bill", "IOU Bills"),
+            ("snapshot", "Denomination Snapshots"),
+        ],
+        string="Import",
+        required=True,
+        default="float",
+    )
+
+    file = fields.Binary(string="CSV File", required=True)
+
+    filename = fields.Char(string="Filename")
+
+    expected_columns = fields.Char(
+        string="Columns",
+        compute="_compute_expected_columns",
+        help="Columns of the CSV file, the required ones marked with *",
+    )
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("done", "Done"),
+        ],
+        string="Status",
+        default="draft",
+    )
+
+    imported_count = fields.Integer(string="Imported", readonly=True)
+
+    result_log = fields.Text(string="Result", readonly=True)
+
+    @api.depends("import_type")
+    def _compute_expected_columns(self):
+        for wizard in self:
+            columns = IMPORT_TYPES[wizard.import_type]["columns"] if wizard.import_type else {}
+            wizard.expected_columns = ", ".join(
+                f"{name}*" if required else name
+                for name, (__, __, required, __) in columns.items()
+            )
+
+    def action_import(self):
+        """Load the CSV file and show the result"""
+        self.ensure_one()
+        records = self._import_csv(self.import_type, base64.b64decode(self.file))
+        self.write({
+            "state": "done",
+            "imported_count": len(records),
+            "result_log": _("%s record(s) imported.") % len(records),
+        })
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Import History"),
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    @api.model
+    def _import_csv(self, import_type, data):
+        """Bulk load a CSV file of historical records
+
+        The file is copied into a staging table, references are resolved and
+        rows validated in set-based SQL, names are reserved in blocks and the
+        rows are inserted with a single statement. Stored fields of the new
+        records and of the floats they belong to are recomputed once, at the
+        end. Nothing is imported if any row is invalid.
+
+        :return: the imported records
+        """
+        if not self.env["petty.cash.permission"].has_role("admin", "system"):
+            raise UserError(_("Only petty cash administrators can import history."))
+
+        spec = IMPORT_TYPES[import_type]
+        model = self.env[spec["model"]]
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        header = self._read_header(spec, data)
+
+        try:
+            with self.env.cr.savepoint():
+                self._create_staging(spec)
+                self._copy_staging(header, data)
+                self._resolve_references(spec)
+                self._check_staging(spec, model)
+                if spec.get("sequence"):
+                    self._allocate_names(spec)
+                ids = self._insert_records(spec, model)
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            raise UserError(_("The file could not be imported: %s") % e.diag.message_primary)
+
+        records = model.browse(ids)
+        self._recompute(records, spec)
+        _logger.info("Imported %s %s records", len(records), model._name)
+        return records
+
+    @api.model
+    def _read_header(self, spec, data):
+        """Return the CSV columns of the file, in file order"""
+        first_line = data.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+        header = [name.strip().lower() for name in next(csv.reader([first_line]), [])]
+        unknown = set(header) - set(spec["columns"])
+        if unknown:
+            raise UserError(
+                _("Unknown columns: %(unknown)s. Expected: %(expected)s",
+                  unknown=", ".join(sorted(unknown)), expected=", ".join(spec["columns"]))
+            )
+        if len(set(header)) != len(header):
+            raise UserError(_("Each column can only appear once in the file."))
+        missing = [
+            name for name, (__, __, required, __) in spec["columns"].items()
+            if required and name not in header and not (name == "name" and spec.get("sequence"))
+        ]
+        if missing:
+            raise UserError(_("Missing required columns: %s") % ", ".join(missing))
+        return header
+
+    @api.model
+    def _create_staging(self, spec):
+        cr = self.env.cr
+        cr.execute(SQL("DROP TABLE IF EXISTS %s", SQL.identifier(STAGING_TABLE)))
+        columns = [SQL("%s text", SQL.identifier(name)) for name in spec["columns"]]
+        columns += [
+            SQL("%s integer", SQL.identifier(f"{name}_id"))
+            for name, (__, __, __, reference) in spec["columns"].items()
+            if reference
+        ]
+        cr.execute(SQL(
+            "CREATE TEMPORARY TABLE %s (line bigserial PRIMARY KEY, %s) ON COMMIT DROP",
+            SQL.identifier(STAGING_TABLE),
+            SQL(", ").join(columns),
+        ))
+
+    @api.model
+    def _copy_staging(self, header, data):
+        query = SQL(
+            "COPY %s (%s) FROM STDIN WITH (FORMAT csv, HEADER true, ENCODING 'UTF8')",
+            SQL.identifier(STAGING_TABLE),
+            SQL(", ").join(SQL.identifier(name) for name in header),
+        )
+        self.env.cr.copy_expert(query.code, io.BytesIO(data))
+
+    @api.model
+    def _resolve_references(self, spec):
+        """Set the id of every reference, leaving unknown and ambiguous keys empty"""
+        for name, (__, __, __, reference) in spec["columns"].items():
+            if not reference:
+                continue
+            ref_model = self.env[reference[0]]
+            self.env.cr.execute(SQL(
+                """UPDATE %(staging)s s
+                      SET %(ref_id)s = r.id
+                     FROM (SELECT %(key)s AS key, MIN(id) AS id
+                             FROM %(table)s
+                         GROUP BY 1
+                           HAVING COUNT(*) = 1) r
+                    WHERE r.key = trim(s.%(column)s)""",
+                staging=SQL.identifier(STAGING_TABLE),
+                ref_id=SQL.identifier(f"{name}_id"),
+                key=ref_model._field_to_sql(ref_model._table, reference[1]),
+                table=SQL.identifier(ref_model._table),
+                column=SQL.identifier(name),
+            ))
+
+    @api.model
+    def _check_staging(self, spec, model):
+        """Validate all staged rows in one query, reporting the first error of each"""
+        checks = []
+        for name, (fname, kind, required, reference) in spec["columns"].items():
+            value = SQL("NULLIF(trim(s.%s), '')", SQL.identifier(name))
+            if required and not (name == "name" and spec.get("sequence")):
+                checks.append((SQL("%s IS NULL", value), _("%s is required") % name))
+            if reference:
+                checks.append((
+                    SQL("%s IS NOT NULL AND s.%s IS NULL", value, SQL.identifier(f"{name}_id")),
+                    _("%s is unknown or ambiguous") % name,
+                ))
+                continue
+            pattern = COLUMN_KINDS[kind][0]
+            if pattern:
+                checks.append((SQL("%s !~ %s", value, pattern), _("%s is not a valid %s") % (name, kind)))
+            if kind == "selection":
+                allowed = model._fields[fname].get_values(self.env)
+                checks.append((
+                    SQL("%s NOT IN %s", value, tuple(allowed)),
+                    _("%s must be one of %s") % (name, ", ".join(allowed)),
+                ))
+        for name in spec.get("positive", ()):
+            checks.append((
+                SQL("NULLIF(trim(s.%s), '')::numeric <= 0", SQL.identifier(name)),
+                _("%s must be greater than zero") % name,
+            ))
+        if spec.get("unique"):
+            checks += self._get_unique_checks(spec, model)
+
+        self.env.cr.execute(SQL(
+            """SELECT line, error, COUNT(*) OVER ()
+                 FROM (SELECT s.line, CASE %s END AS error FROM %s s) checked
+                WHERE error IS NOT NULL
+             ORDER BY line
+                LIMIT %s""",
+            SQL(" ").join(SQL("WHEN %s THEN %s", condition, error) for condition, error in checks),
+            SQL.identifier(STAGING_TABLE),
+            ERROR_LIMIT,
+        ))
+        rows = self.env.cr.fetchall()
+        if rows:
+            # Line 1 of the file is the header
+            lines = [_("Line %s: %s") % (line + 1, error) for line, error, __ in rows]
+            raise UserError(
+                _("%s invalid line(s), nothing was imported.") % rows[0][2] + "\n" + "\n".join(lines)
+            )
+
+    @api.model
+    def _get_unique_checks(self, spec, model):
+        """Return the checks of the unique key against the file and the table"""
+        staged, existing = [], []
+        for name in spec["unique"]:
+            fname, __, __, reference = spec["columns"][name]
+            value = (
+                SQL("s.%s", SQL.identifier(f"{name}_id")) if reference
+                else SQL("NULLIF(trim(s.%s), '')", SQL.identifier(name))
+            )
+            staged.append(value)
+            column = SQL("t.%s", SQL.identifier(fname))
+            if not reference:
+                value = SQL("%s::%s", value, SQL(COLUMN_KINDS[spec["columns"][name][1]][1]))
+            existing.append(SQL("%s = %s", column, value))
+        complete = SQL(" AND ").join(SQL("%s IS NOT NULL", value) for value in staged)
+        keys = ", ".join(spec["unique"])
+        return [
+            (
+                SQL("%s AND COUNT(*) OVER (PARTITION BY %s) > 1", complete, SQL(", ").join(staged)),
+                _("%s is repeated in the file") % keys,
+            ),
+            (
+                SQL("%s AND EXISTS (SELECT 1 FROM %s t WHERE %s)",
+                    complete, SQL.identifier(model._table), SQL(" AND ").join(existing)),
+                _("%s already exists") % keys,
+            ),
+        ]
+
+    @api.model
+    def _allocate_names(self, spec):
+        """Name the unnamed rows from the sequence, reserving numbers in blocks"""
+        cr = self.env.cr
+        sequence = self.env["ir.sequence"].search([
+            ("code", "=", spec["sequence"]),
+            ("company_id", "in", [self.env.company.id, False]),
+        ], order="company_id", limit=1)
+        if not sequence:
+            raise UserError(_("Sequence %s not found.") % spec["sequence"])
+
+        cr.execute(SQL(
+            """SELECT line, NULLIF(trim(%s), '')::timestamp::date AS day
+                 FROM %s
+                WHERE NULLIF(trim(name), '') IS NULL
+             ORDER BY day, line""",
+            SQL.identifier(spec["date_column"]),
+            SQL.identifier(STAGING_TABLE),
+        ))
+        rows = cr.fetchall()
+        if not rows:
+            return
+
+        # Group the rows by the sequence or date range numbering them
+        blocks = {}
+        for line, day in rows:
+            current = next(
+                (current for current in blocks
+                 if current._name == "ir.sequence" or current.date_from <= day <= current.date_to),
+                None,
+            ) or sequence._get_current_sequence(sequence_date=day)
+            blocks.setdefault(current, []).append((line, day))
+
+        lines, names = [], []
+        affixes = {}
+        for current, block in blocks.items():
+            numbers = self._reserve_numbers(sequence, current, len(block))
+            date_range = current.date_from if current._name != "ir.sequence" else None
+            for (line, day), number in zip(block, numbers):
+                if day not in affixes:
+                    affixes[day] = sequence._get_prefix_suffix(date=day, date_range=date_range)
+                prefix, suffix = affixes[day]
+                lines.append(line)
+                names.append(prefix + "%0*d" % (sequence.padding, number) + suffix)
+
+        cr.execute(SQL(
+            """UPDATE %s s
+                  SET name = v.name
+                 FROM unnest(%s::bigint[], %s::text[]) AS v(line, name)
+                WHERE s.line = v.line""",
+            SQL.identifier(STAGING_TABLE), lines, names,
+        ))
+
+    @api.model
+    def _reserve_numbers(self, sequence, current, count):
+        """Reserve ``count`` numbers of a sequence or date range in one query"""
+        cr = self.env.cr
+        if sequence.implementation == "standard":
+            seq_name = (
+                "ir_sequence_%03d" % sequence.id if current._name == "ir.sequence"
+                else "ir_sequence_%03d_%03d" % (sequence.id, current.id)
+            )
+            cr.execute(SQL("SELECT nextval(%s) FROM generate_series(1, %s)", seq_name, count))
+            return sorted(row[0] for row in cr.fetchall())
+
+        increment = sequence.number_increment
+        current.flush_recordset(["number_next"])
+        cr.execute(SQL(
+            "UPDATE %s SET number_next = number_next + %s WHERE id = %s RETURNING number_next",
+            SQL.identifier(current._table), increment * count, current.id,
+        ))
+        last = cr.fetchone()[0]
+        current.invalidate_recordset(["number_next"])
+        return list(range(last - increment * count, last, increment))
+
+    @api.model
+    def _insert_records(self, spec, model):
+        """Insert all staged rows with a single statement, return the new ids"""
+        columns, values = [], []
+        for name, (fname, kind, __, reference) in spec["columns"].items():
+            columns.append(SQL.identifier(fname))
+            if reference:
+                value = SQL("s.%s", SQL.identifier(f"{name}_id"))
+            else:
+                value = SQL("NULLIF(trim(s.%s), '')", SQL.identifier(name))
+            if name in spec.get("defaults", {}):
+                default = spec["defaults"][name]
+                value = SQL("COALESCE(%s, %s)", value, default(self.env) if callable(default) else default)
+            values.append(value if reference else SQL("%s::%s", value, SQL(COLUMN_KINDS[kind][1])))
+        for fname, expression in spec.get("computed", {}).items():
+            columns.append(SQL.identifier(fname))
+            values.append(expression)
+
+        # Plain stored fields not in the file get their default, evaluated once
+        mapped = {fname for fname, *__ in spec["columns"].values()} | set(spec.get("computed", {}))
+        defaults = model.default_get([
+            fname for fname, field in model._fields.items()
+            if field.store and field.column_type and not field.compute
+            and fname not in mapped and fname not in LOG_ACCESS_COLUMNS and fname != "id"
+        ])
+        for fname, value in defaults.items():
+            columns.append(SQL.identifier(fname))
+            values.append(SQL("%s", model._fields[fname].convert_to_column_insert(value, model)))
+
+        self.env.cr.execute(SQL(
+            """INSERT INTO %s (%s, create_uid, create_date, write_uid, write_date)
+                    SELECT %s, %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+                      FROM %s s
+                  ORDER BY s.line
+                 RETURNING id""",
+            SQL.identifier(model._table),
+            SQL(", ").join(columns),
+            SQL(", ").join(values),
+            self.env.uid,
+            self.env.uid,
+            SQL.identifier(STAGING_TABLE),
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _recompute(self, records, spec):
+        """Compute the stored fields of the records and of their dependents at once"""
+        # Drop what the cache knows of the parents' one2many before marking them
+        self.env.invalidate_all()
+        for field in records._fields.values():
+            if field.store and field.compute:
+                self.env.add_to_compute(field, records)
+        fnames = [fname for fname, *__ in spec["columns"].values()]
+        records.modified(fnames + list(spec.get("computed", {})), create=True)
+        self.env.flush_all()
+        self.env["float.dashboard"]._trigger_refresh()
+
+    def action_cancel(self):
+        """Cancel the wizard"""
+        return {"type": "ir.actions.act_window_close"}
@@ -2,6 +2,12 @@ import logging
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 
+from ..models.float_denomination import (
+    DENOMINATION_VALUES,
+    to_denomination_vector,
+    vector_quantity,
+)
+
 _logger = logging.getLogger(__name__)
 
 
@@ -60,29 +66,70 @@ class InitialDenominationWizard(models.TransientModel):
         help="Select a template for denomination setup.",
     )
 
-    # Denomination fields
-    denom_5000_qty = fields.Integer(string="Rs. 5,000 Notes", default=0)
-    denom_1000_qty = fields.Integer(string="Rs. 1,000 Notes", default=0)
-    denom_500_qty = fields.Integer(string="Rs. 500 Notes", default=0)
-    denom_100_qty = fields.Integer(string="Rs. 100 Notes", default=0)
-    denom_50_qty = fields.Integer(string="Rs. 50 Notes", default=0)
-    denom_20_qty = fields.Integer(string="Rs. 20 Notes", default=0)
-    denom_10_qty = fields.Integer(string="Rs. 10 Coins", default=0)
-    denom_5_qty = fields.Integer(string="Rs. 5 Coins", default=0)
-    denom_2_qty = fields.Integer(string="Rs. 2 Coins", default=0)
-    denom_1_qty = fields.Integer(string="Rs. 1 Coins", default=0)
+    # Wizard state, stored as a {"<denomination value>": quantity} vector
+    denomination_quantities = fields.Json(string="Denomination Quantities")
+
+    # Denomination fields, virtual views on the vector above
+    denom_5000_qty = fields.Integer(
+        string="Rs. 5,000 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_1000_qty = fields.Integer(
+        string="Rs. 1,000 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_500_qty = fields.Integer(
+        string="Rs. 500 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_100_qty = fields.Integer(
+        string="Rs. 100 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_50_qty = fields.Integer(
+        string="Rs. 50 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_20_qty = fields.Integer(
+        string="Rs. 20 Notes",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_10_qty = fields.Integer(
+        string="Rs. 10 Coins",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_5_qty = fields.Integer(
+        string="Rs. 5 Coins",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_2_qty = fields.Integer(
+        string="Rs. 2 Coins",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
+    denom_1_qty = fields.Integer(
+        string="Rs. 1 Coins",
+        compute="_compute_denomination_quantities",
+        inverse="_inverse_denomination_quantities",
+    )
 
     calculated_total = fields.Float(
         string="Calculated Total",
         compute="_compute_calculated_total",
-        store=True,
         help="Total amount calculated from the denominations.",
     )
 
     difference = fields.Float(
         string="Difference",
         compute="_compute_difference",
-        store=True,
     )
 
     is_balanced = fields.Boolean(
@@ -182,31 +229,32 @@ class InitialDenominationWizard(models.TransientModel):
 
         return breakdown
 
-    @api.depends(
-        "denom_5000_qty",
-        "denom_1000_qty",
-        "denom_500_qty",
-        "denom_100_qty",
-        "denom_50_qty",
-        "denom_20_qty",
-        "denom_10_qty",
-        "denom_5_qty",
-        "denom_2_qty",
-        "denom_1_qty",
-    )
+    @api.depends("denomination_quantities")
+    def _compute_denomination_quantities(self):
+        for record in self:
+            for value in DENOMINATION_VALUES:
+                record[f"denom_{value}_qty"] = vector_quantity(
+                    record.denomination_quantities, value
+                )
+
+    def _inverse_denomination_quantities(self):
+        for record in self:
+            record.denomination_quantities = to_denomination_vector({
+                value: record[f"denom_{value}_qty"] for value in DENOMINATION_VALUES
+            })
+
+    def _set_breakdown(self, breakdown):
+        """Store a ``{denom_<value>_qty: qty}`` breakdown in the vector"""
+        self.denomination_quantities = to_denomination_vector({
+            value: breakdown.get(f"denom_{value}_qty", 0) for value in DENOMINATION_VALUES
+        })
+
+    @api.depends("denomination_quantities")
     def _compute_calculated_total(self):
         for record in self:
-            record.calculated_total = (
-                (record.denom_5000_qty * 5000)
-                + (record.denom_1000_qty * 1000)
-                + (record.denom_500_qty * 500)
-                + (record.denom_100_qty * 100)
-                + (record.denom_50_qty * 50)
-                + (record.denom_20_qty * 20)
-                + (record.denom_10_qty * 10)
-                + (record.denom_5_qty * 5)
-                + (record.denom_2_qty * 2)
-                + (record.denom_1_qty * 1)
+            record.calculated_total = sum(
+                value * vector_quantity(record.denomination_quantities, value)
+                for value in DENOMINATION_VALUES
             )
 
     @api.depends("calculated_total", "initial_amount")
@@ -219,18 +267,7 @@ class InitialDenominationWizard(models.TransientModel):
         for record in self:
             record.is_balanced = abs(record.difference) < 0.01
 
-    @api.constrains(
-        "denom_5000_qty",
-        "denom_1000_qty",
-        "denom_500_qty",
-        "denom_100_qty",
-        "denom_50_qty",
-        "denom_20_qty",
-        "denom_10_qty",
-        "denom_5_qty",
-        "denom_2_qty",
-        "denom_1_qty",
-    )
+    @api.constrains("denomination_quantities")
     def _check_negative_values(self):
         for record in self:
             denomination_fields = [
@@ -252,18 +289,7 @@ class InitialDenominationWizard(models.TransientModel):
                         _("Denomination quantities cannot be negative.")
                     )
 
-    @api.depends(
-        "denom_5000_qty",
-        "denom_1000_qty",
-        "denom_500_qty",
-        "denom_100_qty",
-        "denom_50_qty",
-        "denom_20_qty",
-        "denom_10_qty",
-        "denom_5_qty",
-        "denom_2_qty",
-        "denom_1_qty",
-    )
+    @api.depends("denomination_quantities")
     def _compute_denomination_amounts(self):
         for record in self:
             record.denom_5000_amount = record.denom_5000_qty * 5000
@@ -304,8 +330,7 @@ class InitialDenominationWizard(models.TransientModel):
         else:
             return
 
-        for field, qty in breakdown.items():
-            setattr(self, field, qty)
+        self._set_breakdown(breakdown)
 
     def _get_balanced_template(self, amount):
         """Balanced template for denomination setup."""
@@ -408,8 +433,7 @@ class InitialDenominationWizard(models.TransientModel):
 
         breakdown = self._get_balanced_template(amount)
 
-        for field, qty in breakdown.items():
-            setattr(self, field, qty)
+        self._set_breakdown(breakdown)
 
         return {
             "type": "ir.actions.client",
@@ -441,8 +465,7 @@ class InitialDenominationWizard(models.TransientModel):
         
         try:
 
-            for field, value in clear_values.items():
-                setattr(self, field, value)
+            self._set_breakdown(clear_values)
                 
         except Exception as e:
             return {